@@ -0,0 +1,263 @@
+from typing import Dict, List, Optional
+import logging
+import os
+import threading
+import time
+import weakref
+import psutil
+
+# Added to every Chrome we launch so leftovers can be traced back to the process that started them
+OWNER_SWITCH = "--monitor-owner"
+CHROME_NAMES = ('chrome', 'chromium')
+MB = 1024 * 1024
+
+def owner_argument() -> str:
+    return f"{OWNER_SWITCH}={os.getpid()}"
+
+def owner_of(cmdline: Optional[List[str]]) -> Optional[int]:
+    """PID of the monitor process that launched a Chrome, from its command line"""
+    for argument in cmdline or ():
+        if argument.startswith(f"{OWNER_SWITCH}="):
+            try:
+                return int(argument.split('=', 1)[1])
+            except ValueError:
+                return None
+    return None
+
+class TrackedBrowser:
+    """One driver's process tree as seen by the watchdog"""
+    __slots__ = ('monitor', 'root', 'started', 'processes', 'rss', 'peak_rss', 'cpu')
+
+    def __init__(self, monitor, root: psutil.Process):
+        self.monitor = weakref.ref(monitor)
+        self.root = root
+        self.started = time.monotonic()
+        self.processes: Dict[int, psutil.Process] = {}  # Kept between samples for cpu_percent()
+        self.rss = 0
+        self.peak_rss = 0
+        self.cpu = 0.0
+
+class BrowserWatchdog:
+    """Process-wide watchdog over every chromedriver/Chrome tree we start.
+
+    WebMonitor registers its driver's process tree once the driver is up
+    and unregisters it in cleanup(). Every `interval` seconds the watchdog
+    samples RSS and CPU per tree. A tree over max_rss or older than max_age
+    gets recycle_reason set on its WebMonitor, and the CheckPipeline swaps
+    the browser before its next check, so nothing is torn down mid-check.
+    The sweep also kills:
+      - trees whose WebMonitor was dropped without cleanup();
+      - chromedriver children of this process that no WebMonitor owns
+        (a driver start that failed halfway);
+      - Chrome processes tagged with this process, or with a process that
+        no longer exists, that are not part of a tracked tree.
+    Processes younger than orphan_grace are left alone so a driver still
+    starting up is never mistaken for an orphan.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(BrowserWatchdog, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def initialize(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.tracked: Dict[int, TrackedBrowser] = {}  # Root (chromedriver) PID -> tree
+        self.max_rss = 700 * MB
+        self.max_age = 4 * 3600.0
+        self.interval = 30.0
+        self.orphan_grace = 120.0
+        self.stats = {'recycles_requested': 0, 'orphans_reaped': 0, 'abandoned_reaped': 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, max_rss_mb: Optional[float] = None, max_age: Optional[float] = None,
+                  interval: Optional[float] = None, orphan_grace: Optional[float] = None):
+        if max_rss_mb is not None:
+            self.max_rss = int(max_rss_mb * MB)
+        if max_age is not None:
+            self.max_age = max_age
+        if interval is not None:
+            self.interval = interval
+        if orphan_grace is not None:
+            self.orphan_grace = orphan_grace
+
+    # ----- registration -----
+
+    def track(self, web_monitor):
+        try:
+            root = psutil.Process(web_monitor.driver.service.process.pid)
+        except Exception as e:
+            self.logger.warning(f"Could not track browser process: {e}")
+            return
+        with self._lock:
+            self.tracked[root.pid] = TrackedBrowser(web_monitor, root)
+
+    def untrack(self, web_monitor):
+        with self._lock:
+            for pid, entry in list(self.tracked.items()):
+                if entry.monitor() is web_monitor:
+                    del self.tracked[pid]
+
+    def request_recycle(self, reason: str) -> int:
+        """Flag every tracked browser for replacement at its owner's next check; returns how many"""
+        with self._lock:
+            monitors = [entry.monitor() for entry in self.tracked.values()]
+        flagged = 0
+        for monitor in monitors:
+            if monitor is not None and not monitor.recycle_reason:
+                monitor.recycle_reason = reason
+                flagged += 1
+        self.stats['recycles_requested'] += flagged
+        return flagged
+
+    # ----- background sweep -----
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="browser-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        stop = self._stop
+        while not stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                self.logger.error(f"Browser watchdog sweep failed: {e}")
+
+    def sweep(self):
+        self.sample()
+        self.reap_orphans()
+
+    def sample(self):
+        """Measure every tracked tree and flag the ones due for a recycle"""
+        with self._lock:
+            entries = list(self.tracked.items())
+        for pid, entry in entries:
+            monitor = entry.monitor()
+            if monitor is None:
+                # The WebMonitor went away without cleanup(); nothing will ever close this browser
+                self._forget(pid)
+                self.stats['abandoned_reaped'] += self.kill_tree(entry.root)
+                continue
+            if not self._measure(entry):
+                monitor.recycle_reason = monitor.recycle_reason or "browser process exited"
+                self._forget(pid)
+                continue
+            reason = None
+            if entry.rss > self.max_rss:
+                reason = f"RSS {entry.rss / MB:.0f} MB over {self.max_rss / MB:.0f} MB"
+            elif time.monotonic() - entry.started > self.max_age:
+                reason = f"session older than {self.max_age / 3600:.1f} h"
+            if reason and not monitor.recycle_reason:
+                monitor.recycle_reason = reason
+                self.stats['recycles_requested'] += 1
+                self.logger.info(f"Browser {pid} due for recycle: {reason}")
+
+    def _measure(self, entry: TrackedBrowser) -> bool:
+        try:
+            current = [entry.root] + entry.root.children(recursive=True)
+        except psutil.Error:
+            return False
+        processes = {}
+        rss = 0
+        cpu = 0.0
+        for process in current:
+            process = entry.processes.get(process.pid, process)
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(None)
+            except psutil.Error:
+                continue
+            processes[process.pid] = process
+        entry.processes = processes
+        entry.rss = rss
+        entry.peak_rss = max(entry.peak_rss, rss)
+        entry.cpu = cpu
+        return True
+
+    def _forget(self, pid: int):
+        with self._lock:
+            self.tracked.pop(pid, None)
+
+    def owned_pids(self) -> set:
+        with self._lock:
+            roots = [entry.root for entry in self.tracked.values()]
+        owned = set()
+        for root in roots:
+            try:
+                owned.add(root.pid)
+                owned.update(child.pid for child in root.children(recursive=True))
+            except psutil.Error:
+                continue
+        return owned
+
+    def find_orphans(self) -> List[psutil.Process]:
+        own_pid = os.getpid()
+        owned = self.owned_pids()
+        now = time.time()
+        orphans = {}
+        for process in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline', 'create_time']):
+            info = process.info
+            name = (info['name'] or '').lower()
+            if (not name.startswith(CHROME_NAMES) or info['pid'] in owned
+                    or now - (info['create_time'] or now) < self.orphan_grace):
+                continue
+            if name.startswith('chromedriver'):
+                if info['ppid'] == own_pid:
+                    orphans[info['pid']] = process
+                continue
+            owner = owner_of(info['cmdline'])
+            if owner is None or (owner != own_pid and psutil.pid_exists(owner)):
+                continue
+            orphans[info['pid']] = process
+            try:
+                # Take the chromedriver that launched it too, if one is left
+                parent = process.parent()
+                if parent is not None and parent.pid not in owned and parent.name().lower().startswith('chromedriver'):
+                    orphans[parent.pid] = parent
+            except psutil.Error:
+                continue
+        return list(orphans.values())
+
+    def reap_orphans(self) -> int:
+        killed = sum(self.kill_tree(process) for process in self.find_orphans())
+        if killed:
+            self.stats['orphans_reaped'] += killed
+            self.logger.warning(f"Reaped {killed} orphaned browser processes")
+        return killed
+
+    def kill_tree(self, root: psutil.Process) -> int:
+        try:
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0
+        killed = []
+        for process in processes:
+            try:
+                process.kill()
+                killed.append(process)
+            except psutil.Error:
+                continue
+        psutil.wait_procs(killed, timeout=1.0)
+        return len(killed)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            entries = list(self.tracked.values())
+        return dict(
+            self.stats,
+            browsers=len(entries),
+            total_rss_mb=round(sum(entry.rss for entry in entries) / MB, 1),
+            max_rss_mb=round(max((entry.rss for entry in entries), default=0) / MB, 1),
+            cpu_percent=round(sum(entry.cpu for entry in entries), 1)
+        )
@@ -0,0 +1,586 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchElementException, NoSuchWindowException, SessionNotCreatedException,
+    StaleElementReferenceException, TimeoutException
+)
+import logging
+import random
+import threading
+import time
+from core.managers.checkout_executor import CheckoutResult
+from core.managers.circuit_breaker import CircuitBreakerRegistry, host_of
+from core.managers.task_manager import extract_product_id
+from core.managers.response_cache import ResponseCache, content_hash
+from core.managers.render_data import extract_render_data_from_html, extract_title, parse_product_info
+from core.managers.sku_selector import SkuSelector
+from core.managers.web_monitor import WebMonitor
+
+class ErrorKind(Enum):
+    TRANSIENT_NETWORK = "transient_network"
+    STALE_DRIVER = "stale_driver"
+    MISSING_RENDER_DATA = "missing_render_data"
+    CHALLENGE_PAGE = "challenge_page"
+    CIRCUIT_OPEN = "circuit_open"
+    NOTIFICATION = "notification"
+    UNKNOWN = "unknown"
+
+class CheckError(Exception):
+    """A check stage failed; kind decides how the pipeline reacts"""
+    def __init__(self, kind: ErrorKind, message: str, stage: Optional[str] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.stage = stage
+
+class CheckCancelled(Exception):
+    """The worker was asked to stop while a check was in progress"""
+
+# Exception types that decide the kind on their own
+STALE_DRIVER_ERRORS = (InvalidSessionIdException, NoSuchWindowException, SessionNotCreatedException, ConnectionError)
+NETWORK_ERRORS = (TimeoutException, TimeoutError)
+PAGE_CONTENT_ERRORS = (NoSuchElementException, StaleElementReferenceException)
+# Error message fragments that mean the browser session is gone and must be replaced
+STALE_DRIVER_MARKERS = (
+    'invalid session id', 'chrome not reachable', 'disconnected', 'no such window',
+    'session deleted', 'target window already closed', 'connection refused',
+    'max retries exceeded', 'failed to establish a new connection', 'driver not initialized'
+)
+NETWORK_MARKERS = (
+    'net::err_', 'timed out', 'timeout', 'err_connection', 'err_internet_disconnected',
+    'err_name_not_resolved', 'err_proxy'
+)
+def classify_error(error: BaseException) -> ErrorKind:
+    """Map an exception raised while checking a product to an ErrorKind.
+    The exception type decides first; the message is only read for generic
+    WebDriverExceptions and other untyped errors."""
+    if isinstance(error, CheckError):
+        return error.kind
+    if isinstance(error, STALE_DRIVER_ERRORS):
+        return ErrorKind.STALE_DRIVER
+    if isinstance(error, NETWORK_ERRORS):
+        return ErrorKind.TRANSIENT_NETWORK
+    if isinstance(error, PAGE_CONTENT_ERRORS):
+        return ErrorKind.MISSING_RENDER_DATA
+    message = str(error).lower()
+    if any(marker in message for marker in STALE_DRIVER_MARKERS):
+        return ErrorKind.STALE_DRIVER
+    if any(marker in message for marker in NETWORK_MARKERS):
+        return ErrorKind.TRANSIENT_NETWORK
+    return ErrorKind.UNKNOWN
+
+def summarize_skus(skus: List[dict]) -> Tuple[bool, List[str]]:
+    """Overall availability and one "<variant> : Available/Unavailable" line per SKU"""
+    availability_strings = []
+    availability = False
+    for sku in skus:
+        prop_values = '-'.join(prop['prop_value'] for prop in sku.get('sku_sale_props', []))
+        in_stock = sku.get('stock', 0) > 0
+        availability_strings.append(f"{prop_values} : {'Available' if in_stock else 'Unavailable'}")
+        availability = availability or in_stock
+    return availability, availability_strings
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.5  # Fraction of each delay that is randomized
+    retry_on: FrozenSet[ErrorKind] = frozenset({ErrorKind.TRANSIENT_NETWORK, ErrorKind.STALE_DRIVER})
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retry number `attempt` (1-based), with jitter"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+    def should_retry(self, kind: ErrorKind, attempt: int) -> bool:
+        return kind in self.retry_on and attempt < self.max_attempts
+
+DEFAULT_POLICIES = {
+    'fetch': RetryPolicy(max_attempts=4, base_delay=2.0, max_delay=30.0),
+    'extract': RetryPolicy(
+        max_attempts=3, base_delay=2.0, max_delay=15.0,
+        retry_on=frozenset({ErrorKind.MISSING_RENDER_DATA, ErrorKind.STALE_DRIVER, ErrorKind.TRANSIENT_NETWORK})
+    ),
+    # In-page fetches used while polling inside a drop window: retry fast or not at all
+    'fast_fetch': RetryPolicy(max_attempts=2, base_delay=0.2, max_delay=1.0),
+    'fast_extract': RetryPolicy(
+        max_attempts=2, base_delay=0.2, max_delay=1.0,
+        retry_on=frozenset({ErrorKind.MISSING_RENDER_DATA, ErrorKind.TRANSIENT_NETWORK})
+    ),
+    'diff': RetryPolicy(max_attempts=1),
+    'notify': RetryPolicy(
+        max_attempts=3, base_delay=2.0, max_delay=20.0,
+        retry_on=frozenset({ErrorKind.NOTIFICATION, ErrorKind.TRANSIENT_NETWORK, ErrorKind.UNKNOWN})
+    ),
+}
+# Backoff between whole check cycles after a check failed for good
+FAILURE_POLICY = RetryPolicy(max_attempts=0, base_delay=30.0, max_delay=600.0)
+
+@dataclass
+class CheckResult:
+    product_title: str
+    product_url: str
+    availability: bool
+    availability_strings: List[str]
+    changed: bool = False
+    became_available: bool = False
+    notified: bool = False
+    attempts: Dict[str, int] = field(default_factory=dict)
+    skus: List[dict] = field(default_factory=list)
+    detected_at: float = 0.0  # time.monotonic() when availability was computed
+    checkout: Optional[CheckoutResult] = None
+    stock: Tuple[bool, ...] = ()  # In stock per SKU, in page order
+
+class CheckPipeline:
+    """Runs one product check as fetch -> extract -> diff -> notify.
+
+    Each stage has its own RetryPolicy. A stale driver is replaced in place
+    instead of ending the task; the caller only sees a CheckError once a
+    stage has used up its retries. Checks are gated by the host's shared
+    circuit breaker, which challenge pages trip.
+    """
+
+    STAGES = ('fetch', 'extract', 'diff', 'notify')
+
+    def __init__(self, driver_path, url, notifier: Callable[[str, str, List[str]], bool],
+                 stop_event: Optional[threading.Event] = None,
+                 policies: Optional[Dict[str, RetryPolicy]] = None,
+                 recycle_after_missing=2, session_store=None, egress_pool=None,
+                 checkout: Optional[Callable[['CheckResult'], CheckoutResult]] = None,
+                 stock_history=None, event_log=None, sku_selector: Optional[SkuSelector] = None):
+        self.logger = logging.getLogger(__name__)
+        self.driver_path = driver_path
+        self.url = url
+        self.notifier = notifier
+        self.stop_event = stop_event or threading.Event()
+        self.policies = dict(DEFAULT_POLICIES, **(policies or {}))
+        self.recycle_after_missing = recycle_after_missing
+        self.web_monitor = None
+        self.page_loaded = False
+        self.last_result: Optional[CheckResult] = None
+        self.consecutive_failures = 0
+        self.missing_render_data = 0
+        self.driver_recycles = 0
+        self._lock = threading.RLock()
+        self.host = host_of(url)
+        self.breakers = CircuitBreakerRegistry()
+        self.breaker = self.breakers.get(self.host)
+        self.detector = self.breakers.detector
+        self.session_store = session_store
+        self.slot = None
+        self.egress_pool = egress_pool
+        self.proxy = None
+        self.document = None  # Last in-page fetch response for the fast path
+        self.checkout = checkout
+        self._background = None
+        self.stock_history = stock_history
+        self.product_id = extract_product_id(url)
+        self.response_cache = ResponseCache()
+        self.event_log = event_log  # Stock changes are appended here
+        self.sku_selector = sku_selector  # Only these variants count when set
+        self._selection = None  # (product_info, selected SKUs, unmatched selectors) of the last check
+
+    # ----- pipeline driver -----
+
+    def run_check(self, fast=False) -> CheckResult:
+        """Run all stages once; raises CheckError or CheckCancelled.
+
+        fast=True re-fetches the document from inside the already loaded page
+        instead of reloading it, which is what sub-second drop polling uses.
+        """
+        attempts = {}
+        data = self.load(attempts, fast)
+        try:
+            result = self.run_stage('diff', lambda: self.diff(data), attempts)
+            if result.availability:
+                if self.checkout is None:
+                    result.notified = self.run_stage('notify', lambda: self.notify(result), attempts)
+                else:
+                    result.notified = self.checkout_and_notify(result, attempts)
+        except CheckError:
+            self.consecutive_failures += 1
+            raise
+        result.attempts = attempts
+        self.last_result = result
+        self.consecutive_failures = 0
+        return result
+
+    def checkout_and_notify(self, result: CheckResult, attempts: Dict[str, int]) -> bool:
+        """Add to cart right away while the notification goes out in parallel"""
+        if self._background is None:
+            self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notify")
+        notification = self._background.submit(self.run_stage, 'notify', lambda: self.notify(result), attempts)
+        try:
+            result.checkout = self.checkout(result)
+        except Exception as e:
+            self.logger.error(f"Checkout failed: {e}")
+        return notification.result()
+
+    def prewarm(self):
+        """Get the session ready ahead of a drop: slot, proxy, restored cookies,
+        product page loaded and past any verification, without notifying"""
+        self.load({}, fast=False)
+        self.logger.info(f"Session pre-warmed for {self.url}")
+
+    def load(self, attempts: Dict[str, int], fast: bool) -> dict:
+        """Run the fetch and extract stages under the circuit breaker"""
+        if not fast:
+            # Between checks and outside drop polling: swap a browser the watchdog flagged
+            self.recycle_if_requested()
+        self.ensure_egress()
+        if not self.breaker.allow_request():
+            raise CheckError(ErrorKind.CIRCUIT_OPEN, f"Checks paused for {self.host} after challenge pages")
+        if fast:
+            fetch, extract, names = self.fetch_fast, self.extract_fast, ('fast_fetch', 'fast_extract')
+        else:
+            fetch, extract, names = self.fetch, self.extract, ('fetch', 'extract')
+        started = time.monotonic()
+        try:
+            self.run_stage(names[0], fetch, attempts)
+            fetch_latency = time.monotonic() - started
+            data = self.run_stage(names[1], extract, attempts, before_retry=fetch)
+        except CheckError as e:
+            self.consecutive_failures += 1
+            if self.egress_pool is not None:
+                self.egress_pool.record(
+                    self.proxy,
+                    challenged=e.kind == ErrorKind.CHALLENGE_PAGE,
+                    failed=e.kind == ErrorKind.TRANSIENT_NETWORK
+                )
+            if e.kind == ErrorKind.CHALLENGE_PAGE:
+                self.breaker.record_challenge()
+                if self.session_store:
+                    # The stored cookies may be what got flagged
+                    self.session_store.invalidate(self.host)
+            else:
+                self.breaker.release()
+            raise
+        except CheckCancelled:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        if self.egress_pool is not None:
+            self.egress_pool.record(self.proxy, latency=fetch_latency)
+        self.save_session()
+        return data
+
+    def run_stage(self, name: str, func: Callable, attempts: Dict[str, int], before_retry: Optional[Callable] = None):
+        policy = self.policies[name]
+        attempt = 0
+        while True:
+            attempt += 1
+            attempts[name] = attempt
+            self.raise_if_cancelled()
+            try:
+                if attempt > 1 and before_retry:
+                    before_retry()
+                return func()
+            except CheckCancelled:
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                self.logger.warning(f"Stage {name} failed (attempt {attempt}, {kind.value}): {e}")
+                if kind == ErrorKind.STALE_DRIVER:
+                    self.recycle_driver()
+                if not policy.should_retry(kind, attempt):
+                    raise CheckError(kind, str(e), stage=name) from e
+                self.sleep(policy.delay(attempt))
+
+    def failure_backoff(self, error: CheckError) -> float:
+        """Wait before the next check cycle after a failed one"""
+        if error.kind in (ErrorKind.CHALLENGE_PAGE, ErrorKind.CIRCUIT_OPEN):
+            # The shared breaker decides when the host is worth trying again
+            return self.breaker.retry_after()
+        return FAILURE_POLICY.delay(self.consecutive_failures)
+
+    def raise_if_cancelled(self):
+        if self.stop_event.is_set():
+            raise CheckCancelled()
+
+    def sleep(self, seconds: float):
+        if self.stop_event.wait(seconds):
+            raise CheckCancelled()
+
+    # ----- stages -----
+
+    def fetch(self):
+        """Stage 1: make sure a browser is up and holds a fresh copy of the page"""
+        with self._lock:
+            if self.web_monitor is None:
+                self.web_monitor = self.create_web_monitor()
+                self.page_loaded = False
+            web_monitor = self.web_monitor
+        if not self.page_loaded:
+            if not web_monitor.open_url(self.url):
+                raise self.fetch_error("Failed to initialize browser or load URL")
+            self.page_loaded = True
+            return
+        if not web_monitor.reload_page():
+            raise self.fetch_error("Failed to reload page")
+
+    def fetch_error(self, message):
+        reason = self.challenge_reason(include_markup=False)
+        if reason:
+            self.detector.record(self.host, True)
+            return CheckError(ErrorKind.CHALLENGE_PAGE, f"{message}: challenge page ({reason})")
+        error = self.web_monitor.last_error if self.web_monitor else None
+        if error is None:
+            return CheckError(ErrorKind.TRANSIENT_NETWORK, message)
+        kind = classify_error(error)
+        return CheckError(ErrorKind.TRANSIENT_NETWORK if kind == ErrorKind.UNKNOWN else kind, f"{message}: {error}")
+
+    def extract(self) -> dict:
+        """Stage 2: read the RENDER_DATA payload from the loaded page"""
+        web_monitor = self.web_monitor
+        if web_monitor is None or web_monitor.driver is None:
+            raise CheckError(ErrorKind.STALE_DRIVER, "Driver not initialized")
+        script = web_monitor.find_element_safe(By.XPATH, "//*[@id='RENDER_DATA']")
+        if not script:
+            reason = self.challenge_reason()
+            self.detector.record(self.host, bool(reason))
+            if reason:
+                raise CheckError(ErrorKind.CHALLENGE_PAGE, f"Challenge page served instead of product page ({reason})")
+            self.missing_render_data += 1
+            if self.missing_render_data >= self.recycle_after_missing:
+                # The session keeps serving broken pages; start from a clean browser
+                self.missing_render_data = 0
+                self.recycle_driver()
+            raise CheckError(ErrorKind.MISSING_RENDER_DATA, "Render data script not found")
+        self.missing_render_data = 0
+        self.detector.record(self.host, False)
+
+        return self.parse_cached(
+            script.get_attribute('innerHTML'),
+            title=web_monitor.driver.title,
+            product_url=web_monitor.get_current_url()
+        )
+
+    def parse_cached(self, raw_data: str, title: str, product_url: str, headers: Optional[dict] = None) -> dict:
+        """Parse RENDER_DATA unless the cache already holds the same payload for this URL"""
+        body_hash = content_hash(raw_data)
+        entry = self.response_cache.match(self.url, body_hash)
+        if entry is None:
+            entry = self.response_cache.store(
+                self.url, body_hash, self.parse(raw_data), title, product_url, len(raw_data), headers
+            )
+        return {
+            'product_title': title,
+            'product_url': product_url,
+            'product_info': entry.product_info
+        }
+
+    def parse(self, raw_data: str) -> dict:
+        try:
+            return parse_product_info(raw_data)
+        except (ValueError, KeyError, TypeError) as e:
+            raise CheckError(ErrorKind.MISSING_RENDER_DATA, f"Unexpected render data layout: {e}")
+
+    def fetch_fast(self):
+        """Fast stage 1: fetch the product document from inside the loaded page"""
+        if self.web_monitor is None or not self.page_loaded:
+            # Nothing warm to fetch from yet; fall back to a normal page load
+            self.document = None
+            return self.fetch()
+        document = self.web_monitor.fetch_document(self.url, self.response_cache.conditional_headers(self.url))
+        if document is None:
+            raise self.fetch_error("In-page fetch failed")
+        if document['status'] in (403, 429):
+            self.detector.record(self.host, True)
+            raise CheckError(ErrorKind.CHALLENGE_PAGE, f"Product fetch refused with HTTP {document['status']}")
+        if document['status'] >= 400:
+            raise CheckError(ErrorKind.TRANSIENT_NETWORK, f"Product fetch failed with HTTP {document['status']}")
+        self.document = document
+
+    def extract_fast(self) -> dict:
+        """Fast stage 2: pull RENDER_DATA out of the fetched markup"""
+        document = self.document
+        if document is None:
+            return self.extract()
+        if document['status'] == 304:
+            entry = self.response_cache.not_modified(self.url)
+            if entry is not None:
+                self.detector.record(self.host, False)
+                return {'product_title': entry.title, 'product_url': entry.product_url, 'product_info': entry.product_info}
+            # The cached copy was evicted after the validators went out; fetch the page in full
+            document = self.web_monitor.fetch_document(self.url)
+            if document is None or document['status'] != 200:
+                raise CheckError(ErrorKind.TRANSIENT_NETWORK, "Unconditional re-fetch after 304 failed")
+            self.document = document
+        raw_data = extract_render_data_from_html(document['body'])
+        if raw_data is None:
+            reason = self.detector.detect(extract_title(document['body']), document.get('url'), document['body'])
+            self.detector.record(self.host, bool(reason))
+            if reason:
+                raise CheckError(ErrorKind.CHALLENGE_PAGE, f"Challenge page served instead of product page ({reason})")
+            raise CheckError(ErrorKind.MISSING_RENDER_DATA, "Render data script not found in fetched page")
+        self.detector.record(self.host, False)
+        return self.parse_cached(
+            raw_data,
+            title=extract_title(document['body']) or self.web_monitor.driver.title,
+            product_url=document.get('url') or self.url,
+            headers=document.get('headers')
+        )
+
+    def challenge_reason(self, include_markup=True):
+        """Ask the detector whether the loaded page is a verification/captcha page"""
+        web_monitor = self.web_monitor
+        if web_monitor is None or web_monitor.driver is None:
+            return None
+        try:
+            driver = web_monitor.driver
+            markup = driver.page_source if include_markup else None
+            return self.detector.detect(driver.title, driver.current_url, markup)
+        except Exception:
+            return None
+
+    def diff(self, data: dict) -> CheckResult:
+        """Stage 3: compute availability and compare against the previous check"""
+        skus, missing = self.select_skus(data['product_info'])
+        availability, availability_strings = summarize_skus(skus)
+        availability_strings += [f"{selector} : Not found" for selector in missing]
+
+        result = CheckResult(
+            product_title=data['product_title'],
+            product_url=data['product_url'],
+            availability=availability,
+            availability_strings=availability_strings,
+            skus=skus,
+            detected_at=time.monotonic(),
+            stock=tuple((sku.get('stock', 0) or 0) > 0 for sku in skus)
+        )
+        if self.stock_history is not None:
+            self.stock_history.record_skus(self.product_id, skus)
+            self.stock_history.maybe_save()
+        previous = self.last_result
+        result.changed = previous is None or previous.availability_strings != availability_strings
+        result.became_available = availability and (previous is None or not previous.availability)
+        if previous is not None and result.changed:
+            self.record_change(self.product_id, result)
+        return result
+
+    def select_skus(self, product_info: dict) -> Tuple[List[dict], List[str]]:
+        """SKUs the task watches and the selectors that matched none of them"""
+        skus = product_info.get('skus', [])
+        if not isinstance(skus, list):
+            skus = [skus]
+        if self.sku_selector is None:
+            return skus, []
+        selection = self._selection
+        # A cache hit hands back the same parsed payload, so the last selection still holds
+        if selection is None or selection[0] is not product_info:
+            selection = self._selection = (product_info,) + self.sku_selector.select(skus)
+        return selection[1], selection[2]
+
+    def record_change(self, product_id: str, result: CheckResult):
+        if self.event_log is not None:
+            self.event_log.append(
+                'change',
+                product_id=product_id,
+                url=result.product_url,
+                title=result.product_title,
+                available=result.availability,
+                strings=result.availability_strings
+            )
+
+    def notify(self, result: CheckResult) -> bool:
+        """Stage 4: send the availability notification"""
+        if not self.notifier(result.product_title, result.product_url, result.availability_strings):
+            raise CheckError(ErrorKind.NOTIFICATION, "Notification could not be sent")
+        return True
+
+    # ----- driver lifecycle -----
+
+    def ensure_egress(self):
+        """Lease a session slot and pick its proxy; a proxy change restarts the browser"""
+        if self.session_store is not None and self.slot is None:
+            self.slot = self.session_store.acquire_slot(self.host)
+        if self.egress_pool is None:
+            return
+        proxy = self.egress_pool.assign(self.egress_key())
+        if proxy != self.proxy:
+            if self.web_monitor is not None:
+                self.logger.info(f"Moving {self.url} from proxy {self.proxy} to {proxy}")
+                self.recycle_driver()
+            self.proxy = proxy
+            self.breaker = self.breakers.get(self.host, proxy)
+
+    def egress_key(self) -> str:
+        slot = self.slot if self.slot is not None else id(self)
+        return f"{self.host}-{slot}"
+
+    def create_web_monitor(self) -> WebMonitor:
+        """Start a browser in a session slot, warmed with the host's stored session"""
+        if self.session_store is None:
+            return WebMonitor(self.driver_path, proxy=self.proxy)
+        if self.slot is None:
+            self.slot = self.session_store.acquire_slot(self.host)
+        web_monitor = WebMonitor(
+            self.driver_path,
+            cache_dir=self.session_store.cache_dir(self.host, self.slot),
+            proxy=self.proxy
+        )
+        state = self.session_store.load(self.host)
+        if state is not None:
+            web_monitor.restore_session(state.live_cookies(), state.local_storage)
+        return web_monitor
+
+    def save_session(self):
+        """Share this browser's session with other tasks on the host (rate limited)"""
+        if self.session_store is None or self.web_monitor is None or not self.session_store.needs_save(self.host):
+            return
+        session = self.web_monitor.export_session()
+        if session is not None:
+            self.session_store.save(self.host, *session)
+
+    def release_slot(self):
+        if self.egress_pool is not None:
+            self.egress_pool.release(self.egress_key())
+            self.proxy = None
+        if self.session_store is not None and self.slot is not None:
+            self.session_store.release_slot(self.host, self.slot)
+            self.slot = None
+
+    def recycle_if_requested(self):
+        web_monitor = self.web_monitor
+        if web_monitor is not None and web_monitor.recycle_reason:
+            self.logger.info(f"Recycling browser for {self.url}: {web_monitor.recycle_reason}")
+            self.recycle_driver()
+
+    def recycle_driver(self):
+        """Replace the browser session; the next fetch reopens the product page"""
+        with self._lock:
+            old_monitor, self.web_monitor = self.web_monitor, None
+            self.page_loaded = False
+            self.driver_recycles += 1
+        if old_monitor:
+            processes = old_monitor.get_browser_processes()
+            old_monitor.cleanup()
+            for process in processes:
+                try:
+                    if process.is_running():
+                        process.kill()
+                except Exception:
+                    continue
+        self.logger.info(f"Recycled browser session for {self.url} (total {self.driver_recycles})")
+
+    def close(self) -> bool:
+        """Close the browser for good"""
+        with self._lock:
+            web_monitor, self.web_monitor = self.web_monitor, None
+            self.page_loaded = False
+            self.release_slot()
+            background, self._background = self._background, None
+        if background:
+            background.shutdown(wait=False)
+        if web_monitor:
+            web_monitor.cleanup()
+            return True
+        return False
+
+    def browser_processes(self):
+        web_monitor = self.web_monitor
+        return web_monitor.get_browser_processes() if web_monitor else []
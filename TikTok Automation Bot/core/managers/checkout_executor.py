@@ -0,0 +1,181 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import logging
+import statistics
+import threading
+import time
+from core.managers.session_store import ACCOUNT_PREFIX
+from core.managers.web_monitor import WebMonitor
+
+@dataclass
+class CheckoutSelectors:
+    """XPaths used on the product page; override them to drive a different (or mock) shop"""
+    sku_option: str = "//*[(self::div or self::span or self::button) and normalize-space(text())={value}]"
+    add_to_cart: str = "//button[contains(translate(normalize-space(.), 'ADDTOCR', 'addtocr'), 'add to cart')]"
+    confirmation: str = (
+        "//*[contains(translate(normalize-space(text()), 'ADDTOCR', 'addtocr'), 'added to cart')"
+        " or @data-e2e='cart-toast']"
+    )
+
+@dataclass
+class CheckoutResult:
+    success: bool
+    account: str
+    sku_id: Optional[str] = None
+    sku_label: Optional[str] = None
+    latency: Optional[float] = None  # Seconds from detection to confirmed cart add
+    error: Optional[str] = None
+
+def xpath_literal(value: str) -> str:
+    """Quote a string for use inside an XPath expression"""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+def select_in_stock_sku(skus: List[dict]) -> Optional[dict]:
+    """Pick the SKU to buy: the first one with stock"""
+    for sku in skus:
+        if sku.get('stock', 0) > 0:
+            return sku
+    return None
+
+class CheckoutExecutor:
+    """Adds a restocked item to the cart from a logged-in, pre-warmed browser per account.
+
+    Account sessions are kept in the SessionStore under "account:<name>";
+    they are restored into the account browser on start and saved back after
+    every successful cart add. Only one checkout runs per account at a time.
+    """
+
+    def __init__(self, driver_path, session_store=None, egress_pool=None,
+                 selectors: Optional[CheckoutSelectors] = None, step_timeout=5.0):
+        self.logger = logging.getLogger(__name__)
+        self.driver_path = driver_path
+        self.session_store = session_store
+        self.egress_pool = egress_pool
+        self.selectors = selectors or CheckoutSelectors()
+        self.step_timeout = step_timeout
+        self._lock = threading.Lock()
+        self._monitors: Dict[str, WebMonitor] = {}
+        self._account_locks: Dict[str, threading.Lock] = {}
+        self.latencies: deque = deque(maxlen=1000)  # Most recent successful checkouts
+
+    @staticmethod
+    def session_key(account: str) -> str:
+        return f"{ACCOUNT_PREFIX}{account}"
+
+    def _account_lock(self, account: str) -> threading.Lock:
+        with self._lock:
+            return self._account_locks.setdefault(account, threading.Lock())
+
+    def _get_monitor(self, account: str) -> WebMonitor:
+        web_monitor = self._monitors.get(account)
+        if web_monitor is not None and web_monitor.driver is not None:
+            if not web_monitor.recycle_reason:
+                return web_monitor
+            # Flagged by the watchdog (memory, age or new driver settings); the session is restored below
+            self.logger.info(f"Recycling checkout browser for {account}: {web_monitor.recycle_reason}")
+            web_monitor.cleanup()
+        key = self.session_key(account)
+        proxy = self.egress_pool.assign(key) if self.egress_pool is not None else None
+        web_monitor = WebMonitor(self.driver_path, proxy=proxy)
+        if self.session_store is not None:
+            state = self.session_store.load(key)
+            if state is not None:
+                web_monitor.restore_session(state.live_cookies(), state.local_storage)
+            else:
+                self.logger.warning(f"No stored login session for checkout account {account}")
+        with self._lock:
+            self._monitors[account] = web_monitor
+        return web_monitor
+
+    def prewarm(self, account: str, product_url: str) -> bool:
+        """Open the product page in the account's browser ahead of time"""
+        with self._account_lock(account):
+            web_monitor = self._get_monitor(account)
+            if web_monitor.url == product_url and web_monitor.get_current_url():
+                return True
+            return web_monitor.open_url(product_url)
+
+    def add_to_cart(self, account: str, product_url: str, skus: List[dict],
+                    detected_at: Optional[float] = None) -> CheckoutResult:
+        """Select the in-stock SKU and add it to the cart; detected_at is a time.monotonic() stamp"""
+        detected_at = detected_at if detected_at is not None else time.monotonic()
+        sku = select_in_stock_sku(skus)
+        if sku is None:
+            return CheckoutResult(False, account, error="No SKU in stock")
+        sku_label = '-'.join(prop['prop_value'] for prop in sku.get('sku_sale_props', []))
+        result = CheckoutResult(False, account, sku_id=str(sku.get('sku_id', '')) or None, sku_label=sku_label)
+
+        with self._account_lock(account):
+            try:
+                web_monitor = self._get_monitor(account)
+                if web_monitor.url != product_url:
+                    if not web_monitor.open_url(product_url):
+                        raise Exception(f"Could not open product page: {web_monitor.last_error}")
+                else:
+                    # The warm page still shows the old stock state; refresh it
+                    web_monitor.driver.refresh()
+
+                for prop in sku.get('sku_sale_props', []):
+                    self._click(web_monitor, self.selectors.sku_option.format(value=xpath_literal(prop['prop_value'])))
+                self._click(web_monitor, self.selectors.add_to_cart)
+                WebDriverWait(web_monitor.driver, self.step_timeout).until(
+                    EC.presence_of_element_located((By.XPATH, self.selectors.confirmation))
+                )
+                result.latency = time.monotonic() - detected_at
+                result.success = True
+                self.latencies.append(result.latency)
+                self._save_session(account, web_monitor)
+                self.logger.info(f"Added {sku_label or 'item'} to cart for {account} in {result.latency:.2f}s")
+            except Exception as e:
+                result.error = str(e)
+                result.latency = time.monotonic() - detected_at
+                self.logger.error(f"Add to cart failed for {account}: {e}")
+        return result
+
+    def _click(self, web_monitor: WebMonitor, xpath: str):
+        element = WebDriverWait(web_monitor.driver, self.step_timeout).until(
+            EC.element_to_be_clickable((By.XPATH, xpath))
+        )
+        element.click()
+
+    def _save_session(self, account: str, web_monitor: WebMonitor):
+        if self.session_store is None:
+            return
+        session = web_monitor.export_session()
+        if session is not None:
+            self.session_store.save(self.session_key(account), *session)
+
+    def latency_report(self) -> dict:
+        """Detection-to-cart latency statistics for successful checkouts"""
+        latencies = list(self.latencies)
+        if not latencies:
+            return {'count': 0}
+        return {
+            'count': len(latencies),
+            'last': round(latencies[-1], 3),
+            'median': round(statistics.median(latencies), 3),
+            'max': round(max(latencies), 3)
+        }
+
+    def browser_processes(self):
+        processes = []
+        for web_monitor in list(self._monitors.values()):
+            processes.extend(web_monitor.get_browser_processes())
+        return processes
+
+    def close(self):
+        with self._lock:
+            monitors, self._monitors = list(self._monitors.items()), {}
+        for account, web_monitor in monitors:
+            if self.egress_pool is not None:
+                self.egress_pool.release(self.session_key(account))
+            web_monitor.cleanup()
@@ -0,0 +1,198 @@
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, Optional
+from urllib.parse import urlsplit
+import logging
+import random
+import threading
+import time
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+class ChallengeDetector:
+    """Recognises verification/captcha/interstitial pages and tracks the challenge rate per host"""
+
+    TITLE_MARKERS = ('captcha', 'verify', 'verification', 'security check', 'are you a robot', 'access denied')
+    MARKUP_MARKERS = (
+        'captcha_container', 'secsdk-captcha', 'captcha-verify', 'verify-bar', 'tiktok-verify-page',
+        'cf-challenge', 'challenge-form', 'g-recaptcha', 'h-captcha', 'px-captcha', 'slide to verify'
+    )
+    URL_MARKERS = ('/verify', 'captcha', '/challenge', '/interstitial')
+
+    def __init__(self, window=100):
+        self.logger = logging.getLogger(__name__)
+        self.window = window
+        self._lock = threading.Lock()
+        self._outcomes: Dict[str, Deque[bool]] = {}
+        self._totals: Dict[str, list] = {}  # host -> [checks, challenges]
+
+    def detect(self, title: Optional[str] = None, url: Optional[str] = None, markup: Optional[str] = None) -> Optional[str]:
+        """Return the reason a page looks like a challenge, or None"""
+        title = (title or '').lower()
+        for marker in self.TITLE_MARKERS:
+            if marker in title:
+                return f"title contains '{marker}'"
+        if url:
+            parts = urlsplit(url.lower())
+            location = f"{parts.path}?{parts.query}"
+            for marker in self.URL_MARKERS:
+                if marker in location:
+                    return f"url contains '{marker}'"
+        if markup:
+            markup = markup.lower()
+            for marker in self.MARKUP_MARKERS:
+                if marker in markup:
+                    return f"markup contains '{marker}'"
+        return None
+
+    def record(self, host: str, challenged: bool):
+        """Record the outcome of one page load for the challenge-rate metric"""
+        with self._lock:
+            outcomes = self._outcomes.get(host)
+            if outcomes is None:
+                outcomes = self._outcomes[host] = deque(maxlen=self.window)
+                self._totals[host] = [0, 0]
+            outcomes.append(challenged)
+            totals = self._totals[host]
+            totals[0] += 1
+            totals[1] += int(challenged)
+
+    def challenge_rate(self, host: str) -> float:
+        """Share of the most recent page loads that were challenged"""
+        with self._lock:
+            outcomes = self._outcomes.get(host)
+            if not outcomes:
+                return 0.0
+            return sum(outcomes) / len(outcomes)
+
+    def metrics(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                host: {
+                    'checks': totals[0],
+                    'challenges': totals[1],
+                    'recent_rate': round(sum(self._outcomes[host]) / len(self._outcomes[host]), 3)
+                }
+                for host, totals in self._totals.items()
+            }
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one host.
+
+    Opens after `failure_threshold` consecutive challenges. While open every
+    caller is refused; once `open_timeout` has passed exactly one caller is
+    let through as a probe. A successful probe closes the breaker, a
+    challenged probe re-opens it with a longer timeout.
+    """
+
+    def __init__(self, host, failure_threshold=3, open_timeout=120.0, max_open_timeout=1800.0):
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.base_open_timeout = open_timeout
+        self.max_open_timeout = max_open_timeout
+        self.open_timeout = open_timeout
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if the caller may load a page from this host now"""
+        with self._lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.OPEN and time.monotonic() - self.opened_at >= self.open_timeout:
+                self._transition(BreakerState.HALF_OPEN)
+            if self.state == BreakerState.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != BreakerState.CLOSED:
+                self.open_timeout = self.base_open_timeout
+                self._transition(BreakerState.CLOSED)
+
+    def record_challenge(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == BreakerState.HALF_OPEN:
+                self.probe_in_flight = False
+                self.open_timeout = min(self.max_open_timeout, self.open_timeout * 2)
+                self._open()
+            elif self.state == BreakerState.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def release(self):
+        """Give back a probe slot when the probe failed for an unrelated reason"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will accept a probe"""
+        with self._lock:
+            if self.state != BreakerState.OPEN:
+                return 0.0
+            return max(0.0, self.open_timeout - (time.monotonic() - self.opened_at))
+
+    def _open(self):
+        # Jitter the timeout a little so probes from many processes do not line up
+        self.opened_at = time.monotonic() + random.uniform(0, self.open_timeout * 0.1)
+        self._transition(BreakerState.OPEN)
+
+    def _transition(self, state: BreakerState):
+        if state != self.state:
+            self.logger.warning(f"Circuit breaker for {self.host}: {self.state.value} -> {state.value}")
+            self.state = state
+
+class CircuitBreakerRegistry:
+    """Process-wide set of per-host breakers shared by every monitor"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CircuitBreakerRegistry, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def initialize(self):
+        self._lock = threading.Lock()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._hosts: Dict[str, str] = {}  # Breaker key -> host, the key the detector records under
+        self.detector = ChallengeDetector()
+        self.breaker_options = {}
+
+    def configure(self, **breaker_options):
+        """Set the options used for breakers created from now on"""
+        self.breaker_options = breaker_options
+
+    def get(self, host: str, egress: Optional[str] = None) -> CircuitBreaker:
+        """Breaker for a host, or for a host seen through one egress proxy"""
+        key = host.lower() if egress is None else f"{host.lower()}@{egress}"
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.get(key)
+                if breaker is None:
+                    self._hosts[key] = host.lower()
+                    breaker = self.breakers[key] = CircuitBreaker(key, **self.breaker_options)
+        return breaker
+
+    def metrics(self) -> Dict[str, dict]:
+        challenge_metrics = self.detector.metrics()
+        return {
+            key: dict(challenge_metrics.get(self._hosts.get(key, key), {}),
+                      state=breaker.state.value, retry_after=round(breaker.retry_after(), 1))
+            for key, breaker in list(self.breakers.items())
+        }
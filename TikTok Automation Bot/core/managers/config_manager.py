@@ -0,0 +1,104 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import copy
+import json
+import logging
+import os
+import threading
+
+class ConfigManager:
+    """Settings read from a JSON file and re-read whenever the file changes.
+
+    The file holds one object per section ("driver", "twilio",
+    "scheduler", ...). Components watch() the sections they use. poll()
+    re-reads the file when its modification stamp moves and runs only the
+    callbacks of sections whose content changed, so a Twilio change leaves
+    the browsers alone and a driver change leaves the notifier alone. A
+    file that does not parse is ignored and the settings in force stay.
+    Keys removed from a section are not reset to their built-in values.
+    """
+
+    def __init__(self, path="config.json"):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.sections: Dict[str, dict] = {}
+        self._watchers: Dict[str, List[Callable[[dict], None]]] = {}
+        self._lock = threading.RLock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self.stats = {'reloads': 0, 'applied': 0, 'errors': 0}
+        self.last_error: Optional[str] = None
+        self.load()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> List[str]:
+        """Read the file; returns the sections that changed (callbacks are not run)"""
+        with self._lock:
+            self._stamp = self._file_stamp()
+            data = {}
+            if self._stamp is not None:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if not isinstance(data, dict) or not all(isinstance(value, dict) for value in data.values()):
+                        raise ValueError("expected an object of sections")
+                except (OSError, ValueError) as e:
+                    self.stats['errors'] += 1
+                    self.last_error = str(e)
+                    self.logger.error(f"Ignoring {self.path}, keeping the current settings: {e}")
+                    return []
+            changed = sorted(
+                name for name in set(data) | set(self.sections)
+                if data.get(name, {}) != self.sections.get(name, {})
+            )
+            self.sections = data
+            self.last_error = None
+            return changed
+
+    def section(self, name: str) -> dict:
+        with self._lock:
+            return copy.deepcopy(self.sections.get(name, {}))
+
+    def get(self, section: str, key: str, default=None):
+        return self.section(section).get(key, default)
+
+    def watch(self, section: str, callback: Callable[[dict], None], apply_now=True):
+        """Call callback(section) whenever the section changes (and now, if the file has it)"""
+        with self._lock:
+            self._watchers.setdefault(section, []).append(callback)
+            present = section in self.sections
+        if apply_now and present:
+            self._apply(section, [callback])
+
+    def poll(self) -> List[str]:
+        """Reload if the file changed since it was read; returns the sections re-applied"""
+        if self._file_stamp() == self._stamp:
+            return []
+        changed = self.load()
+        if changed:
+            self.stats['reloads'] += 1
+            self.logger.info(f"Reloaded {self.path}: {', '.join(changed)} changed")
+        for name in changed:
+            with self._lock:
+                callbacks = list(self._watchers.get(name, []))
+            self._apply(name, callbacks)
+        return changed
+
+    def _apply(self, name: str, callbacks: List[Callable[[dict], None]]):
+        section = self.section(name)
+        for callback in callbacks:
+            try:
+                callback(section)
+                self.stats['applied'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.last_error = f"{name}: {e}"
+                self.logger.error(f"Could not apply config section {name}: {e}")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return dict(self.stats, path=self.path, sections=sorted(self.sections), last_error=self.last_error)
@@ -0,0 +1,300 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import json
+import logging
+import queue
+import threading
+from core.managers.task_manager import TaskEvent, TaskEventType
+from core.managers.response_cache import ResponseCache
+from core.managers.circuit_breaker import CircuitBreakerRegistry
+
+# Fields that change on every check; left out of the event stream unless asked for
+TIMING_FIELDS = {'last_checked', 'next_due'}
+MAX_PAGE_SIZE = 1000
+
+class BadRequest(ValueError):
+    """A request the client has to correct; answered with 400"""
+
+class EventStream:
+    """Bounded per-client queue of task events for one SSE connection"""
+
+    def __init__(self, include_timing=False, size=1000):
+        self.include_timing = include_timing
+        self.queue = queue.Queue(maxsize=size)
+        self.dropped = 0
+
+    def push(self, event: TaskEvent):
+        if event.type == TaskEventType.UPDATED and not self.include_timing and set(event.changed) <= TIMING_FIELDS:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A slow client loses events instead of slowing the publisher down
+            self.dropped += 1
+
+class ControlAPI:
+    """Local HTTP/JSON control surface for the monitoring core.
+
+    GET  /tasks?status=&qos=&kind=&product_id=&q=&offset=&limit=  paged task list
+    GET  /tasks/<task_id>                             one task
+    POST /tasks           {"tasks": [{"url", "phone", "interval", "qos", "kind", "variants"}]}  bulk add
+    POST /tasks/stop      {"task_ids": [...]}         bulk stop (tasks stay listed as Stopped)
+    POST /tasks/check     {"task_ids": [...]}         check now (scheduled tasks)
+    GET  /events?timing=1                             task changes as server-sent events
+    GET  /events/log?offset=&limit=                   restock/change events from the durable log
+    GET  /metrics                                     counters from the core
+
+    Requests are served on their own threads; nothing here holds the
+    TaskManager lock for longer than a snapshot.
+    """
+
+    def __init__(self, task_manager, scheduler, importer, stop_task: Callable[[str], None],
+                 host="127.0.0.1", port=8765, token: Optional[str] = None, metrics: Optional[Callable[[], dict]] = None,
+                 event_log=None):
+        self.logger = logging.getLogger(__name__)
+        self.task_manager = task_manager
+        self.scheduler = scheduler
+        self.importer = importer
+        self.stop_task = stop_task
+        self.host = host
+        self.port = port
+        self.token = token
+        self.extra_metrics = metrics
+        self.event_log = event_log
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._streams_lock = threading.Lock()
+        self._streams: Dict[int, EventStream] = {}
+        self._stream_seq = 0
+
+    # ----- lifecycle -----
+
+    def start(self, port: Optional[int] = None) -> int:
+        """Start serving in the background; returns the bound port"""
+        self.server = ThreadingHTTPServer((self.host, self.port if port is None else port), self._handler_class())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.task_manager.subscribe(self.publish)
+        threading.Thread(target=self.server.serve_forever, name="control-api", daemon=True).start()
+        self.logger.info("Control API listening on http://%s:%s", self.host, self.port)
+        return self.port
+
+    def stop(self):
+        if self.server is not None:
+            self.task_manager.unsubscribe(self.publish)
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    # ----- events -----
+
+    def publish(self, event: TaskEvent):
+        for stream in list(self._streams.values()):
+            stream.push(event)
+
+    def open_stream(self, include_timing: bool) -> Tuple[int, EventStream]:
+        with self._streams_lock:
+            self._stream_seq += 1
+            stream = self._streams[self._stream_seq] = EventStream(include_timing)
+            return self._stream_seq, stream
+
+    def close_stream(self, stream_id: int):
+        with self._streams_lock:
+            self._streams.pop(stream_id, None)
+
+    # ----- operations -----
+
+    def list_tasks(self, params: dict) -> dict:
+        status = params.get('status')
+        qos = params.get('qos')
+        kind = params.get('kind')
+        product_id = params.get('product_id')
+        text = (params.get('q') or '').lower()
+        offset = max(0, int(params.get('offset', 0)))
+        limit = min(MAX_PAGE_SIZE, max(1, int(params.get('limit', 100))))
+        if product_id:
+            tasks = self.task_manager.get_tasks_by_product(product_id)
+        else:
+            tasks = self.task_manager.get_all_tasks()
+        if status:
+            tasks = [task for task in tasks if task.monitoring_status.lower() == status.lower()]
+        if qos:
+            tasks = [task for task in tasks if task.qos == qos.lower()]
+        if kind:
+            tasks = [task for task in tasks if task.kind == kind.lower()]
+        if text:
+            tasks = [task for task in tasks if text in task.url.lower() or text in (task.product_name or '').lower()]
+        tasks.sort(key=lambda task: task.created_at)
+        return {
+            'total': len(tasks),
+            'offset': offset,
+            'limit': limit,
+            'tasks': [task.to_dict() for task in tasks[offset:offset + limit]]
+        }
+
+    def add_tasks(self, body: dict) -> dict:
+        try:
+            default_interval = int(body.get('default_interval', 30))
+        except (TypeError, ValueError):
+            raise BadRequest('default_interval must be an integer')
+        rows = [(index, row) for index, row in enumerate(body.get('tasks') or [], 1)]
+        report = self.importer.import_rows(rows, default_interval)
+        return {
+            'added': report.added,
+            'duplicates': report.duplicates,
+            'invalid': [{'index': index, 'reason': reason} for index, reason in report.invalid],
+            'refused': report.refused,
+            'task_ids': report.task_ids
+        }
+
+    def stop_tasks(self, body: dict) -> dict:
+        stopped = []
+        for task_id in body.get('task_ids') or []:
+            if self.task_manager.get_task(task_id) is not None:
+                self.stop_task(task_id)
+                stopped.append(task_id)
+        return {'stopped': stopped}
+
+    def check_tasks(self, body: dict) -> dict:
+        task_ids = body.get('task_ids') or []
+        return {'scheduled': self.scheduler.check_now(task_ids), 'requested': len(task_ids)}
+
+    def read_log(self, params: dict) -> dict:
+        offset = max(0, int(params.get('offset', 0)))
+        limit = min(MAX_PAGE_SIZE, max(1, int(params.get('limit', 100))))
+        events = self.event_log.read(offset, limit)
+        return {
+            'events': events,
+            'next_offset': events[-1]['offset'] + 1 if events else max(offset, self.event_log.first_offset),
+            'end_offset': self.event_log.next_offset
+        }
+
+    def metrics(self) -> dict:
+        counts: Dict[str, int] = {}
+        for task in self.task_manager.get_all_tasks():
+            counts[task.monitoring_status] = counts.get(task.monitoring_status, 0) + 1
+        data = {
+            'tasks': counts,
+            'scheduler': self.scheduler.metrics(),
+            'response_cache': ResponseCache().metrics(),
+            'breakers': CircuitBreakerRegistry().metrics(),
+            'event_streams': len(self._streams)
+        }
+        if self.extra_metrics is not None:
+            data.update(self.extra_metrics())
+        return data
+
+    # ----- HTTP -----
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if not self.authorized():
+                    return
+                parts = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                path = parts.path.rstrip('/')
+                if path == '/tasks':
+                    try:
+                        self.respond(200, api.list_tasks(params))
+                    except ValueError:
+                        self.respond(400, {'error': 'offset and limit must be integers'})
+                elif path.startswith('/tasks/'):
+                    record = api.task_manager.get_task(path[len('/tasks/'):])
+                    if record is None:
+                        self.respond(404, {'error': 'task not found'})
+                    else:
+                        self.respond(200, record.to_dict())
+                elif path == '/events/log' and api.event_log is not None:
+                    try:
+                        self.respond(200, api.read_log(params))
+                    except ValueError:
+                        self.respond(400, {'error': 'offset and limit must be integers'})
+                elif path == '/events':
+                    self.stream_events(params.get('timing') in ('1', 'true'))
+                elif path == '/metrics':
+                    self.respond(200, api.metrics())
+                else:
+                    self.respond(404, {'error': 'not found'})
+
+            def do_POST(self):
+                if not self.authorized():
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self.respond(400, {'error': 'body must be JSON'})
+                    return
+                if not isinstance(body, dict):
+                    self.respond(400, {'error': 'body must be a JSON object'})
+                    return
+                routes = {
+                    '/tasks': api.add_tasks,
+                    '/tasks/stop': api.stop_tasks,
+                    '/tasks/check': api.check_tasks
+                }
+                handler = routes.get(urlsplit(self.path).path.rstrip('/'))
+                if handler is None:
+                    self.respond(404, {'error': 'not found'})
+                    return
+                try:
+                    self.respond(200, handler(body))
+                except BadRequest as e:
+                    self.respond(400, {'error': str(e)})
+                except Exception as e:
+                    api.logger.error("Control API request failed: %s", e)
+                    self.respond(500, {'error': str(e)})
+
+            def authorized(self) -> bool:
+                if api.token and self.headers.get('Authorization') != f"Bearer {api.token}":
+                    self.respond(401, {'error': 'unauthorized'})
+                    return False
+                return True
+
+            def respond(self, status: int, payload: dict):
+                body = json.dumps(payload, default=str).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def stream_events(self, include_timing: bool):
+                stream_id, stream = api.open_stream(include_timing)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    while api.server is not None:
+                        try:
+                            event = stream.queue.get(timeout=15)
+                        except queue.Empty:
+                            self.wfile.write(b": keepalive\n\n")
+                            self.wfile.flush()
+                            continue
+                        payload = {
+                            'task_id': event.task_id,
+                            'changed': list(event.changed or ()),
+                            'record': event.record.to_dict() if event.record is not None else None,
+                            'dropped': stream.dropped
+                        }
+                        message = f"event: {event.type.value}\ndata: {json.dumps(payload, default=str)}\n\n"
+                        self.wfile.write(message.encode('utf-8'))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    api.close_stream(stream_id)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -5,15 +5,8 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 
-def setup_logging():
-    """Sets up logging for driver manager."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
-    return logging.getLogger(__name__)
-
-logger = setup_logging()
+# Logging is configured once by the application (core.managers.log_pipeline)
+logger = logging.getLogger(__name__)
 
 def clear_incompatible_driver(driver_path):
     """Clear the existing ChromeDriver if incompatible."""
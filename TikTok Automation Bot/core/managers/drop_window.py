@@ -0,0 +1,78 @@
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Iterable, List, Optional, Tuple
+import time
+
+class DropPhase(Enum):
+    IDLE = "idle"
+    WARMUP = "warmup"
+    ACTIVE = "active"
+
+# Below this the page fetches start to queue behind each other
+MIN_DROP_CADENCE = 0.25
+
+@dataclass(frozen=True)
+class DropWindow:
+    start: float          # Epoch seconds
+    duration: float       # Seconds
+    cadence: float = 0.5  # Seconds between checks inside the window
+    warmup: float = 120.0 # Seconds before start to pre-warm the session
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    @property
+    def warmup_start(self) -> float:
+        return self.start - self.warmup
+
+    def phase(self, now: float) -> DropPhase:
+        if self.start <= now < self.end:
+            return DropPhase.ACTIVE
+        if self.warmup_start <= now < self.start:
+            return DropPhase.WARMUP
+        return DropPhase.IDLE
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DropWindow':
+        return cls(
+            start=float(data['start']),
+            duration=float(data['duration']),
+            cadence=max(MIN_DROP_CADENCE, float(data.get('cadence', 0.5))),
+            warmup=float(data.get('warmup', 120.0))
+        )
+
+def current_phase(windows: Iterable[DropWindow], now: Optional[float] = None) -> Tuple[DropPhase, Optional[DropWindow]]:
+    """Phase the task is in right now; ACTIVE wins over WARMUP"""
+    now = time.time() if now is None else now
+    best = (DropPhase.IDLE, None)
+    for window in windows:
+        phase = window.phase(now)
+        if phase == DropPhase.ACTIVE:
+            return phase, window
+        if phase == DropPhase.WARMUP and best[0] == DropPhase.IDLE:
+            best = (phase, window)
+    return best
+
+def next_check_delay(windows: Iterable[DropWindow], interval: float, now: Optional[float] = None) -> float:
+    """Seconds until the next check: the window cadence inside a window, otherwise
+    the normal interval cut short so the worker wakes for warm-up and window start"""
+    now = time.time() if now is None else now
+    windows = list(windows)
+    phase, window = current_phase(windows, now)
+    if phase == DropPhase.ACTIVE:
+        return max(MIN_DROP_CADENCE, window.cadence)
+    delay = interval
+    for window in windows:
+        for boundary in (window.warmup_start, window.start):
+            if boundary > now:
+                delay = min(delay, boundary - now)
+    return max(0.0, delay)
+
+def upcoming_windows(windows: Iterable[DropWindow], now: Optional[float] = None) -> List[DropWindow]:
+    """Windows that have not ended yet, soonest first"""
+    now = time.time() if now is None else now
+    return sorted((window for window in windows if window.end > now), key=lambda window: window.start)
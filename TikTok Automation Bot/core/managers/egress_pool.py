@@ -0,0 +1,169 @@
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+import logging
+import os
+import threading
+import time
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'socks4': 1080, 'socks5': 1080}
+
+def proxy_server(url: str) -> str:
+    """scheme://host:port for Chrome's --proxy-server; the scheme's default port when none is given.
+    Raises ValueError for a URL without a host or a port that cannot be inferred."""
+    parts = urlsplit(url if '://' in url else f"http://{url}")
+    scheme = parts.scheme.lower()
+    port = parts.port or DEFAULT_PORTS.get(scheme)
+    if not parts.hostname or port is None:
+        raise ValueError(f"proxy {url!r} needs a host and a port")
+    return f"{scheme}://{parts.hostname}:{port}"
+
+class EgressProxy:
+    """Health record for one egress path"""
+    __slots__ = (
+        'url', 'latency', 'challenge_rate', 'failure_rate', 'samples',
+        'assigned', 'retired_until', 'retirements'
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency = 0.0          # EWMA of page fetch latency in seconds
+        self.challenge_rate = 0.0   # EWMA of challenged loads
+        self.failure_rate = 0.0     # EWMA of network failures
+        self.samples = 0
+        self.assigned = 0
+        self.retired_until = 0.0
+        self.retirements = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.retired_until
+
+    def score(self) -> float:
+        """Lower is better: latency penalised by challenge and failure rates"""
+        return (self.latency or 1.0) * (1 + 4 * self.challenge_rate + 2 * self.failure_rate)
+
+class EgressPool:
+    """Pool of proxies that browser slots egress through.
+
+    Every slot key gets a sticky proxy. Proxies are scored from observed
+    latency, challenge rate and failure rate. A proxy that crosses a limit is
+    retired for a while, and its slots move to the healthiest remaining
+    proxy. With no proxies configured, everything goes direct (proxy None).
+    """
+
+    def __init__(self, proxies: Optional[List[str]] = None, alpha=0.2, min_samples=5,
+                 max_challenge_rate=0.5, max_failure_rate=0.5, max_latency=20.0,
+                 retire_seconds=600.0):
+        self.logger = logging.getLogger(__name__)
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.max_challenge_rate = max_challenge_rate
+        self.max_failure_rate = max_failure_rate
+        self.max_latency = max_latency
+        self.retire_seconds = retire_seconds
+        self._lock = threading.Lock()
+        self.proxies: Dict[str, EgressProxy] = {}
+        self.assignments: Dict[str, str] = {}
+        for url in proxies or []:
+            self.add_proxy(url)
+
+    @classmethod
+    def from_file(cls, path="proxies.txt", **options) -> 'EgressPool':
+        """Build a pool from a file with one proxy URL per line ('#' comments allowed)"""
+        proxies = []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                proxies = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        return cls(proxies, **options)
+
+    def add_proxy(self, url: str):
+        """Add a proxy; one Chrome could not be pointed at is logged and skipped"""
+        parts = urlsplit(url if '://' in url else f"http://{url}")
+        try:
+            proxy_server(url)
+        except ValueError as e:
+            self.logger.error(f"Skipping proxy: {e}")
+            return
+        if parts.username:
+            # Chrome's --proxy-server flag cannot carry credentials
+            self.logger.warning(f"Proxy {parts.hostname}:{parts.port} has credentials; browsers will need IP allow-listing")
+        with self._lock:
+            self.proxies.setdefault(url, EgressProxy(url))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.proxies)
+
+    # ----- assignment -----
+
+    def assign(self, key: str) -> Optional[str]:
+        """Return the sticky proxy for a slot key, moving it off a retired proxy"""
+        with self._lock:
+            if not self.proxies:
+                return None
+            now = time.time()
+            current = self.proxies.get(self.assignments.get(key))
+            if current is not None and current.is_healthy(now):
+                return current.url
+            if current is not None:
+                current.assigned -= 1
+            healthy = [proxy for proxy in self.proxies.values() if proxy.is_healthy(now)]
+            if not healthy:
+                # Everything is retired; fall back to the one that comes back first
+                healthy = [min(self.proxies.values(), key=lambda proxy: proxy.retired_until)]
+            chosen = min(healthy, key=lambda proxy: (proxy.assigned, proxy.score()))
+            chosen.assigned += 1
+            self.assignments[key] = chosen.url
+            return chosen.url
+
+    def release(self, key: str):
+        with self._lock:
+            proxy = self.proxies.get(self.assignments.pop(key, None))
+            if proxy is not None:
+                proxy.assigned = max(0, proxy.assigned - 1)
+
+    # ----- health -----
+
+    def record(self, proxy_url: Optional[str], latency: Optional[float] = None,
+               challenged=False, failed=False):
+        """Feed one observed page load into the proxy's health score"""
+        if proxy_url is None:
+            return
+        with self._lock:
+            proxy = self.proxies.get(proxy_url)
+            if proxy is None:
+                return
+            a = self.alpha
+            proxy.samples += 1
+            if latency is not None:
+                proxy.latency = latency if proxy.latency == 0.0 else (1 - a) * proxy.latency + a * latency
+            proxy.challenge_rate = (1 - a) * proxy.challenge_rate + a * float(challenged)
+            proxy.failure_rate = (1 - a) * proxy.failure_rate + a * float(failed)
+            if proxy.is_healthy(time.time()) and proxy.samples >= self.min_samples and (
+                proxy.challenge_rate > self.max_challenge_rate
+                or proxy.failure_rate > self.max_failure_rate
+                or proxy.latency > self.max_latency
+            ):
+                self._retire(proxy)
+
+    def _retire(self, proxy: EgressProxy):
+        proxy.retirements += 1
+        # Each retirement lasts longer; the proxy comes back on probation with fresh stats
+        proxy.retired_until = time.time() + self.retire_seconds * min(8, 2 ** (proxy.retirements - 1))
+        proxy.samples = 0
+        proxy.challenge_rate = proxy.failure_rate = 0.0
+        self.logger.warning(
+            f"Retired proxy {proxy.url} until {time.strftime('%H:%M:%S', time.localtime(proxy.retired_until))}"
+        )
+
+    def metrics(self) -> List[dict]:
+        now = time.time()
+        with self._lock:
+            return [{
+                'proxy': proxy.url,
+                'healthy': proxy.is_healthy(now),
+                'latency': round(proxy.latency, 3),
+                'challenge_rate': round(proxy.challenge_rate, 3),
+                'failure_rate': round(proxy.failure_rate, 3),
+                'assigned': proxy.assigned,
+                'score': round(proxy.score(), 3)
+            } for proxy in self.proxies.values()]
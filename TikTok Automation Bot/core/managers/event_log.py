@@ -0,0 +1,200 @@
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+import threading
+import time
+from core.managers.task_manager import extract_product_id
+
+SEGMENT_PATTERN = re.compile(r'^events\.(\d{20})\.jsonl$')
+INDEX_EVERY = 256  # Offsets between entries of a segment's sparse position index
+
+def log_restock(event_log: 'EventLog', record, product_title: str, product_url: str,
+                availability_strings: List[str]) -> int:
+    """Append the restock event for a task; the NotificationSubscriber sends the alert"""
+    return event_log.append(
+        'restock',
+        task_id=record.task_id,
+        product_id=extract_product_id(product_url),
+        url=product_url,
+        title=product_title,
+        phone=record.phone_number,
+        qos=record.qos,
+        strings=availability_strings
+    )
+
+class EventLog:
+    """Append-only log of restock and stock change events.
+
+    Events are JSON lines with a monotonically increasing `offset`, kept in
+    segment files named after their first offset (events.<offset>.jsonl).
+    A segment is closed once it passes segment_bytes, and only the newest
+    max_segments are kept. Appends are a single buffered write under a
+    lock, so the check path never waits on a consumer; consumers read from
+    any offset and can block until new events arrive.
+    """
+
+    def __init__(self, directory="events", segment_bytes=16 * 1024 * 1024, max_segments=16, fsync=False):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+        self.segments: List[int] = []  # First offset of each segment, oldest first
+        self._index: Dict[int, List[Tuple[int, int]]] = {}  # Segment -> [(offset, byte position)]
+        self._file = None
+        self._size = 0
+        self.next_offset = 0
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    # ----- files -----
+
+    def _path(self, first_offset: int) -> str:
+        return os.path.join(self.directory, f"events.{first_offset:020d}.jsonl")
+
+    def _open(self):
+        self.segments = sorted(
+            int(match.group(1)) for match in map(SEGMENT_PATTERN.match, os.listdir(self.directory)) if match
+        )
+        for first_offset in self.segments:
+            self.next_offset = max(self.next_offset, self._scan(first_offset))
+        if not self.segments:
+            self.segments.append(self.next_offset)
+            self._index[self.next_offset] = []
+        self._file = open(self._path(self.segments[-1]), 'ab')
+        self._size = self._file.tell()
+
+    def _scan(self, first_offset: int) -> int:
+        """Index a segment; drops a torn last line left by a crash. Returns the next offset after it"""
+        path = self._path(first_offset)
+        index = self._index[first_offset] = []
+        next_offset = first_offset
+        position = 0
+        with open(path, 'rb+') as f:
+            for line in f:
+                try:
+                    offset = json.loads(line)['offset']
+                except (ValueError, KeyError):
+                    self.logger.warning(f"Truncating damaged event log tail in {path} at byte {position}")
+                    f.truncate(position)
+                    break
+                if (offset - first_offset) % INDEX_EVERY == 0:
+                    index.append((offset, position))
+                next_offset = offset + 1
+                position += len(line)
+        return next_offset
+
+    def _roll(self):
+        # Caller holds the lock
+        self._file.close()
+        self.segments.append(self.next_offset)
+        self._index[self.next_offset] = []
+        self._file = open(self._path(self.next_offset), 'ab')
+        self._size = 0
+        while len(self.segments) > self.max_segments:
+            oldest = self.segments.pop(0)
+            self._index.pop(oldest, None)
+            try:
+                os.remove(self._path(oldest))
+            except OSError as e:
+                self.logger.error(f"Could not remove old event segment: {e}")
+
+    # ----- writing -----
+
+    def append(self, event_type: str, **fields) -> int:
+        """Write one event; returns its offset"""
+        with self._lock:
+            offset = self.next_offset
+            event = dict(fields, offset=offset, time=time.time(), type=event_type)
+            line = (json.dumps(event, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+            if self._size and self._size + len(line) > self.segment_bytes:
+                self._roll()
+            first_offset = self.segments[-1]
+            if (offset - first_offset) % INDEX_EVERY == 0:
+                self._index[first_offset].append((offset, self._size))
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += len(line)
+            self.next_offset += 1
+            self._appended.notify_all()
+            return offset
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ----- reading -----
+
+    @property
+    def first_offset(self) -> int:
+        return self.segments[0] if self.segments else self.next_offset
+
+    def read(self, offset: int, limit: int = 1000) -> List[dict]:
+        """Up to limit events starting at offset (or at the oldest retained one)"""
+        with self._lock:
+            if offset >= self.next_offset or not self.segments:
+                return []
+            offset = max(offset, self.segments[0])
+            slot = bisect_right(self.segments, offset) - 1
+            segment = self.segments[slot]
+            following = self.segments[slot + 1] if slot + 1 < len(self.segments) else None
+            index = list(self._index.get(segment, ()))
+            # Never read past what has been fully written to the active segment
+            end = self._size if segment == self.segments[-1] else None
+        position = 0
+        keys = [entry[0] for entry in index]
+        slot = bisect_right(keys, offset) - 1
+        if slot >= 0:
+            position = index[slot][1]
+        events = []
+        try:
+            with open(self._path(segment), 'rb') as f:
+                f.seek(position)
+                while len(events) < limit and (end is None or f.tell() < end):
+                    line = f.readline()
+                    if not line:
+                        break
+                    event = json.loads(line)
+                    if event['offset'] >= offset:
+                        events.append(event)
+        except FileNotFoundError:
+            # The segment was retired while we read; start again from what is left
+            return self.read(offset, limit)
+        if len(events) < limit and following is not None:
+            # Carry on into the next segment
+            start = max(events[-1]['offset'] + 1, following) if events else following
+            events.extend(self.read(start, limit - len(events)))
+        return events
+
+    def wait(self, offset: int, timeout: Optional[float] = None) -> bool:
+        """Block until an event at offset exists"""
+        with self._appended:
+            return self._appended.wait_for(lambda: self.next_offset > offset, timeout)
+
+    def tail(self, offset: int, stop_event: threading.Event, batch: int = 100) -> Iterator[dict]:
+        """Yield events from offset on, waiting for new ones until stop_event is set"""
+        while not stop_event.is_set():
+            events = self.read(offset, batch)
+            if not events:
+                self.wait(offset, timeout=1.0)
+                continue
+            for event in events:
+                yield event
+            offset = events[-1]['offset'] + 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'next_offset': self.next_offset,
+                'first_offset': self.first_offset,
+                'segments': len(self.segments)
+            }
@@ -0,0 +1,214 @@
+from typing import Callable, Dict, List, Optional
+from urllib import request as urllib_request
+import json
+import logging
+import os
+import threading
+from core.managers.event_log import EventLog
+from core.managers.notification_queue import NotificationsDisabled
+from core.managers.qos import profile_for
+from core.managers.task_manager import NotificationStatus
+
+class SubscriberOffsets:
+    """Committed offset per subscriber, kept next to the log so consumers resume after a restart"""
+
+    def __init__(self, path=os.path.join("events", "offsets.json")):
+        self.path = path
+        self._lock = threading.Lock()
+        self.offsets: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.offsets = json.load(f)
+
+    def get(self, name: str) -> Optional[int]:
+        return self.offsets.get(name)
+
+    def commit(self, name: str, offset: int):
+        """Record that every event before offset has been handled"""
+        with self._lock:
+            self.offsets[name] = offset
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.offsets, f)
+            os.replace(tmp_path, self.path)
+
+class LogSubscriber:
+    """Consumes the event log on its own thread, from its committed offset.
+
+    A subscriber seen for the first time starts at the end of the log, so
+    adding one never replays old events. Subclasses implement
+    handle_batch(), which returns the offset to commit.
+    """
+    name = "subscriber"
+
+    def __init__(self, event_log: EventLog, offsets: SubscriberOffsets, batch: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.event_log = event_log
+        self.offsets = offsets
+        self.batch = batch
+        self.stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def offset(self) -> int:
+        offset = self.offsets.get(self.name)
+        return self.event_log.next_offset if offset is None else offset
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.offsets.get(self.name) is None:
+            self.offsets.commit(self.name, self.event_log.next_offset)
+        self.stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"events-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        offset = self.offset
+        self.prepare(offset)
+        while not self.stop_event.is_set():
+            events = self.event_log.read(offset, self.batch)
+            if not events:
+                self.event_log.wait(offset, timeout=1.0)
+                continue
+            try:
+                committed = self.handle_batch(events)
+            except Exception as e:
+                self.logger.error(f"Event subscriber {self.name} failed: {e}")
+                self.stop_event.wait(5.0)
+                continue
+            if committed > offset:
+                offset = committed
+                self.offsets.commit(self.name, offset)
+
+    def prepare(self, offset: int):
+        """Called once before consuming from offset"""
+
+    def handle_batch(self, events: List[dict]) -> int:
+        raise NotImplementedError
+
+    def lag(self) -> int:
+        return self.event_log.next_offset - self.offset
+
+class NotificationSubscriber(LogSubscriber):
+    """Sends the WhatsApp alert for every restock event.
+
+    A batch is handed to the NotificationQueue at once, so it goes out by
+    QoS priority, and its offset is committed once every send in it has
+    finished. A restock already alerted for the same task, with no sold-out
+    event for its URL since, is skipped and the task marked Skipped; other
+    tasks watching the URL are still alerted. That state is rebuilt from the
+    log on start, so a restart does not alert again for a product still in
+    stock.
+    """
+    name = "notifications"
+
+    def __init__(self, event_log, offsets, task_manager, send: Callable[[str, str, str, List[str]], bool],
+                 notifications=None, batch: int = 50):
+        super().__init__(event_log, offsets, batch)
+        self.task_manager = task_manager
+        self.send = send
+        self.notifications = notifications
+        # URL -> {task ID (phone for events without one) -> offset of the restock that was alerted}
+        self.alerted: Dict[str, Dict[str, int]] = {}
+        self.skipped = 0
+
+    def prepare(self, offset: int):
+        start = self.event_log.first_offset
+        while start < offset:
+            events = self.event_log.read(start, 1000)
+            events = [event for event in events if event['offset'] < offset]
+            if not events:
+                break
+            for event in events:
+                self.track(event)
+            start = events[-1]['offset'] + 1
+
+    @staticmethod
+    def recipient(event: dict) -> str:
+        return event.get('task_id') or event.get('phone') or ''
+
+    def is_alerted(self, event: dict) -> bool:
+        return self.recipient(event) in self.alerted.get(event['url'], {})
+
+    def track(self, event: dict):
+        if event['type'] == 'restock':
+            self.alerted.setdefault(event['url'], {})[self.recipient(event)] = event['offset']
+        elif event['type'] == 'change' and not event.get('available'):
+            # Sold out: every task on the URL gets alerted for the next restock
+            self.alerted.pop(event['url'], None)
+
+    def set_status(self, event: dict, **changes):
+        task_id = event.get('task_id')
+        if task_id and self.task_manager.get_task(task_id) is not None:
+            self.task_manager.update_task(task_id, **changes)
+
+    def handle_batch(self, events: List[dict]) -> int:
+        pending = []
+        for event in events:
+            if event['type'] == 'restock' and self.is_alerted(event):
+                self.skipped += 1
+                self.logger.info(f"Skipping repeat restock alert for {event['url']} ({self.recipient(event)})")
+                self.set_status(event, notification_status=NotificationStatus.SKIPPED.value)
+                continue
+            if event['type'] == 'restock':
+                args = (event.get('phone'), event.get('title'), event['url'], event.get('strings') or [])
+                if self.notifications is not None:
+                    result = self.notifications.submit(profile_for(event.get('qos')).notify_priority, self.send, *args)
+                else:
+                    result = None
+                pending.append((event, args, result))
+            self.track(event)
+        for event, args, result in pending:
+            failed = NotificationStatus.FAILED
+            try:
+                sent = result.result() if result is not None else self.send(*args)
+            except NotificationsDisabled:
+                sent, failed = False, NotificationStatus.DISABLED
+            except Exception as e:
+                self.logger.error(f"Restock alert for {event['url']} failed: {e}")
+                sent = False
+            alerted = self.alerted.get(event['url'], {})
+            if not sent and alerted.get(self.recipient(event)) == event['offset']:
+                # Let the next restock event for this task try again
+                del alerted[self.recipient(event)]
+            if sent:
+                self.set_status(event, notification_status=NotificationStatus.SENT.value, notification_sent=True)
+            else:
+                self.set_status(event, notification_status=failed.value)
+        return events[-1]['offset'] + 1
+
+class WebhookSubscriber(LogSubscriber):
+    """POSTs every event as JSON to a local endpoint, retrying until it is accepted"""
+
+    def __init__(self, event_log, offsets, url: str, timeout: float = 5.0, max_backoff: float = 60.0):
+        super().__init__(event_log, offsets, batch=100)
+        self.url = url
+        self.name = f"webhook:{url}"
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.delivered = 0
+
+    def handle_batch(self, events: List[dict]) -> int:
+        for event in events:
+            backoff = 1.0
+            while not self.deliver(event):
+                if self.stop_event.wait(backoff):
+                    # Delivered up to here; the rest is sent after the next start
+                    return event['offset']
+                backoff = min(self.max_backoff, backoff * 2)
+            self.delivered += 1
+        return events[-1]['offset'] + 1
+
+    def deliver(self, event: dict) -> bool:
+        body = json.dumps(event).encode('utf-8')
+        req = urllib_request.Request(self.url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+        try:
+            with urllib_request.urlopen(req, timeout=self.timeout) as response:
+                return 200 <= response.status < 300
+        except Exception as e:
+            self.logger.warning(f"Webhook {self.url} failed for event {event['offset']}: {e}")
+            return False
@@ -0,0 +1,198 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import time
+from core.managers.check_pipeline import CheckPipeline, CheckResult, CheckError, ErrorKind, summarize_skus
+from core.managers.response_cache import content_hash
+from core.managers.render_data import extract_render_data_from_html, extract_title, parse_listing, parse_product_info
+
+@dataclass
+class ListingResult(CheckResult):
+    items: List[dict] = field(default_factory=list)
+    in_stock: int = 0           # Listed products currently in stock
+    candidates: int = 0         # Products whose page was fetched this check
+    restocked: List[str] = field(default_factory=list)  # Product IDs that came back in stock
+
+class ListingPipeline(CheckPipeline):
+    """Checks a shop or collection page for every product it lists.
+
+    The listing page goes through the same fetch/extract stages as a
+    product page, and its RENDER_DATA is parsed with parse_listing(). A
+    product's own page is fetched (in-page, without navigating away) only
+    when the listing shows it in stock and it has not been confirmed yet,
+    or when its listed stock fields changed. A product the listing keeps
+    showing in stock while its own page says otherwise is re-confirmed with
+    a per-product backoff (confirm_backoff doubling up to max_confirm_backoff)
+    until its listing changes. Up to max_confirm products are confirmed per
+    check; the rest stay candidates for the next one. A notification goes
+    out for every product that comes back in stock.
+    """
+
+    def __init__(self, *args, max_confirm=10, confirm_backoff=60.0, max_confirm_backoff=1800.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_confirm = max_confirm
+        self.confirm_backoff = confirm_backoff
+        self.max_confirm_backoff = max_confirm_backoff
+        self.listed: Dict[str, dict] = {}     # product_id -> listing entry as last acted on
+        self.available: Dict[str, bool] = {}  # product_id -> availability from its own page
+        self.backoff: Dict[str, Tuple[float, float]] = {}  # product_id -> (delay, next re-confirm), monotonic
+        self.page_fetches = 0
+        self.product_fetches = 0
+
+    def run_check(self, fast=False) -> ListingResult:
+        attempts = {}
+        data = self.load(attempts, fast)
+        self.page_fetches += 1
+        try:
+            result = self.run_stage('diff', lambda: self.diff(data), attempts)
+        except CheckError:
+            self.consecutive_failures += 1
+            raise
+        result.attempts = attempts
+        self.last_result = result
+        self.consecutive_failures = 0
+        return result
+
+    def parse(self, raw_data: str) -> dict:
+        try:
+            items = parse_listing(raw_data, self.url)
+        except ValueError as e:
+            raise CheckError(ErrorKind.MISSING_RENDER_DATA, f"Unexpected listing render data: {e}")
+        if not items:
+            self.logger.warning(f"No products found on {self.url}")
+        return {'items': items}
+
+    def diff(self, data: dict) -> ListingResult:
+        items = data['product_info']['items']
+        listed_ids = {item['product_id'] for item in items}
+        # Products that left the page are forgotten
+        for product_id in [product_id for product_id in self.listed if product_id not in listed_ids]:
+            self.listed.pop(product_id, None)
+            self.available.pop(product_id, None)
+            self.backoff.pop(product_id, None)
+
+        now = time.monotonic()
+        candidates = []
+        for item in items:
+            product_id = item['product_id']
+            previous = self.listed.get(product_id)
+            changed = previous is None or previous['stock'] != item['stock']
+            if changed:
+                self.backoff.pop(product_id, None)
+            if item['in_stock'] is False:
+                # The listing is enough to know it is out of stock
+                if self.available.get(product_id):
+                    self.record_change(product_id, CheckResult(
+                        product_title=item['title'], product_url=item['url'], availability=False,
+                        availability_strings=[f"{item['title']} : Unavailable"]
+                    ))
+                self.available[product_id] = False
+                self.listed[product_id] = item
+            elif changed or (item['in_stock'] and not self.available.get(product_id)
+                             and now >= self.backoff.get(product_id, (0.0, 0.0))[1]):
+                candidates.append(item)
+            else:
+                self.listed[product_id] = item
+        # Listed-in-stock first, then products whose listing does not say
+        candidates.sort(key=lambda item: item['in_stock'] is not True)
+
+        restocked = []
+        for item in candidates[:self.max_confirm]:
+            try:
+                product = self.confirm(item)
+            except CheckError as e:
+                self.logger.warning(f"Stopped confirming products on {self.url}: {e}")
+                break
+            if product is None:
+                self.back_off(item['product_id'], now)
+                continue
+            self.listed[item['product_id']] = item
+            if self.stock_history is not None:
+                self.stock_history.record_skus(item['product_id'], product.skus)
+            known = self.available.get(item['product_id'])
+            if known is not None and known != product.availability:
+                self.record_change(item['product_id'], product)
+            if product.availability and not self.available.get(item['product_id']):
+                try:
+                    product.notified = self.run_stage('notify', lambda: self.notify(product), {})
+                except CheckError as e:
+                    # Left unconfirmed so the product is tried again next check
+                    self.logger.error(f"Notification for {product.product_url} failed: {e}")
+                    continue
+                restocked.append(item['product_id'])
+            self.available[item['product_id']] = product.availability
+            if product.availability:
+                self.backoff.pop(item['product_id'], None)
+            elif item['in_stock']:
+                # The listing says in stock, the product page does not: ask again later
+                self.back_off(item['product_id'], now)
+        if self.stock_history is not None:
+            self.stock_history.maybe_save()
+
+        in_stock = [item for item in items if self.available.get(item['product_id'])]
+        return ListingResult(
+            product_title=data['product_title'],
+            product_url=data['product_url'],
+            availability=bool(in_stock),
+            availability_strings=[f"{item['title']} : Available" for item in in_stock],
+            detected_at=time.monotonic(),
+            notified=bool(restocked),
+            items=items,
+            in_stock=len(in_stock),
+            candidates=min(len(candidates), self.max_confirm),
+            restocked=restocked,
+            stock=tuple(bool(self.available.get(item['product_id'])) for item in items)
+        )
+
+    def back_off(self, product_id: str, now: float):
+        """Delay the next re-confirmation of a product whose listing did not change"""
+        delay = self.backoff.get(product_id, (0.0, 0.0))[0] * 2 or self.confirm_backoff
+        delay = min(delay, self.max_confirm_backoff)
+        self.backoff[product_id] = (delay, now + delay)
+
+    def confirm(self, item: dict) -> Optional[CheckResult]:
+        """Read one listed product's stock from its own page, fetched from inside the listing page"""
+        web_monitor = self.web_monitor
+        if web_monitor is None:
+            return None
+        self.raise_if_cancelled()
+        self.product_fetches += 1
+        document = web_monitor.fetch_document(item['url'])
+        if document is None or document['status'] != 200:
+            self.logger.warning(f"Could not fetch {item['url']}: {document['status'] if document else web_monitor.last_error}")
+            return None
+        raw_data = extract_render_data_from_html(document['body'])
+        if raw_data is None:
+            reason = self.detector.detect(extract_title(document['body']), document.get('url'), document['body'])
+            self.detector.record(self.host, bool(reason))
+            if reason:
+                self.breaker.record_challenge()
+                raise CheckError(ErrorKind.CHALLENGE_PAGE, f"Challenge page served for {item['url']} ({reason})")
+            return None
+        body_hash = content_hash(raw_data)
+        entry = self.response_cache.match(item['url'], body_hash)
+        if entry is None:
+            try:
+                product_info = parse_product_info(raw_data)
+            except (ValueError, KeyError, TypeError) as e:
+                self.logger.warning(f"Unexpected render data on {item['url']}: {e}")
+                return None
+            entry = self.response_cache.store(
+                item['url'], body_hash, product_info,
+                extract_title(document['body']) or item['title'],
+                document.get('url') or item['url'], len(raw_data), document.get('headers')
+            )
+        skus = entry.product_info.get('skus', [])
+        if not isinstance(skus, list):
+            skus = [skus]
+        availability, availability_strings = summarize_skus(skus)
+        return CheckResult(
+            product_title=entry.title,
+            product_url=entry.product_url,
+            availability=availability,
+            availability_strings=availability_strings,
+            skus=skus,
+            detected_at=time.monotonic()
+        )
+
+    def fetch_counts(self) -> dict:
+        return {'listing_pages': self.page_fetches, 'product_pages': self.product_fetches, 'products': len(self.listed)}
@@ -0,0 +1,141 @@
+from collections import deque
+from dataclasses import dataclass, asdict, fields
+from enum import Enum
+from typing import Callable, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+class LoadState(Enum):
+    NORMAL = "normal"
+    OVERLOADED = "overloaded"
+
+@dataclass
+class SheddingPolicy:
+    """What the scheduler gives up while it cannot keep up"""
+    lag_threshold: float = 10.0      # p90 lag (seconds past due) that counts as overloaded
+    recover_ratio: float = 0.5       # Overload ends once p90 lag is below lag_threshold * recover_ratio
+    utilisation_limit: float = 0.95  # ...and the check threads are less busy than this
+    window: float = 60.0             # Seconds of checks the figures are taken over
+    min_samples: int = 20
+    stretch_factor: float = 2.0      # Interval multiplier for tasks outside a drop window (1 = off)
+    pause_idle_after: float = 6 * 3600  # Pause tasks whose stock has not changed for this long (0 = off)
+    refuse_new: bool = True          # Reject new tasks while overloaded
+
+    @classmethod
+    def from_file(cls, path="shedding.json") -> 'SheddingPolicy':
+        """Policy with overrides from a JSON file, if there is one"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SheddingPolicy':
+        known = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+class LoadMonitor:
+    """Tracks how late checks start and how busy the check threads are.
+
+    Every check, on the scheduler's pool or on a task's own worker thread,
+    reports its lag (start time minus due time); checks run on the pool
+    also report how long they kept their thread busy.
+    The state flips to OVERLOADED when the p90 lag over the last `window`
+    seconds passes the policy threshold, and back to NORMAL only once lag
+    and utilisation have both come down, so it does not flap.
+    """
+
+    def __init__(self, policy: Optional[SheddingPolicy] = None, capacity: int = 1,
+                 on_change: Optional[Callable[[LoadState], None]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.policy = policy or SheddingPolicy()
+        self.capacity = capacity
+        self.on_change = on_change
+        self.state = LoadState.NORMAL
+        self.since = time.time()
+        self.shed = {'stretched': 0, 'paused': 0, 'refused': 0}
+        self._lock = threading.Lock()
+        self._samples: deque = deque()  # (finished at, lag, busy seconds)
+        self._started = time.monotonic()
+        self._evaluated = 0.0
+
+    def record(self, lag: float, busy: float = 0.0):
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, max(0.0, lag), busy))
+        self.poll()
+
+    def poll(self):
+        """Re-evaluate the state (at most once a second); also called when no checks are running"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if now - self._evaluated < 1.0:
+                return
+            self._evaluated = now
+            changed = self._evaluate(now)
+        if changed and self.on_change is not None:
+            self.on_change(self.state)
+
+    def count(self, action: str, amount: int = 1):
+        with self._lock:
+            self.shed[action] += amount
+
+    @property
+    def overloaded(self) -> bool:
+        return self.state == LoadState.OVERLOADED
+
+    def _trim(self, now: float):
+        cutoff = now - self.policy.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def _figures(self, now: float) -> dict:
+        # Caller holds the lock
+        lags = sorted(sample[1] for sample in self._samples)
+        span = min(self.policy.window, now - self._started) or 1.0
+        busy = sum(sample[2] for sample in self._samples)
+        return {
+            'samples': len(lags),
+            'lag_p50': lags[len(lags) // 2] if lags else 0.0,
+            'lag_p90': lags[int(len(lags) * 0.9)] if lags else 0.0,
+            'lag_max': lags[-1] if lags else 0.0,
+            'utilisation': min(1.0, busy / (span * self.capacity))
+        }
+
+    def _evaluate(self, now: float) -> bool:
+        figures = self._figures(now)
+        policy = self.policy
+        quiet = figures['samples'] < policy.min_samples
+        if self.state == LoadState.NORMAL and not quiet and figures['lag_p90'] > policy.lag_threshold:
+            self.state = LoadState.OVERLOADED
+        elif self.state == LoadState.OVERLOADED and (quiet or (
+                figures['lag_p90'] < policy.lag_threshold * policy.recover_ratio
+                and figures['utilisation'] < policy.utilisation_limit)):
+            self.state = LoadState.NORMAL
+        else:
+            return False
+        self.since = time.time()
+        message = (f"Scheduler {self.state.value}: p90 lag {figures['lag_p90']:.1f}s, "
+                   f"utilisation {figures['utilisation']:.0%}")
+        if self.overloaded:
+            self.logger.warning(message)
+        else:
+            self.logger.info(message)
+        return True
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            data = self._figures(now)
+            data.update(state=self.state.value, since=self.since, shed=dict(self.shed))
+        for key in ('lag_p50', 'lag_p90', 'lag_max', 'utilisation'):
+            data[key] = round(data[key], 3)
+        return data
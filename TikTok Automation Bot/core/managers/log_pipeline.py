@@ -0,0 +1,142 @@
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional, Tuple
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through extra=
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields are included as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Rate-limits repetitive messages per call site.
+
+    Records below min_level from the same file and line pass freely up to
+    burst times per window; after that they are dropped and the count of
+    dropped records is attached to the next one let through.
+    """
+
+    def __init__(self, burst=20, window=60.0, min_level=logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.min_level = min_level
+        self._lock = threading.Lock()
+        self._sites: Dict[Tuple[str, int], list] = {}  # site -> [window start, passed, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.min_level:
+            return True
+        site = (record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._sites[site] = [now, 1, 0]
+            elif state[1] < self.burst:
+                state[1] += 1
+                suppressed = 0
+            else:
+                state[2] += 1
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LogPipeline:
+    """Routes all logging through a queue to a background writer thread.
+
+    Callers only pay for the sampling check and a queue put; formatting and
+    file I/O happen on the listener thread. The file gets JSON lines with
+    size-based rotation, the console gets the usual plain format.
+    """
+
+    def __init__(self, log_dir="logs", level=logging.INFO, max_bytes=5 * 1024 * 1024,
+                 backup_count=5, queue_size=10000, sample_burst=20, sample_window=60.0):
+        os.makedirs(log_dir, exist_ok=True)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.sampler = SamplingFilter(burst=sample_burst, window=sample_window)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.handler.addFilter(self.sampler)
+
+        file_handler = RotatingFileHandler(
+            os.path.join(log_dir, 'monitor.jsonl'), maxBytes=max_bytes,
+            backupCount=backup_count, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        self.listener = QueueListener(self.queue, file_handler, console_handler, respect_handler_level=True)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        self.listener.start()
+        self.running = True
+        atexit.register(self.stop)
+
+    def add_handler(self, handler: logging.Handler):
+        """Also hand queued records to handler, on the listener thread"""
+        self.listener.handlers = self.listener.handlers + (handler,)
+
+    def remove_handler(self, handler: logging.Handler):
+        self.listener.handlers = tuple(h for h in self.listener.handlers if h is not handler)
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            self.listener.stop()
+
+    def metrics(self) -> dict:
+        return {'queued': self.queue.qsize(), 'dropped': self.handler.dropped}
+
+_pipeline: Optional[LogPipeline] = None
+
+def setup_logging(**options) -> LogPipeline:
+    """Install the queue-based logging pipeline once per process"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline(**options)
+    return _pipeline
+
+def current_pipeline() -> Optional[LogPipeline]:
+    """The installed pipeline, or None before setup_logging()"""
+    return _pipeline
@@ -0,0 +1,554 @@
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional
+import heapq
+import logging
+import random
+import threading
+import time
+from core.managers.task_manager import NotificationStatus, QoSClass, TaskKind, TaskRecord, TaskStatus
+from core.managers.check_pipeline import CheckPipeline, CheckError, CheckCancelled, ErrorKind
+from core.managers.listing_pipeline import ListingPipeline, ListingResult
+from core.managers.drop_window import DropPhase, current_phase, next_check_delay
+from core.managers.whatsapp_notifier import WhatsAppNotifier
+from core.managers.notification_queue import NotificationsDisabled
+from core.managers.load_shedder import LoadMonitor, LoadState, SheddingPolicy
+from core.managers.qos import BY_RANK, PROFILES, effective_interval, parse_qos, profile_for
+from core.managers.event_log import log_restock
+from core.managers.sku_selector import SkuSelector
+
+class ScheduledTask:
+    """Scheduler-side state of one task"""
+    __slots__ = (
+        'task_id', 'pipeline', 'due', 'seq', 'in_flight', 'removed', 'warmed_window',
+        'lag', 'low_priority', 'available', 'last_change', 'qos'
+    )
+
+    def __init__(self, task_id: str, qos: QoSClass = QoSClass.NORMAL):
+        self.task_id = task_id
+        self.qos = qos
+        self.pipeline: Optional[CheckPipeline] = None
+        self.due = 0.0
+        self.seq = 0          # Matches the task's one live heap entry
+        self.in_flight = False
+        self.removed = False
+        self.warmed_window = None
+        self.lag = 0.0             # How late the running check started
+        self.low_priority = True   # Outside any drop window; first to be shed
+        self.available = None      # Last availability (in-stock count for shop tasks)
+        self.last_change = time.time()  # Last time the product went in or out of stock
+
+class MonitorScheduler:
+    """Runs many tasks on a small, fixed pool of check threads.
+
+    Tasks wait in one next-due heap per QoS class. Each of the `workers`
+    threads takes the most overdue task of the highest class that has one
+    due, runs one pipeline check and puts the task back with its next due
+    time; threads reserved for a class (QoSProfile.reserved_workers) only
+    take that class, so critical tasks never queue behind background ones.
+    At most max_browsers browsers are open at once: before a task without a
+    browser runs, the browser of the least recently checked idle task of
+    the lowest class is closed, and lower classes never take the browsers
+    reserved for the classes above them. The closed session stays in the
+    SessionStore, so it reopens warm.
+
+    Every check reports how late it started to a LoadMonitor. While the
+    monitor says the pool is overloaded the SheddingPolicy applies to
+    sheddable classes: tasks outside a drop window get stretched
+    intervals, tasks whose stock has
+    not changed for a long time are paused until the load clears, and
+    accepting() turns False so importers refuse new tasks.
+
+    Shop tasks (TaskKind.SHOP) run a ListingPipeline: one listing page
+    covers every product on it, they notify per restocked product and
+    never complete.
+
+    The scheduler has the same shutdown surface as ProductMonitorWorker, so
+    the ShutdownCoordinator can stop it together with the workers.
+    """
+
+    def __init__(self, driver_path, task_manager, workers=4, max_browsers=8, session_store=None,
+                 egress_pool=None, stock_history=None, notifier=None, whatsapp=None,
+                 policy: Optional[SheddingPolicy] = None, notifications=None, event_log=None):
+        self.logger = logging.getLogger(__name__)
+        self.driver_path = driver_path
+        self.task_manager = task_manager
+        self.workers = workers
+        self.max_browsers = max(max_browsers, workers)
+        self.session_store = session_store
+        self.egress_pool = egress_pool
+        self.stock_history = stock_history
+        self.notifier = notifier  # Replaces the WhatsApp notification when set (load testing)
+        self.whatsapp = whatsapp
+        self.notifications = notifications  # NotificationQueue; alerts go out by class priority
+        self.event_log = event_log  # When set, restocks are logged and a subscriber sends the alerts
+        self._cond = threading.Condition()
+        # Per class (due, seq, task_id); entries whose seq moved on are stale
+        self._heaps: Dict[QoSClass, List[tuple]] = {qos: [] for qos in BY_RANK}
+        self._lanes = self._plan_lanes()
+        self._seq = 0
+        self.entries: Dict[str, ScheduledTask] = {}
+        self._open: 'OrderedDict[str, None]' = OrderedDict()  # Tasks holding a browser, least recent first
+        self._paused: Dict[str, ScheduledTask] = {}  # Shed while overloaded; out of the heap
+        self.load = LoadMonitor(policy, capacity=workers, on_change=self._load_changed)
+        self._threads: List[threading.Thread] = []
+        self._generation = 0  # Bumped when the thread plan changes; older threads retire
+        self.stopping = False
+        self.stop_event = threading.Event()
+
+    # ----- lifecycle -----
+
+    def start(self):
+        with self._cond:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self.stopping = False
+            self.stop_event = threading.Event()
+            self._threads = self._spawn()
+
+    def _spawn(self) -> List[threading.Thread]:
+        # Caller holds the condition
+        threads = [
+            threading.Thread(target=self._run, args=(lanes, self._generation),
+                             name=f"scheduler-{self._generation}-{index}", daemon=True)
+            for index, lanes in enumerate(self._lanes)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def configure(self, workers: Optional[int] = None, max_browsers: Optional[int] = None):
+        """Apply a "scheduler" config section without touching tasks or their browsers.
+
+        A new worker count replans the check threads: running threads finish
+        their current check and retire, new ones take over. A lower browser
+        cap is enforced as checks reserve browsers.
+        """
+        with self._cond:
+            if max_browsers is not None:
+                self.max_browsers = max(max_browsers, workers or self.workers)
+            if workers is None or workers < 1 or workers == self.workers:
+                return
+            self.workers = workers
+            self.max_browsers = max(self.max_browsers, workers)
+            self.load.capacity = workers
+            self._lanes = self._plan_lanes()
+            self._generation += 1
+            self._cond.notify_all()
+            if any(thread.is_alive() for thread in self._threads) and not self.stopping:
+                self._threads = [thread for thread in self._threads if thread.is_alive()] + self._spawn()
+        self.logger.info(f"Scheduler now runs {workers} check threads")
+
+    def reset(self):
+        """Forget every task (after a Stop All) and start fresh threads.
+
+        Threads of the stopped generation may still be finishing a check; they
+        retire on their own and their tasks are not put back.
+        """
+        with self._cond:
+            for entry in self.entries.values():
+                entry.removed = True
+            self.entries.clear()
+            for heap in self._heaps.values():
+                heap.clear()
+            self._open.clear()
+            self._paused.clear()
+            self._generation += 1
+            self.stopping = False
+            self.stop_event = threading.Event()
+            self._cond.notify_all()
+            self._threads = [thread for thread in self._threads if thread.is_alive()] + self._spawn()
+
+    def request_shutdown(self):
+        with self._cond:
+            self.stopping = True
+            self.stop_event.set()
+            self._cond.notify_all()
+
+    def close_browser(self) -> bool:
+        closed = False
+        for close in self.browser_closers():
+            closed = close() or closed
+        return closed
+
+    def browser_closers(self) -> List[Callable[[], bool]]:
+        """One close call per open browser, so the ShutdownCoordinator can run them in parallel"""
+        with self._cond:
+            pipelines = [entry.pipeline for entry in self.entries.values() if entry.pipeline is not None]
+            self._open.clear()
+        return [partial(self._close_pipeline, pipeline) for pipeline in pipelines]
+
+    def _close_pipeline(self, pipeline: CheckPipeline) -> bool:
+        try:
+            return pipeline.close()
+        except Exception as e:
+            self.logger.error(f"Failed to close browser: {e}")
+            return False
+
+    def browser_processes(self):
+        processes = []
+        for entry in list(self.entries.values()):
+            if entry.pipeline is not None:
+                processes.extend(entry.pipeline.browser_processes())
+        return processes
+
+    def wait(self, ms: int) -> bool:
+        deadline = time.monotonic() + ms / 1000.0
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def task_ids(self) -> List[str]:
+        return list(self.entries)
+
+    def accepting(self) -> bool:
+        """False while overloaded under a policy that refuses new tasks"""
+        return not (self.load.overloaded and self.load.policy.refuse_new)
+
+    # ----- task set -----
+
+    def add_tasks(self, records: Iterable[TaskRecord], spread: float = 60.0) -> int:
+        """Schedule tasks in one step; first checks are spread so a bulk add does not fire at once"""
+        now = time.time()
+        added = 0
+        with self._cond:
+            for record in records:
+                if record.task_id in self.entries:
+                    continue
+                entry = self.entries[record.task_id] = ScheduledTask(record.task_id, parse_qos(record.qos))
+                self._push(entry, now + random.uniform(0, min(record.check_interval, spread)))
+                added += 1
+            self._cond.notify_all()
+        return added
+
+    def check_now(self, task_ids: Iterable[str]) -> int:
+        """Move tasks to the front of the queue"""
+        now = time.time()
+        moved = 0
+        with self._cond:
+            for task_id in task_ids:
+                entry = self.entries.get(task_id)
+                if entry is not None and not entry.in_flight:
+                    self._push(entry, now)
+                    moved += 1
+            self._cond.notify_all()
+        return moved
+
+    def remove_task(self, task_id: str) -> bool:
+        """Stop scheduling a task; its browser is closed once any running check ends"""
+        with self._cond:
+            entry = self.entries.pop(task_id, None)
+            if entry is None:
+                return False
+            entry.removed = True
+            self._open.pop(task_id, None)
+            self._paused.pop(task_id, None)
+            pipeline = None if entry.in_flight else entry.pipeline
+        if pipeline is not None:
+            pipeline.close()
+        return True
+
+    def stop_task(self, task_id: str):
+        """Table stop button: stop a scheduled task and mark it Stopped"""
+        if self.remove_task(task_id):
+            self.task_manager.update_task(
+                task_id,
+                product_name='Unknown',
+                monitoring_status=TaskStatus.STOPPED.value,
+                product_status="Unknown",
+                notification_status="Cancelled"
+            )
+
+    def _push(self, entry: ScheduledTask, due: float):
+        # Caller holds the condition
+        self._seq += 1
+        self._paused.pop(entry.task_id, None)
+        entry.due = due
+        entry.seq = self._seq
+        heapq.heappush(self._heaps[entry.qos], (due, self._seq, entry.task_id))
+
+    # ----- check threads -----
+
+    def _plan_lanes(self) -> List[List[QoSClass]]:
+        """Classes each check thread may run; reserved threads first, at least one thread shared"""
+        lanes = []
+        for qos in BY_RANK:
+            for _ in range(PROFILES[qos].reserved_workers):
+                if len(lanes) < self.workers - 1:
+                    lanes.append([qos])
+        return lanes + [list(BY_RANK)] * (self.workers - len(lanes))
+
+    def _take(self, lanes: List[QoSClass], generation: int) -> Optional[ScheduledTask]:
+        with self._cond:
+            while not self.stopping and generation == self._generation:
+                now = time.time()
+                next_due = None
+                for qos in lanes:
+                    heap = self._heaps[qos]
+                    while heap:
+                        entry = self.entries.get(heap[0][2])
+                        if entry is not None and entry.seq == heap[0][1] and not entry.in_flight:
+                            break
+                        heapq.heappop(heap)
+                    if not heap:
+                        continue
+                    if heap[0][0] <= now:
+                        entry = self.entries[heapq.heappop(heap)[2]]
+                        entry.in_flight = True
+                        entry.lag = now - entry.due
+                        return entry
+                    next_due = heap[0][0] if next_due is None else min(next_due, heap[0][0])
+                timeout = next_due - now if next_due is not None else None
+                if self.load.overloaded:
+                    # Paused tasks produce no samples; keep re-evaluating so they resume
+                    timeout = min(timeout, 1.0) if timeout is not None else 1.0
+                self._cond.wait(timeout)
+                self.load.poll()
+            return None
+
+    def _run(self, lanes: List[QoSClass], generation: int):
+        while True:
+            entry = self._take(lanes, generation)
+            if entry is None:
+                return
+            delay = None
+            started = time.monotonic()
+            try:
+                delay = self._check(entry)
+            except CheckCancelled:
+                return
+            except Exception as e:
+                self.logger.error(f"Error in scheduled check of {entry.task_id}: {e}")
+                delay = self._interval(entry)
+            finally:
+                self._finish(entry, delay, time.monotonic() - started)
+
+    def _interval(self, entry: ScheduledTask) -> float:
+        record = self.task_manager.get_task(entry.task_id)
+        return effective_interval(record.qos, record.check_interval) if record else 30.0
+
+    def _finish(self, entry: ScheduledTask, delay: Optional[float], busy: float = 0.0):
+        """Put the task back in the queue (or aside, if shed), or retire it when it is done"""
+        self.load.record(entry.lag, busy)
+        paused = False
+        with self._cond:
+            entry.in_flight = False
+            done = entry.removed or delay is None or self.stopping
+            if done and not self.stopping and self.entries.get(entry.task_id) is entry:
+                self.entries.pop(entry.task_id)
+                self._open.pop(entry.task_id, None)
+            elif not done:
+                paused = self._should_pause(entry)
+                if paused:
+                    self._paused[entry.task_id] = entry
+                else:
+                    self._push(entry, time.time() + self._stretch(entry, delay))
+                    self._cond.notify_all()
+        if done and not self.stopping and entry.pipeline is not None:
+            entry.pipeline.close()
+        elif paused:
+            self.load.count('paused')
+            self.task_manager.update_task(entry.task_id, product_status="Paused")
+        elif not done:
+            self.task_manager.mark_checked(entry.task_id, next_due=entry.due)
+
+    # ----- load shedding -----
+
+    def _should_pause(self, entry: ScheduledTask) -> bool:
+        policy = self.load.policy
+        return (self.load.overloaded and entry.low_priority and policy.pause_idle_after > 0
+                and time.time() - entry.last_change > policy.pause_idle_after)
+
+    def _stretch(self, entry: ScheduledTask, delay: float) -> float:
+        factor = self.load.policy.stretch_factor
+        if self.load.overloaded and entry.low_priority and factor > 1:
+            self.load.count('stretched')
+            return delay * factor
+        return delay
+
+    def _load_changed(self, state: LoadState):
+        """Resume paused tasks, spread out, once the overload has cleared"""
+        if state != LoadState.NORMAL:
+            return
+        now = time.time()
+        with self._cond:
+            paused = list(self._paused.values())
+            for entry in paused:
+                self._push(entry, now + random.uniform(0, min(self.load.policy.window, 30.0)))
+            self._cond.notify_all()
+        if paused:
+            self.logger.info(f"Resumed {len(paused)} paused tasks")
+
+    def _pipeline(self, entry: ScheduledTask, record: TaskRecord) -> CheckPipeline:
+        if entry.pipeline is None:
+            task_id = entry.task_id
+            pipeline_class = ListingPipeline if record.kind == TaskKind.SHOP.value else CheckPipeline
+            entry.pipeline = pipeline_class(
+                driver_path=self.driver_path,
+                url=record.url,
+                notifier=lambda title, url, strings: self.notify(task_id, title, url, strings),
+                stop_event=self.stop_event,
+                session_store=self.session_store,
+                egress_pool=self.egress_pool,
+                stock_history=self.stock_history,
+                event_log=self.event_log,
+                sku_selector=SkuSelector.compile(record.variants)
+            )
+        self._reserve_browser(entry)
+        return entry.pipeline
+
+    def _browser_cap(self, qos: QoSClass) -> int:
+        """Browsers a class and the classes below it may hold together"""
+        rank = PROFILES[qos].rank
+        reserved = sum(profile.reserved_browsers for profile in PROFILES.values() if profile.rank < rank)
+        return max(1, self.max_browsers - reserved)
+
+    def _evict(self, holders: List[str], limit: int) -> List[ScheduledTask]:
+        """Close idle browsers among holders (lowest class, then least recently used) down to limit"""
+        # Caller holds the condition
+        victims = []
+        candidates = sorted(
+            (task_id for task_id in holders if not self.entries[task_id].in_flight),
+            key=lambda task_id: -PROFILES[self.entries[task_id].qos].rank
+        )
+        for task_id in candidates[:max(0, len(holders) - limit)]:
+            victim = self.entries[task_id]
+            # Hold the task while its browser closes so no thread picks it up
+            victim.in_flight = True
+            del self._open[task_id]
+            victims.append(victim)
+        return victims
+
+    def _reserve_browser(self, entry: ScheduledTask):
+        """Keep open browsers within max_browsers and the class reservations"""
+        with self._cond:
+            self._open[entry.task_id] = None
+            self._open.move_to_end(entry.task_id)
+            for task_id in [task_id for task_id in self._open if task_id not in self.entries]:
+                del self._open[task_id]
+            rank = PROFILES[entry.qos].rank
+            victims = self._evict(
+                [task_id for task_id in self._open if PROFILES[self.entries[task_id].qos].rank >= rank],
+                self._browser_cap(entry.qos)
+            )
+            victims += self._evict(list(self._open), self.max_browsers)
+        for victim in victims:
+            try:
+                victim.pipeline.close()
+            finally:
+                with self._cond:
+                    victim.in_flight = False
+                    if not victim.removed and victim.task_id not in self._paused:
+                        self._push(victim, victim.due)
+                        self._cond.notify_all()
+
+    def _check(self, entry: ScheduledTask) -> Optional[float]:
+        """Run one check; returns the delay until the next one, or None when the task is finished"""
+        record = self.task_manager.get_task(entry.task_id)
+        if record is None or record.monitoring_status in (TaskStatus.COMPLETED.value, TaskStatus.STOPPED.value):
+            return None
+        entry.qos = parse_qos(record.qos)
+        pipeline = self._pipeline(entry, record)
+        phase, window = current_phase(record.drop_windows)
+        entry.low_priority = phase == DropPhase.IDLE and PROFILES[entry.qos].sheddable
+        interval = effective_interval(entry.qos, record.check_interval)
+        if phase == DropPhase.WARMUP and window != entry.warmed_window:
+            entry.warmed_window = window
+            try:
+                pipeline.prewarm()
+            except CheckError as e:
+                self.logger.warning(f"Pre-warm failed for {entry.task_id} ({e.kind.value}): {e}")
+        try:
+            result = pipeline.run_check(fast=phase == DropPhase.ACTIVE)
+        except CheckError as e:
+            self.logger.error(f"Check of {entry.task_id} failed at {e.stage} ({e.kind.value}): {e}")
+            blocked = e.kind in (ErrorKind.CHALLENGE_PAGE, ErrorKind.CIRCUIT_OPEN)
+            self.task_manager.update_task(entry.task_id, product_status="Blocked" if blocked else "Retrying")
+            delay = max(interval, pipeline.failure_backoff(e))
+            return delay if blocked else next_check_delay(record.drop_windows, delay)
+
+        if isinstance(result, ListingResult):
+            return self._listing_checked(entry, record, result, interval)
+
+        changes = {'product_name': result.product_title, 'stock': result.stock}
+        if result.availability:
+            changes.update(product_status="Available", monitoring_status=TaskStatus.ACTIVE.value)
+            if result.notified:
+                changes['monitoring_status'] = TaskStatus.COMPLETED.value
+        else:
+            changes['product_status'] = "Unavailable"
+        self.task_manager.update_task(entry.task_id, **changes)
+        if entry.available is not None and entry.available != bool(result.availability):
+            entry.last_change = time.time()
+        entry.available = bool(result.availability)
+        if result.availability and result.notified:
+            return None
+        return next_check_delay(record.drop_windows, interval)
+
+    def _listing_checked(self, entry: ScheduledTask, record: TaskRecord, result: ListingResult, interval: float) -> float:
+        """Publish a shop check; shop tasks keep running after they notify"""
+        self.task_manager.update_task(
+            entry.task_id,
+            product_name=result.product_title,
+            product_status=f"{result.in_stock}/{len(result.items)} in stock",
+            monitoring_status=TaskStatus.ACTIVE.value,
+            stock=result.stock
+        )
+        if result.restocked:
+            self.logger.info(f"{len(result.restocked)} products restocked on {record.url}")
+        if entry.available is not None and entry.available != result.in_stock:
+            entry.last_change = time.time()
+        entry.available = result.in_stock
+        return next_check_delay(record.drop_windows, interval)
+
+    def notify(self, task_id: str, product_title: str, product_url: str, availability_strings: List[str]) -> bool:
+        record = self.task_manager.get_task(task_id)
+        if self.event_log is not None and self.notifier is None and record is not None:
+            log_restock(self.event_log, record, product_title, product_url, availability_strings)
+            self.task_manager.update_task(task_id, notification_status=NotificationStatus.SENDING.value)
+            return True
+        if self.notifier is not None:
+            send, args = self.notifier, (product_title, product_url, availability_strings)
+        else:
+            if self.whatsapp is None:
+                self.whatsapp = WhatsAppNotifier()
+            send = self.whatsapp.send
+            args = (record.phone_number if record else None, product_title, product_url, availability_strings)
+        try:
+            if self.notifier is None and record is None:
+                sent = False
+            elif self.notifications is not None:
+                priority = profile_for(record.qos if record else None).notify_priority
+                sent = self.notifications.submit(priority, send, *args).result()
+            else:
+                sent = send(*args)
+        except NotificationsDisabled:
+            self.task_manager.update_task(task_id, notification_status=NotificationStatus.DISABLED.value)
+            return False
+        if sent:
+            self.task_manager.update_task(task_id, notification_status="Sent", notification_sent=True)
+        else:
+            self.task_manager.update_task(task_id, notification_status="Failed")
+        return sent
+
+    def metrics(self) -> dict:
+        now = time.time()
+        with self._cond:
+            classes = {qos.value: {'tasks': 0, 'open_browsers': 0, 'max_overdue': 0.0} for qos in BY_RANK}
+            for entry in self.entries.values():
+                stats = classes[entry.qos.value]
+                stats['tasks'] += 1
+                if entry.task_id in self._open:
+                    stats['open_browsers'] += 1
+                if not entry.in_flight and entry.task_id not in self._paused:
+                    stats['max_overdue'] = round(max(stats['max_overdue'], now - entry.due), 3)
+            return {
+                'classes': classes,
+                'tasks': len(self.entries),
+                'in_flight': sum(1 for entry in self.entries.values() if entry.in_flight),
+                'open_browsers': len(self._open),
+                'paused': len(self._paused),
+                'workers': self.workers,
+                'accepting': self.accepting(),
+                'load': self.load.metrics()
+            }
@@ -0,0 +1,86 @@
+from concurrent.futures import Future
+from typing import Callable, Optional
+import itertools
+import logging
+import queue
+import threading
+
+RETIRE_PRIORITY = -1  # Sorts before every notification priority
+
+class NotificationsDisabled(Exception):
+    """Raised by a sender that is not configured; the alert was not sent"""
+
+class NotificationQueue:
+    """Priority queue in front of the notification senders.
+
+    A mass restock can produce many alerts at once and Twilio sends them
+    one request at a time; queued alerts go out lowest priority value
+    first (FIFO within a priority), so a critical task's alert does not
+    wait behind a backlog of background ones. submit() returns a Future
+    with the sender's result.
+    """
+
+    def __init__(self, senders: int = 2):
+        self.logger = logging.getLogger(__name__)
+        self.senders = senders
+        self._queue: 'queue.PriorityQueue[tuple]' = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._threads = []
+        self._names = itertools.count()
+        self._retiring = 0
+        self._lock = threading.Lock()
+
+    def submit(self, priority: int, send: Callable[..., bool], *args) -> Future:
+        self._start()
+        future = Future()
+        self._queue.put((priority, next(self._order), future, send, args))
+        return future
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def configure(self, senders: Optional[int] = None):
+        """Apply a "notifications" config section; sender threads are added or retired in place"""
+        if senders is None or senders < 1:
+            return
+        with self._lock:
+            self.senders = senders
+            if not self._threads:
+                return  # Started with the new count on first submit
+            active = len(self._threads) - self._retiring
+            for _ in range(active - senders):
+                # Ahead of every alert, so a sender retires as soon as it is free
+                self._retiring += 1
+                self._queue.put((RETIRE_PRIORITY, next(self._order), None, None, None))
+            self._spawn(senders - active)
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._spawn(self.senders)
+
+    def _spawn(self, count: int):
+        # Caller holds the lock
+        for _ in range(count):
+            thread = threading.Thread(target=self._run, name=f"notify-{next(self._names)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _run(self):
+        while True:
+            _, _, future, send, args = self._queue.get()
+            if future is None:
+                with self._lock:
+                    self._retiring -= 1
+                    self._threads.remove(threading.current_thread())
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(send(*args))
+            except NotificationsDisabled as e:
+                future.set_exception(e)  # Reported once at startup, not per alert
+            except Exception as e:
+                self.logger.error(f"Notification failed: {e}")
+                future.set_exception(e)
@@ -1,9 +1,13 @@
 import json
 import os
 import logging
-from dataclasses import dataclass
-from typing import List, Optional
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
+from core.managers.task_manager import TaskEvent, TaskEventType, TaskStatus
 
 @dataclass
 class MonitoringTask:
@@ -13,27 +17,86 @@ class MonitoringTask:
     last_status: str
     last_check: str  # ISO format datetime
     task_id: Optional[str] = None
+    drop_windows: List[dict] = field(default_factory=list)
+    checkout_account: Optional[str] = None
+    scheduled: bool = False
+    qos: str = "normal"
+    kind: str = "product"
+    variants: str = ""
+
+    @classmethod
+    def from_record(cls, record, last_status: Optional[str] = None) -> 'MonitoringTask':
+        """Build the persisted form of a TaskManager record"""
+        return cls(
+            url=record.url,
+            phone_number=record.phone_number,
+            interval=record.check_interval,
+            last_status=last_status or record.monitoring_status,
+            last_check=datetime.now().isoformat(),
+            task_id=record.task_id,
+            drop_windows=[window.to_dict() for window in record.drop_windows],
+            checkout_account=record.checkout_account,
+            scheduled=record.scheduled,
+            qos=record.qos,
+            kind=record.kind,
+            variants=record.variants
+        )
 
 class PersistenceManager:
-    def __init__(self, file_path="monitoring_state.json"):
+    """Keeps the state file in step with the tasks.
+
+    The tasks are held in memory and the file is rewritten from them. TaskManager
+    events only queue up; one writer thread applies them and writes the file at
+    most once per flush_interval. The explicit calls below write immediately.
+    """
+
+    def __init__(self, file_path="monitoring_state.json", flush_interval=1.0):
         self.file_path = file_path
+        self.flush_interval = flush_interval
         self.logger = logging.getLogger(__name__)
+        # Guards the in-memory tasks and the file
+        self._lock = threading.RLock()
+        self._tasks: Optional[List[MonitoringTask]] = None  # Read from the file on first use
+        self._pending: queue.Queue = queue.Queue()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        # task_id -> open batches; events of these tasks are not written while it is non-zero
+        self._suppressed: Dict[str, int] = {}
+        self._suppressed_lock = threading.Lock()
 
     def save_active_tasks(self, tasks: List[MonitoringTask]):
         """Save active monitoring tasks to file"""
+        with self._lock:
+            self._apply_pending()
+            self._tasks = list(tasks)
+            return self._write()
+
+    def _write(self) -> bool:
+        # Caller holds the lock
+        tasks = self._tasks or []
         try:
             data = [{
-                'url': task.url,
-                'phone_number': task.phone_number,
-                'interval': task.interval,
-                'last_status': task.last_status,
-                'last_check': task.last_check,
-                'task_id': task.task_id
+                    'url': task.url,
+                    'phone_number': task.phone_number,
+                    'interval': task.interval,
+                    'last_status': task.last_status,
+                    'last_check': task.last_check,
+                    'task_id': task.task_id,
+                    'drop_windows': task.drop_windows,
+                    'checkout_account': task.checkout_account,
+                    'scheduled': task.scheduled,
+                    'qos': task.qos,
+                    'kind': task.kind,
+                'variants': task.variants
             } for task in tasks]
-            
-            with open(self.file_path, 'w') as f:
+
+            # Write to a temp file and swap it in so a crash never leaves a half-written file
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, 'w') as f:
                 json.dump(data, f, indent=2)
-            
+            os.replace(tmp_path, self.file_path)
+
             self.logger.info(f"Saved {len(tasks)} active tasks")
             return True
         except Exception as e:
@@ -41,23 +104,40 @@ class PersistenceManager:
             return False
 
     def load_active_tasks(self) -> List[MonitoringTask]:
-        """Load active monitoring tasks from file"""
+        """Load active monitoring tasks (copies; changing them does not persist anything)"""
+        with self._lock:
+            self._apply_pending()
+            return [replace(task, drop_windows=list(task.drop_windows)) for task in self._current()]
+
+    def _current(self) -> List[MonitoringTask]:
+        # Caller holds the lock
+        if self._tasks is None:
+            self._tasks = self._read()
+        return self._tasks
+
+    def _read(self) -> List[MonitoringTask]:
         try:
             if not os.path.exists(self.file_path):
                 return []
-                
+
             with open(self.file_path, 'r') as f:
                 data = json.load(f)
-            
+
             tasks = [MonitoringTask(
                 url=item['url'],
                 phone_number=item['phone_number'],
                 interval=item['interval'],
                 last_status=item['last_status'],
                 last_check=item['last_check'],
-                task_id=item.get('task_id')
+                task_id=item.get('task_id'),
+                drop_windows=item.get('drop_windows', []),
+                checkout_account=item.get('checkout_account'),
+                scheduled=item.get('scheduled', False),
+                qos=item.get('qos', "normal"),
+                kind=item.get('kind', "product"),
+                variants=item.get('variants', "")
             ) for item in data]
-            
+
             self.logger.info(f"Loaded {len(tasks)} tasks")
             return tasks
         except Exception as e:
@@ -66,40 +146,139 @@ class PersistenceManager:
 
     def update_task_status(self, task_id: str, status: str):
         """Update status of a specific task"""
-        try:
-            tasks = self.load_active_tasks()
-            updated = False
-            for task in tasks:
-                if task.task_id == task_id:
-                    task.last_status = status
-                    task.last_check = datetime.now().isoformat()
-                    updated = True
-                    break
-            
-            if updated:
-                self.save_active_tasks(tasks)
-                return True
-            return False
-        except Exception as e:
-            self.logger.error(f"Error updating task status: {e}")
+        with self._lock:
+            self._apply_pending()
+            if self._set_status(task_id, status):
+                return self._write()
             return False
 
     def remove_task(self, task_id: str):
         """Remove a task from persistence"""
-        try:
-            tasks = self.load_active_tasks()
-            tasks = [task for task in tasks if task.task_id != task_id]
-            return self.save_active_tasks(tasks)
-        except Exception as e:
-            self.logger.error(f"Error removing task: {e}")
-            return False
+        with self._lock:
+            self._apply_pending()
+            self._drop(task_id)
+            return self._write()
 
     def add_task(self, task: MonitoringTask):
-        """Add a new task to persistence"""
+        """Add a new task to persistence (replaces an entry with the same task_id)"""
+        return self.add_tasks([task])
+
+    def add_tasks(self, new_tasks: List[MonitoringTask]):
+        """Add many tasks in a single write (replaces entries with the same task_id)"""
+        with self._lock:
+            self._apply_pending()
+            self._put(new_tasks)
+            return self._write()
+
+    def _set_status(self, task_id: str, status: str) -> bool:
+        for task in self._current():
+            if task.task_id == task_id:
+                task.last_status = status
+                task.last_check = datetime.now().isoformat()
+                return True
+        return False
+
+    def _drop(self, task_id: str):
+        self._tasks = [task for task in self._current() if task.task_id != task_id]
+
+    def _put(self, new_tasks: List[MonitoringTask]):
+        new_ids = {task.task_id for task in new_tasks if task.task_id is not None}
+        self._tasks = [existing for existing in self._current() if existing.task_id not in new_ids]
+        self._tasks.extend(new_tasks)
+
+    def suppress(self, task_ids: Iterable[str]):
+        """Stop writing change events of these tasks until release() (calls nest)"""
+        with self._suppressed_lock:
+            for task_id in task_ids:
+                self._suppressed[task_id] = self._suppressed.get(task_id, 0) + 1
+
+    def release(self, task_ids: Iterable[str]):
+        """Undo one suppress() of these tasks"""
+        with self._suppressed_lock:
+            for task_id in task_ids:
+                count = self._suppressed.get(task_id, 0) - 1
+                if count > 0:
+                    self._suppressed[task_id] = count
+                else:
+                    self._suppressed.pop(task_id, None)
+
+    @contextmanager
+    def batch(self, task_ids: Iterable[str]):
+        """Skip per-event writes of these tasks inside the block; the caller writes them once.
+        Events of every other task are persisted as usual."""
+        task_ids = list(task_ids)
+        self.suppress(task_ids)
         try:
-            tasks = self.load_active_tasks()
-            tasks.append(task)
-            return self.save_active_tasks(tasks)
-        except Exception as e:
-            self.logger.error(f"Error adding task: {e}")
-            return False
\ No newline at end of file
+            yield
+        finally:
+            self.release(task_ids)
+
+    def is_suppressed(self, task_id: str) -> bool:
+        with self._suppressed_lock:
+            return task_id in self._suppressed
+
+    def bind_task_manager(self, task_manager):
+        """Keep the state file in sync with TaskManager change events"""
+        task_manager.subscribe(self.handle_task_event)
+
+    def handle_task_event(self, event: TaskEvent):
+        """Queue task creation, removal and monitoring status changes for the writer thread"""
+        if self.is_suppressed(event.task_id) or self._closed.is_set():
+            return
+        if event.type == TaskEventType.CREATED:
+            self._pending.put((event.type, event.task_id, MonitoringTask.from_record(event.record)))
+        elif event.type == TaskEventType.REMOVED:
+            self._pending.put((event.type, event.task_id, None))
+        elif 'monitoring_status' in event.changed:
+            self._pending.put((event.type, event.task_id, event.record.monitoring_status))
+        else:
+            return
+        self._start_writer()
+        self._wakeup.set()
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="persistence-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while not self._closed.is_set():
+            self._wakeup.wait()
+            # Let a burst of events collect so it costs one write
+            self._closed.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _apply_pending(self) -> int:
+        # Caller holds the lock
+        applied = 0
+        while True:
+            try:
+                kind, task_id, value = self._pending.get_nowait()
+            except queue.Empty:
+                return applied
+            applied += 1
+            if kind == TaskEventType.CREATED:
+                self._put([value])
+            elif kind == TaskEventType.REMOVED or value in (TaskStatus.COMPLETED.value, TaskStatus.STOPPED.value):
+                self._drop(task_id)
+            else:
+                self._set_status(task_id, value)
+
+    def flush(self) -> bool:
+        """Write queued task events to the file now"""
+        with self._lock:
+            if self._apply_pending():
+                return self._write()
+            return True
+
+    def close(self):
+        """Stop the writer thread and write whatever it has not written yet"""
+        self._closed.set()
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
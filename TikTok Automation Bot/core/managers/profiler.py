@@ -0,0 +1,179 @@
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+
+# cProfile hooks one global profile function; only one thread may hold it at a time
+_PROFILE_LOCK = threading.Lock()
+
+def _safe_name(value: str) -> str:
+    return ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in value)
+
+class CycleProfiler:
+    """Deterministic profile of one task's next N check cycles.
+
+    Cycles are profiled separately per label ("selenium" for a full page
+    load, "fast" for the in-page fetch path) so the two can be compared.
+    Only one thread profiles at a time: a cycle that finds the profiler busy
+    runs unprofiled and is not counted, and a profiler failure never fails
+    the check itself.
+    """
+
+    def __init__(self, task_id: str, cycles=5, out_dir="profiles"):
+        self.task_id = task_id
+        self.cycles = cycles
+        self.out_dir = os.path.join(out_dir, _safe_name(task_id))
+        self.completed = 0
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.durations: Dict[str, List[float]] = {}
+        self.skipped = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.completed >= self.cycles
+
+    def run(self, func: Callable, label: str, *args, **kwargs):
+        """Run one cycle under the profiler; exceptions count as a cycle and propagate"""
+        if not _PROFILE_LOCK.acquire(blocking=False):
+            self.skipped += 1
+            return func(*args, **kwargs)
+        try:
+            profile = self.profiles.setdefault(label, cProfile.Profile())
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Another profiler (sys.monitoring, a debugger) already owns the hook
+                logging.getLogger(__name__).warning(f"Cannot profile {self.task_id}: {e}")
+                self.skipped += 1
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                self.durations.setdefault(label, []).append(time.perf_counter() - started)
+                self.completed += 1
+        finally:
+            _PROFILE_LOCK.release()
+
+    def save(self) -> List[str]:
+        """Write a .prof (pstats) file and a text summary per label; returns the .prof paths"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        paths = []
+        for label, profile in self.profiles.items():
+            base = os.path.join(self.out_dir, f"{stamp}-{label}")
+            profile.dump_stats(f"{base}.prof")
+            durations = self.durations.get(label, [])
+            summary = io.StringIO()
+            summary.write(f"task: {self.task_id}\npath: {label}\ncycles: {len(durations)}\n")
+            if durations:
+                summary.write(f"mean cycle: {sum(durations) / len(durations):.3f}s, max: {max(durations):.3f}s\n\n")
+            pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(30)
+            with open(f"{base}.txt", 'w') as f:
+                f.write(summary.getvalue())
+            paths.append(f"{base}.prof")
+        return paths
+
+class SamplingProfiler:
+    """Low-overhead stack sampler for the whole process.
+
+    A background thread samples every thread's stack at a fixed interval.
+    On stop, it writes the counts in folded-stack format ("frame;frame;... count"),
+    which flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, interval=0.01, out_dir="profiles"):
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        self.out_dir = out_dir
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: Optional[float] = None) -> bool:
+        """Start sampling; with a duration it stops and writes its output by itself"""
+        with self._lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample, args=(duration,), name="sampling-profiler", daemon=True)
+            self._thread.start()
+        self.logger.info(f"Process sampling started (every {self.interval * 1000:.0f} ms)")
+        return True
+
+    def stop(self) -> Optional[str]:
+        """Stop sampling and write the folded stacks; returns the output path"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return None
+            self._stop.set()
+            if thread is not threading.current_thread():
+                thread.join()
+            self._thread = None
+        return self.write()
+
+    def _sample(self, duration: Optional[float]):
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + duration if duration else None
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                threading.Thread(target=self.stop, daemon=True).start()
+                return
+
+    def write(self) -> Optional[str]:
+        if not self.stacks:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"process-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.logger.info(f"Process sampling wrote {self.samples} samples to {path}")
+        return path
+
+def install_signal_handlers(sampler: SamplingProfiler, profile_workers: Callable[[], None]) -> bool:
+    """Headless triggers: SIGUSR1 toggles process sampling, SIGUSR2 profiles every task.
+
+    Returns False where these signals do not exist (Windows).
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+
+    def toggle_sampling(signum, frame):
+        if sampler.running:
+            sampler.stop()
+        else:
+            sampler.start()
+
+    signal.signal(signal.SIGUSR1, toggle_sampling)
+    signal.signal(signal.SIGUSR2, lambda signum, frame: profile_workers())
+    return True
@@ -0,0 +1,46 @@
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+from core.managers.task_manager import QoSClass
+
+@dataclass(frozen=True)
+class QoSProfile:
+    """What a QoS class is guaranteed by the scheduler"""
+    rank: int               # Lower ranks are served first
+    reserved_workers: int   # Check threads that only run this class
+    reserved_browsers: int  # Browsers lower classes may never take
+    min_interval: float     # Cadence floor, in seconds
+    notify_priority: int    # Lower is sent first when notifications queue up
+    sheddable: bool         # May be stretched or paused under overload
+
+PROFILES: Dict[QoSClass, QoSProfile] = {
+    QoSClass.CRITICAL: QoSProfile(rank=0, reserved_workers=1, reserved_browsers=2, min_interval=2.0,
+                                  notify_priority=0, sheddable=False),
+    QoSClass.NORMAL: QoSProfile(rank=1, reserved_workers=0, reserved_browsers=1, min_interval=5.0,
+                                notify_priority=1, sheddable=True),
+    QoSClass.BACKGROUND: QoSProfile(rank=2, reserved_workers=0, reserved_browsers=0, min_interval=60.0,
+                                    notify_priority=2, sheddable=True),
+}
+
+# Classes in the order they are served
+BY_RANK = sorted(PROFILES, key=lambda qos: PROFILES[qos].rank)
+BUILT_IN_PROFILES = dict(PROFILES)
+
+def set_min_intervals(floors: Optional[Dict[str, float]]):
+    """Override cadence floors by class name ("intervals" config section); others get their built-in floor.
+    Checks pick the new floors up when they compute their next interval."""
+    floors = {parse_qos(name): float(value) for name, value in (floors or {}).items()}
+    for qos, profile in BUILT_IN_PROFILES.items():
+        PROFILES[qos] = replace(profile, min_interval=floors.get(qos, profile.min_interval))
+
+def parse_qos(value) -> QoSClass:
+    """QoSClass from a stored or user-supplied value (raises ValueError)"""
+    if isinstance(value, QoSClass):
+        return value
+    return QoSClass(str(value or QoSClass.NORMAL.value).strip().lower())
+
+def profile_for(value) -> QoSProfile:
+    return PROFILES[parse_qos(value)]
+
+def effective_interval(value, interval: float) -> float:
+    """Check interval raised to the class's cadence floor"""
+    return max(float(interval), profile_for(value).min_interval)
@@ -0,0 +1,92 @@
+from typing import List, Optional
+from urllib.parse import unquote, urljoin, urlsplit
+import html
+import json
+import re
+
+# Same payload get_render_data() reads from the DOM, located in raw page markup
+RENDER_DATA_PATTERN = re.compile(r'<script[^>]*\bid=["\']RENDER_DATA["\'][^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE)
+TITLE_PATTERN = re.compile(r'<title[^>]*>(.*?)</title>', re.DOTALL | re.IGNORECASE)
+
+def extract_render_data_from_html(markup: str) -> Optional[str]:
+    """Return the raw RENDER_DATA script text from page markup, or None"""
+    match = RENDER_DATA_PATTERN.search(markup or '')
+    return match.group(1) if match else None
+
+def extract_title(markup: str) -> Optional[str]:
+    match = TITLE_PATTERN.search(markup or '')
+    return html.unescape(match.group(1).strip()) if match else None
+
+def decode_render_data(raw_data: str) -> dict:
+    """Decode the URL-encoded RENDER_DATA JSON; raises ValueError on bad input"""
+    return json.loads(unquote(raw_data))
+
+def parse_product_info(raw_data: str) -> dict:
+    """Return the productInfo block of a product page; raises ValueError/KeyError/TypeError"""
+    return decode_render_data(raw_data)['2']['initialData']['productInfo']
+
+# Shop and collection pages list products in varying layouts; these are the keys looked for
+PRODUCT_ID_KEYS = ('product_id', 'productId', 'item_id', 'itemId')
+PRODUCT_TITLE_KEYS = ('title', 'product_name', 'productName', 'name')
+PRODUCT_URL_KEYS = ('seo_url', 'product_url', 'productUrl', 'detail_url', 'url')
+STOCK_COUNT_KEYS = ('stock', 'stock_num', 'available_stock', 'inventory')
+SOLD_OUT_KEYS = ('sold_out', 'is_sold_out', 'soldOut', 'out_of_stock')
+STOCK_STATUS_KEYS = ('stock_status', 'availability', 'status')
+# Listing fields that carry stock state; a change in any of them marks the product for a page check
+STOCK_FIELDS = STOCK_COUNT_KEYS + SOLD_OUT_KEYS + STOCK_STATUS_KEYS + ('skus', 'price', 'sale_price')
+
+def first_value(data: dict, keys):
+    for key in keys:
+        if data.get(key) not in (None, ''):
+            return data[key]
+    return None
+
+def listed_stock(product: dict) -> Optional[bool]:
+    """What a listing entry says about stock: True/False, or None when it does not say"""
+    count = first_value(product, STOCK_COUNT_KEYS)
+    if isinstance(count, (int, float)) and not isinstance(count, bool):
+        return count > 0
+    skus = product.get('skus')
+    if isinstance(skus, list) and skus and all(isinstance(sku, dict) and 'stock' in sku for sku in skus):
+        return any((sku.get('stock') or 0) > 0 for sku in skus)
+    sold_out = first_value(product, SOLD_OUT_KEYS)
+    if isinstance(sold_out, bool):
+        return not sold_out
+    status = first_value(product, STOCK_STATUS_KEYS)
+    if isinstance(status, str):
+        status = status.lower().replace('-', '_').replace(' ', '_')
+        if status in ('sold_out', 'out_of_stock', 'unavailable'):
+            return False
+        if status in ('in_stock', 'available', 'on_sale'):
+            return True
+    return None
+
+def parse_listing(raw_data: str, page_url: str) -> List[dict]:
+    """Products listed on a shop/collection page's RENDER_DATA, in page order.
+
+    Each entry holds product_id, title, url, in_stock (True/False/None) and
+    stock, the stock-related fields as listed. Raises ValueError on
+    undecodable data.
+    """
+    products = {}
+    stack = [decode_render_data(raw_data)]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        product_id = first_value(node, PRODUCT_ID_KEYS)
+        if product_id is not None and any(key in node for key in STOCK_FIELDS + PRODUCT_TITLE_KEYS):
+            products.setdefault(str(product_id), node)
+            continue
+        stack.extend(reversed(list(node.values())))
+    origin = "{0.scheme}://{0.netloc}".format(urlsplit(page_url))
+    return [{
+        'product_id': product_id,
+        'title': str(first_value(product, PRODUCT_TITLE_KEYS) or product_id),
+        'url': urljoin(page_url, str(first_value(product, PRODUCT_URL_KEYS) or f"{origin}/view/product/{product_id}")),
+        'in_stock': listed_stock(product),
+        'stock': {key: product[key] for key in STOCK_FIELDS if key in product}
+    } for product_id, product in products.items()]
@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from typing import Dict, Optional
+import hashlib
+import threading
+from core.managers.task_manager import canonicalize_url
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class CachedResponse:
+    """Validators and parsed payload of the last product page seen for a URL"""
+    __slots__ = ('etag', 'last_modified', 'body_hash', 'product_info', 'title', 'product_url', 'size')
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], body_hash: str,
+                 product_info: dict, title: str, product_url: str, size: int):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = body_hash
+        self.product_info = product_info
+        self.title = title
+        self.product_url = product_url
+        self.size = size
+
+class ResponseCache:
+    """Process-wide LRU cache of product page responses, keyed by canonical URL.
+
+    Each entry keeps the ETag/Last-Modified validators for conditional
+    requests and a hash of the RENDER_DATA text, next to the payload parsed
+    from it. A 304, or a page whose RENDER_DATA hashes the same, is answered
+    from the entry without parsing again. Entries are evicted least recently
+    used first once max_entries or max_bytes (raw payload size) is exceeded.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ResponseCache, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def initialize(self):
+        self._lock = threading.Lock()
+        self.entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self.max_entries = 5000
+        self.max_bytes = 256 * 1024 * 1024
+        self.bytes = 0
+        self.stats = {'lookups': 0, 'not_modified': 0, 'hash_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for the cached copy of url"""
+        with self._lock:
+            entry = self.entries.get(canonicalize_url(url))
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self, url: str) -> Optional[CachedResponse]:
+        """Entry to reuse after the server answered 304"""
+        with self._lock:
+            self.stats['lookups'] += 1
+            entry = self._touch(canonicalize_url(url))
+            if entry is None:
+                self.stats['misses'] += 1
+            else:
+                self.stats['not_modified'] += 1
+            return entry
+
+    def match(self, url: str, body_hash: str) -> Optional[CachedResponse]:
+        """Entry to reuse if the page's RENDER_DATA is unchanged"""
+        with self._lock:
+            self.stats['lookups'] += 1
+            entry = self._touch(canonicalize_url(url))
+            if entry is not None and entry.body_hash == body_hash:
+                self.stats['hash_hits'] += 1
+                return entry
+            self.stats['misses'] += 1
+            return None
+
+    def store(self, url: str, body_hash: str, product_info: dict, title: str, product_url: str,
+              size: int, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """Cache a parsed payload. headers=None (a page load, no response headers seen)
+        keeps the validators of the previous entry; a dict replaces them"""
+        key = canonicalize_url(url)
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if headers is not None:
+                etag, last_modified = headers.get('etag'), headers.get('last-modified')
+            elif previous is not None:
+                etag, last_modified = previous.etag, previous.last_modified
+            else:
+                etag = last_modified = None
+            entry = CachedResponse(
+                etag=etag,
+                last_modified=last_modified,
+                body_hash=body_hash,
+                product_info=product_info,
+                title=title,
+                product_url=product_url,
+                size=size
+            )
+            if previous is not None:
+                self.bytes -= previous.size
+            self.entries[key] = entry
+            self.bytes += size
+            self._evict()
+        return entry
+
+    def invalidate(self, url: str):
+        with self._lock:
+            entry = self.entries.pop(canonicalize_url(url), None)
+            if entry is not None:
+                self.bytes -= entry.size
+
+    def _touch(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, entry = self.entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.stats['evictions'] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            hits = stats['not_modified'] + stats['hash_hits']
+            stats.update(
+                entries=len(self.entries),
+                bytes=self.bytes,
+                hit_rate=round(hits / stats['lookups'], 3) if stats['lookups'] else 0.0
+            )
+            return stats
@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+# Logged-in checkout accounts are stored under "account:<name>" next to the per-host sessions
+ACCOUNT_PREFIX = "account:"
+
+@dataclass
+class SessionState:
+    host: str
+    cookies: List[dict] = field(default_factory=list)
+    local_storage: Dict[str, Dict[str, str]] = field(default_factory=dict)  # origin -> items
+    saved_at: float = 0.0
+
+    def live_cookies(self, now: Optional[float] = None) -> List[dict]:
+        """Cookies that have not expired yet (session cookies are kept)"""
+        now = time.time() if now is None else now
+        return [cookie for cookie in self.cookies if not cookie.get('expires') or cookie['expires'] < 0 or cookie['expires'] > now]
+
+class SessionStore:
+    """Saves and restores browser sessions so new browsers start warm.
+
+    Cookies and localStorage are kept per host and shared by every task on
+    that host. Each browser pool slot also gets its own Chrome disk-cache
+    directory, since Chrome cannot share one between running instances.
+    Host sessions expire after ttl seconds. Account sessions expire after
+    account_ttl, which is off by default: a logged-in account is only
+    dropped when it is invalidated, and its cookies lapse on their own.
+    """
+
+    def __init__(self, root_dir="browser_sessions", ttl=6 * 3600, save_interval=300,
+                 account_ttl: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.root_dir = root_dir
+        self.ttl = ttl
+        self.account_ttl = account_ttl
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._states: Dict[str, SessionState] = {}
+        self._slots: Dict[str, Set[int]] = {}
+
+    @staticmethod
+    def _safe_name(host: str) -> str:
+        return re.sub(r'[^a-z0-9.-]', '_', host.lower())
+
+    def _state_path(self, host: str) -> str:
+        return os.path.join(self.root_dir, 'state', f"{self._safe_name(host)}.json")
+
+    # ----- slots -----
+
+    def acquire_slot(self, host: str) -> int:
+        """Lease the lowest free browser slot for a host"""
+        with self._lock:
+            in_use = self._slots.setdefault(host, set())
+            slot = 0
+            while slot in in_use:
+                slot += 1
+            in_use.add(slot)
+            return slot
+
+    def release_slot(self, host: str, slot: int):
+        with self._lock:
+            self._slots.get(host, set()).discard(slot)
+
+    def cache_dir(self, host: str, slot: int) -> str:
+        """Disk-cache directory for one browser slot"""
+        path = os.path.abspath(os.path.join(self.root_dir, 'cache', f"{self._safe_name(host)}-{slot}"))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # ----- state -----
+
+    def load(self, host: str) -> Optional[SessionState]:
+        """Return the warm session for a host, or None if there is none or it expired"""
+        with self._lock:
+            state = self._states.get(host)
+            if state is None:
+                state = self._read(host)
+                if state is not None:
+                    self._states[host] = state
+            ttl = self.account_ttl if host.startswith(ACCOUNT_PREFIX) else self.ttl
+            if state is not None and ttl is not None and time.time() - state.saved_at > ttl:
+                self.logger.info(f"Stored session for {host} expired")
+                self._drop(host)
+                return None
+            return state
+
+    def needs_save(self, host: str) -> bool:
+        state = self._states.get(host)
+        return state is None or time.time() - state.saved_at >= self.save_interval
+
+    def save(self, host: str, cookies: List[dict], local_storage: Dict[str, Dict[str, str]]) -> bool:
+        """Store a browser's current session as the warm session for its host"""
+        state = SessionState(host=host, cookies=cookies, local_storage=local_storage, saved_at=time.time())
+        path = self._state_path(host)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'host': state.host,
+                    'cookies': state.cookies,
+                    'local_storage': state.local_storage,
+                    'saved_at': state.saved_at
+                }, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.error(f"Error saving session for {host}: {e}")
+            return False
+        with self._lock:
+            self._states[host] = state
+        return True
+
+    def invalidate(self, host: str, clear_cache=False):
+        """Forget the stored session, e.g. after the host served a challenge page"""
+        with self._lock:
+            self._drop(host)
+        if clear_cache:
+            cache_root = os.path.join(self.root_dir, 'cache')
+            prefix = f"{self._safe_name(host)}-"
+            if os.path.isdir(cache_root):
+                for name in os.listdir(cache_root):
+                    if name.startswith(prefix):
+                        shutil.rmtree(os.path.join(cache_root, name), ignore_errors=True)
+        self.logger.info(f"Invalidated stored session for {host}")
+
+    def _drop(self, host: str):
+        self._states.pop(host, None)
+        try:
+            os.remove(self._state_path(host))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.error(f"Error removing session for {host}: {e}")
+
+    def _read(self, host: str) -> Optional[SessionState]:
+        path = self._state_path(host)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return SessionState(
+                host=data['host'],
+                cookies=data.get('cookies', []),
+                local_storage=data.get('local_storage', {}),
+                saved_at=data.get('saved_at', 0.0)
+            )
+        except Exception as e:
+            self.logger.error(f"Error loading session for {host}: {e}")
+            return None
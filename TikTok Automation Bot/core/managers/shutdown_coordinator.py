@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Iterable, List
+import logging
+import time
+import psutil
+from core.managers.persistence_manager import MonitoringTask
+from core.managers.task_manager import TaskStatus
+
+class ShutdownCoordinator:
+    """Stops many monitoring workers at once within a fixed time budget.
+
+    All workers are signalled together, browsers are closed in parallel,
+    anything still alive at the deadline is killed, and the surviving task
+    list is written to the state file in a single write.
+    """
+
+    def __init__(self, task_manager, persistence_manager, timeout=5.0, close_share=0.6, max_parallel=32):
+        self.logger = logging.getLogger(__name__)
+        self.task_manager = task_manager
+        self.persistence_manager = persistence_manager
+        self.timeout = timeout
+        self.close_share = close_share  # Part of the budget given to graceful browser close
+        self.max_parallel = max_parallel
+
+    def shutdown(self, workers: Iterable, mark_stopped=False) -> dict:
+        """Stop the given workers.
+
+        mark_stopped=False is an application exit: tasks stay persisted as
+        Active so they are restored on the next start. mark_stopped=True is a
+        user "Stop All": tasks are marked Stopped and dropped from the state file.
+        """
+        workers = list(workers)
+        started = time.monotonic()
+        deadline = started + self.timeout
+        worker_ids = {task_id for worker in workers for task_id in worker.task_ids()}
+
+        # Per-task writes of the stopped tasks are replaced by one checkpoint at the end.
+        # On exit they stay suppressed: late status changes must not drop them from the file.
+        self.persistence_manager.suppress(worker_ids)
+        try:
+            active_before = self.task_manager.get_active_tasks()
+
+            # Capture the process trees now; children get re-parented once chromedriver dies
+            processes = []
+            for worker in workers:
+                processes.extend(worker.browser_processes())
+
+            for worker in workers:
+                worker.request_shutdown()
+
+            closed = self.close_browsers(workers, started + self.timeout * self.close_share)
+            killed = self.reap_processes(processes)
+            unfinished = self.join_workers(workers, deadline)
+
+            if mark_stopped:
+                for task_id in worker_ids:
+                    self.task_manager.update_task(
+                        task_id,
+                        product_name='Unknown',
+                        monitoring_status=TaskStatus.STOPPED.value,
+                        product_status="Unknown",
+                        notification_status="Cancelled"
+                    )
+                remaining = [task for task in active_before if task.task_id not in worker_ids]
+            else:
+                remaining = active_before
+            self.save_checkpoint(remaining)
+        finally:
+            if mark_stopped:
+                self.persistence_manager.release(worker_ids)
+
+        report = {
+            'workers': len(workers),
+            'tasks': len(worker_ids),
+            'browsers_closed': closed,
+            'processes_killed': killed,
+            'threads_unfinished': unfinished,
+            'elapsed': round(time.monotonic() - started, 2)
+        }
+        self.logger.info(f"Shutdown finished: {report}")
+        return report
+
+    def close_browsers(self, workers: List, deadline: float) -> int:
+        """Close all browsers in parallel, giving up at the deadline"""
+        # A scheduler owns many browsers; each one is closed by its own call
+        closers = [close for worker in workers for close in worker.browser_closers()]
+        if not closers:
+            return 0
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_parallel, len(closers)),
+            thread_name_prefix="browser-close"
+        )
+        try:
+            futures = [executor.submit(close) for close in closers]
+            done, pending = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            if pending:
+                self.logger.warning(f"{len(pending)} browsers did not close before the deadline")
+            return sum(1 for future in done if not future.exception() and future.result())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def reap_processes(self, processes: Iterable[psutil.Process]) -> int:
+        """Kill any chromedriver/Chrome process that survived the graceful close"""
+        # psutil.Process remembers the creation time, so a reused PID is never killed
+        survivors = [process for process in processes if process.is_running()]
+        for process in survivors:
+            try:
+                process.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        gone, alive = psutil.wait_procs(survivors, timeout=1.0)
+        if alive:
+            self.logger.error(f"Could not kill browser processes: {[p.pid for p in alive]}")
+        return len(survivors)
+
+    def join_workers(self, workers: List, deadline: float) -> int:
+        """Wait for worker threads until the deadline; returns how many are still running"""
+        unfinished = 0
+        for worker in workers:
+            remaining_ms = int(max(0.0, deadline - time.monotonic()) * 1000)
+            if not worker.wait(remaining_ms):
+                unfinished += 1
+        if unfinished:
+            self.logger.warning(f"{unfinished} monitor threads still running at shutdown deadline")
+        return unfinished
+
+    def save_checkpoint(self, records) -> bool:
+        """Write the final task list in one batched write"""
+        return self.persistence_manager.save_active_tasks([
+            MonitoringTask.from_record(record, last_status=TaskStatus.ACTIVE.value)
+            for record in records
+        ])
@@ -0,0 +1,91 @@
+from typing import FrozenSet, Iterable, List, Optional, Tuple, Union
+import re
+
+# "Red/XL; sku: 1729384756012" targets the Red XL variant and the SKU with that ID.
+# A bare long number ("1729384756012") matches a SKU with that ID or with that value.
+SELECTOR_SEPARATOR = ';'
+VALUE_SEPARATOR = '/'
+SKU_ID_PATTERN = re.compile(r'^sku:\s*(\d+)$', re.IGNORECASE)
+BARE_SKU_ID_PATTERN = re.compile(r'^\d{6,}$')
+
+def normalize(value) -> str:
+    return ' '.join(str(value).split()).casefold()
+
+def sale_values(sku: dict) -> FrozenSet[str]:
+    """Normalized sku_sale_props values of one SKU"""
+    return frozenset(normalize(prop.get('prop_value', '')) for prop in sku.get('sku_sale_props', []))
+
+class SkuTerm:
+    """One selector: a SKU ID, and/or sale property values that must all be present"""
+    __slots__ = ('text', 'sku_id', 'values')
+
+    def __init__(self, text: str):
+        self.text = ' '.join(text.split())
+        match = SKU_ID_PATTERN.match(self.text)
+        self.sku_id = match.group(1) if match else None
+        self.values: FrozenSet[str] = frozenset()
+        if self.sku_id is None:
+            parts = [part.strip() for part in self.text.split(VALUE_SEPARATOR) if part.strip()]
+            if not parts:
+                raise ValueError(f"empty variant selector {text!r}")
+            self.text = VALUE_SEPARATOR.join(parts)
+            self.values = frozenset(normalize(part) for part in parts)
+            if BARE_SKU_ID_PATTERN.match(self.text):
+                # Could be an ID or a numeric value such as a model number; either matches
+                self.sku_id = self.text
+
+    def matches(self, sku_id: str, values: FrozenSet[str]) -> bool:
+        return sku_id == self.sku_id or (bool(self.values) and self.values <= values)
+
+    def exact(self, sku_id: str, values: FrozenSet[str]) -> bool:
+        """True when a match can be the only one: by ID, or naming every property of the SKU"""
+        return sku_id == self.sku_id or len(self.values) == len(values)
+
+class SkuSelector:
+    """Per-task variant selectors, compiled once and applied to every check.
+
+    A SKU is targeted when any selector matches it. Selectors that pin down
+    a single SKU are resolved by their first match; once every selector is
+    resolved the remaining SKUs are not looked at.
+    """
+
+    def __init__(self, terms: List[SkuTerm]):
+        self.terms = terms
+
+    @classmethod
+    def compile(cls, spec: Union[str, Iterable[str], None]) -> Optional['SkuSelector']:
+        """Selector for a "a/b; c" string or a list of selectors; None when nothing is selected.
+        Raises ValueError on an empty selector."""
+        if spec is None:
+            return None
+        parts = spec.split(SELECTOR_SEPARATOR) if isinstance(spec, str) else [str(part) for part in spec]
+        terms = [SkuTerm(part) for part in parts if part.strip()]
+        return cls(terms) if terms else None
+
+    @property
+    def spec(self) -> str:
+        """Canonical text form, as stored on the task"""
+        return f"{SELECTOR_SEPARATOR} ".join(term.text for term in self.terms)
+
+    def select(self, skus: List[dict]) -> Tuple[List[dict], List[str]]:
+        """(targeted SKUs in page order, selectors that matched no SKU)"""
+        selected = []
+        found = [False] * len(self.terms)
+        pending = list(range(len(self.terms)))
+        for sku in skus:
+            if not isinstance(sku, dict):
+                continue
+            sku_id = str(sku.get('sku_id', ''))
+            values = sale_values(sku)
+            hit = False
+            for index in list(pending):
+                term = self.terms[index]
+                if term.matches(sku_id, values):
+                    hit = found[index] = True
+                    if term.exact(sku_id, values):
+                        pending.remove(index)
+            if hit:
+                selected.append(sku)
+            if not pending:
+                break
+        return selected, [term.text for term, matched in zip(self.terms, found) if not matched]
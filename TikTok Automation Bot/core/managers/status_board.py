@@ -0,0 +1,295 @@
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from core.managers.task_manager import (
+    NotificationStatus, QoSClass, TaskEvent, TaskEventType, TaskKind, TaskRecord, TaskStatus
+)
+
+MAGIC = b'TSB1'
+LAYOUT_VERSION = 1
+DEFAULT_NAME = "tiktok-monitor-status"
+# magic, layout version, slots, lanes, record size
+HEADER = struct.Struct('<4sIIII')
+HEADER_SIZE = 64
+# Each record starts with its seqlock counter: odd while a write is in progress
+SEQ = struct.Struct('<I')
+# in use, monitoring, product, notification, qos, kind, stock total, in stock,
+# last checked, next due, written at, lag, stock bitmap, task id, url, product name
+BODY = struct.Struct('<6BHHdddf4xQ32s160s80s')
+RECORD_SIZE = SEQ.size + BODY.size
+STOCK_BITS = 64  # Stock flags beyond this are counted but not kept per variant
+
+# Status strings as one-byte codes; a string outside the table is stored as 0 (the first entry)
+MONITORING_CODES = tuple(status.value for status in TaskStatus)
+PRODUCT_CODES = ("Unknown", "Searching", "Available", "Unavailable", "Retrying", "Blocked",
+                 "Paused", "In Cart", "Error", "Listing")
+NOTIFICATION_CODES = tuple(status.value for status in NotificationStatus) + ("Cancelled",)
+QOS_CODES = tuple(qos.value for qos in QoSClass)
+KIND_CODES = tuple(kind.value for kind in TaskKind)
+LISTING = PRODUCT_CODES.index("Listing")  # Shop tasks: "<in stock>/<total> in stock"
+
+def encode(table: Tuple[str, ...], value: str) -> int:
+    try:
+        return table.index(value)
+    except ValueError:
+        return 0
+
+def decode(table: Tuple[str, ...], code: int) -> str:
+    return table[code] if code < len(table) else table[0]
+
+def fixed(text: Optional[str], size: int) -> bytes:
+    """UTF-8 text cut to size bytes without splitting a character"""
+    return (text or '').encode('utf-8')[:size].decode('utf-8', 'ignore').encode('utf-8')
+
+def stock_bitmap(stock: Iterable[bool]) -> int:
+    bitmap = 0
+    for index, in_stock in enumerate(stock):
+        if index >= STOCK_BITS:
+            break
+        if in_stock:
+            bitmap |= 1 << index
+    return bitmap
+
+class StatusEntry:
+    """One task's status as read from the board"""
+    __slots__ = (
+        'task_id', 'url', 'product_name', 'monitoring_status', 'product_status', 'notification_status',
+        'qos', 'kind', 'last_checked', 'next_due', 'updated', 'lag', 'stock_total', 'in_stock', 'stock_bitmap'
+    )
+
+    def __init__(self, values: tuple):
+        (_, monitoring, product, notification, qos, kind, self.stock_total, self.in_stock,
+         self.last_checked, self.next_due, self.updated, self.lag, self.stock_bitmap,
+         task_id, url, product_name) = values
+        self.task_id = task_id.rstrip(b'\0').decode('utf-8', 'ignore')
+        self.url = url.rstrip(b'\0').decode('utf-8', 'ignore')
+        self.product_name = product_name.rstrip(b'\0').decode('utf-8', 'ignore')
+        self.monitoring_status = decode(MONITORING_CODES, monitoring)
+        self.product_status = (
+            f"{self.in_stock}/{self.stock_total} in stock" if product == LISTING else decode(PRODUCT_CODES, product)
+        )
+        self.notification_status = decode(NOTIFICATION_CODES, notification)
+        self.qos = decode(QOS_CODES, qos)
+        self.kind = decode(KIND_CODES, kind)
+
+    def stock(self) -> List[bool]:
+        """Per-variant flags for the first STOCK_BITS variants"""
+        return [bool(self.stock_bitmap >> index & 1) for index in range(min(self.stock_total, STOCK_BITS))]
+
+    def to_dict(self) -> dict:
+        data = {field: getattr(self, field) for field in self.__slots__ if field != 'stock_bitmap'}
+        data['stock'] = self.stock()
+        return data
+
+class StatusBoard:
+    """Fixed-layout table of task status records in shared memory.
+
+    The board is split into lanes, one per engine process, and every lane
+    into slots of RECORD_SIZE bytes; a process only ever writes the slots of
+    its own lane, so processes need no shared lock. Each record is guarded
+    by a seqlock: the writer makes the counter odd, writes the body and
+    makes it even again, and a reader retries whenever the counter was odd
+    or moved while it unpacked the body. Readers unpack straight from the
+    shared buffer and, through changed(), only decode slots whose counter
+    moved since their last pass.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, slots: int, lanes: int, owner: bool):
+        self.logger = logging.getLogger(__name__)
+        self.memory = memory
+        self.buffer = memory.buf
+        self.slots = slots
+        self.lanes = lanes
+        self.owner = owner  # The creating process unlinks the board
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_NAME, slots: int = 4096, lanes: int = 4) -> 'StatusBoard':
+        """Create the board; a board left behind by a crashed run under the same name is replaced"""
+        size = HEADER_SIZE + slots * RECORD_SIZE
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        memory.buf[:size] = bytes(size)
+        HEADER.pack_into(memory.buf, 0, MAGIC, LAYOUT_VERSION, slots, lanes, RECORD_SIZE)
+        return cls(memory, slots, lanes, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_NAME) -> 'StatusBoard':
+        """Open a board created by another process; raises FileNotFoundError or ValueError"""
+        memory = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix' and sys.version_info < (3, 13):
+            # Otherwise this process's resource tracker would unlink the board when it exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        magic, version, slots, lanes, record_size = HEADER.unpack_from(memory.buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION or record_size != RECORD_SIZE:
+            memory.close()
+            raise ValueError(f"Shared memory {name!r} is not a status board of this version")
+        return cls(memory, slots, lanes, owner=False)
+
+    def close(self):
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def lane(self, index: int) -> range:
+        """Slots belonging to one lane"""
+        if not 0 <= index < self.lanes:
+            raise ValueError(f"lane {index} outside 0-{self.lanes - 1}")
+        per_lane = self.slots // self.lanes
+        return range(index * per_lane, (index + 1) * per_lane)
+
+    def _offset(self, slot: int) -> int:
+        return HEADER_SIZE + slot * RECORD_SIZE
+
+    # ----- writer side (one writer per slot) -----
+
+    def write(self, slot: int, record: TaskRecord, lag: float = 0.0):
+        offset = self._offset(slot)
+        seq = SEQ.unpack_from(self.buffer, offset)[0]
+        SEQ.pack_into(self.buffer, offset, (seq + 1) & 0xFFFFFFFF)
+        if record.product_status.endswith(" in stock"):
+            product = LISTING  # Rebuilt from the stock counts on read
+        else:
+            product = encode(PRODUCT_CODES, record.product_status)
+        BODY.pack_into(
+            self.buffer, offset + SEQ.size,
+            1,
+            encode(MONITORING_CODES, record.monitoring_status),
+            product,
+            encode(NOTIFICATION_CODES, record.notification_status),
+            encode(QOS_CODES, record.qos),
+            encode(KIND_CODES, record.kind),
+            min(len(record.stock), 0xFFFF),
+            min(sum(record.stock), 0xFFFF),
+            record.last_checked or 0.0,
+            record.next_due or 0.0,
+            time.time(),
+            lag,
+            stock_bitmap(record.stock),
+            fixed(record.task_id, 32),
+            fixed(record.url, 160),
+            fixed(record.product_name, 80)
+        )
+        SEQ.pack_into(self.buffer, offset, (seq + 2) & 0xFFFFFFFF)
+
+    def clear(self, slot: int):
+        offset = self._offset(slot)
+        seq = SEQ.unpack_from(self.buffer, offset)[0]
+        SEQ.pack_into(self.buffer, offset, (seq + 1) & 0xFFFFFFFF)
+        self.buffer[offset + SEQ.size:offset + RECORD_SIZE] = bytes(BODY.size)
+        SEQ.pack_into(self.buffer, offset, (seq + 2) & 0xFFFFFFFF)
+
+    # ----- reader side -----
+
+    def _read(self, slot: int, retries: int = 100) -> Optional[Tuple[int, tuple]]:
+        """(sequence, unpacked body) of a consistent copy, or None if the writer kept it busy"""
+        offset = self._offset(slot)
+        for _ in range(retries):
+            before = SEQ.unpack_from(self.buffer, offset)[0]
+            if before & 1:
+                time.sleep(0)
+                continue
+            values = BODY.unpack_from(self.buffer, offset + SEQ.size)
+            if SEQ.unpack_from(self.buffer, offset)[0] == before:
+                return before, values
+        return None
+
+    def read(self, slot: int) -> Optional[StatusEntry]:
+        copy = self._read(slot)
+        if copy is None or not copy[1][0]:
+            return None
+        return StatusEntry(copy[1])
+
+    def changed(self, seen: Dict[int, int], lanes: Optional[Iterable[int]] = None) -> List[Tuple[int, Optional[StatusEntry]]]:
+        """Slots rewritten since the sequences in seen (updated in place); None marks a freed slot"""
+        slots = range(self.slots) if lanes is None else [slot for lane in lanes for slot in self.lane(lane)]
+        updates = []
+        for slot in slots:
+            seq = SEQ.unpack_from(self.buffer, self._offset(slot))[0]
+            if seen.get(slot, 0) == seq:
+                continue
+            copy = self._read(slot)
+            if copy is None:
+                continue  # Mid-write on every try; picked up on the next pass
+            seen[slot] = copy[0]
+            updates.append((slot, StatusEntry(copy[1]) if copy[1][0] else None))
+        return updates
+
+    def entries(self, lanes: Optional[Iterable[int]] = None) -> List[StatusEntry]:
+        """Every task currently on the board"""
+        return [entry for _, entry in self.changed({}, lanes) if entry is not None]
+
+class StatusBoardPublisher:
+    """Mirrors one process's TaskManager into its lane of a StatusBoard.
+
+    Slots are handed out per task from the lane's free list and returned
+    when the task is removed. A task's lag is taken when a check is
+    recorded: how long after the due time it replaced the check finished.
+    """
+
+    def __init__(self, board: StatusBoard, lane: int, task_manager):
+        self.logger = logging.getLogger(__name__)
+        self.board = board
+        self.lane = lane
+        self.task_manager = task_manager
+        self._lock = threading.Lock()  # Serializes this process's writes; other processes use other lanes
+        self._free = list(reversed(board.lane(lane)))
+        self._slots: Dict[str, int] = {}
+        self._lags: Dict[str, float] = {}
+        self.dropped = 0  # Tasks that found the lane full
+        for record in task_manager.get_all_tasks():
+            self._write(record)
+        task_manager.subscribe(self.handle_task_event)
+
+    def handle_task_event(self, event: TaskEvent):
+        if event.type == TaskEventType.REMOVED:
+            with self._lock:
+                slot = self._slots.pop(event.task_id, None)
+                self._lags.pop(event.task_id, None)
+                if slot is not None:
+                    self.board.clear(slot)
+                    self._free.append(slot)
+            return
+        previous = event.previous
+        if 'last_checked' in event.changed and previous is not None and previous.next_due:
+            self._lags[event.task_id] = max(0.0, event.record.last_checked - previous.next_due)
+        self._write(event.record)
+
+    def _write(self, record: TaskRecord):
+        with self._lock:
+            slot = self._slots.get(record.task_id)
+            if slot is None:
+                if not self._free:
+                    self.dropped += 1
+                    return
+                slot = self._slots[record.task_id] = self._free.pop()
+            self.board.write(slot, record, self._lags.get(record.task_id, 0.0))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {'board': self.board.name, 'lane': self.lane, 'tasks': len(self._slots),
+                    'free_slots': len(self._free), 'dropped': self.dropped}
+
+    def close(self):
+        """Stop publishing and free this process's slots"""
+        self.task_manager.unsubscribe(self.handle_task_event)
+        with self._lock:
+            for slot in self._slots.values():
+                self.board.clear(slot)
+                self._free.append(slot)
+            self._slots.clear()
+            self._lags.clear()
@@ -0,0 +1,375 @@
+from array import array
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+
+FILE_MAGIC = b'SKH1'
+FILE_HEADER = struct.Struct('<4sI')       # magic, series count
+SERIES_HEADER = struct.Struct('<HdiII')   # key length, last seen, floor stock, raw rows, bucket rows
+
+RAW_COLUMNS = ('d', 'i')                  # time, stock
+BUCKET_COLUMNS = ('d', 'f', 'f', 'H')     # bucket start, observed seconds, in-stock seconds, restocks
+
+def sku_key(product_id: str, sku_id) -> str:
+    return f"{product_id}:{sku_id}"
+
+class ColumnRing:
+    """Fixed-capacity ring buffer stored as one typed array per column"""
+    __slots__ = ('columns', 'capacity', 'head')
+
+    def __init__(self, typecodes: Tuple[str, ...], capacity: int):
+        self.columns = tuple(array(code) for code in typecodes)
+        self.capacity = capacity
+        self.head = 0  # Index of the oldest row once the ring is full
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def append(self, row: tuple) -> Optional[tuple]:
+        """Add a row; returns the evicted oldest row when the ring is full"""
+        if len(self) < self.capacity:
+            for column, value in zip(self.columns, row):
+                column.append(value)
+            return None
+        evicted = tuple(column[self.head] for column in self.columns)
+        for column, value in zip(self.columns, row):
+            column[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        return evicted
+
+    def last(self) -> Optional[tuple]:
+        if not len(self):
+            return None
+        index = (self.head - 1) % len(self)
+        return tuple(column[index] for column in self.columns)
+
+    def set_last(self, row: tuple):
+        index = (self.head - 1) % len(self)
+        for column, value in zip(self.columns, row):
+            column[index] = value
+
+    def first(self) -> Optional[tuple]:
+        if not len(self):
+            return None
+        return tuple(column[self.head] for column in self.columns)
+
+    def rows(self) -> Iterable[tuple]:
+        """Rows oldest first"""
+        size = len(self)
+        for offset in range(size):
+            index = (self.head + offset) % size
+            yield tuple(column[index] for column in self.columns)
+
+    def ordered_columns(self) -> Tuple[array, ...]:
+        """Columns rotated so the oldest row comes first"""
+        return tuple(column[self.head:] + column[:self.head] for column in self.columns)
+
+    @classmethod
+    def from_columns(cls, columns: Tuple[array, ...], capacity: int) -> 'ColumnRing':
+        ring = cls(tuple(column.typecode for column in columns), capacity)
+        skip = max(0, len(columns[0]) - capacity)
+        ring.columns = tuple(column[skip:] for column in columns)
+        return ring
+
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in self.columns)
+
+class SkuSeries:
+    """Stock history of one SKU.
+
+    Only change points are kept at full resolution: a row is added when the
+    stock value differs from the last one, and last_seen says how far the
+    last value is known to hold. Change points pushed out of the raw ring are
+    folded into fixed-size time buckets that keep observed time, in-stock
+    time and restock counts.
+    """
+    __slots__ = ('key', 'raw', 'buckets', 'last_seen', 'floor_stock')
+
+    def __init__(self, key: str, raw_capacity: int, bucket_capacity: int):
+        self.key = key
+        self.raw = ColumnRing(RAW_COLUMNS, raw_capacity)
+        self.buckets = ColumnRing(BUCKET_COLUMNS, bucket_capacity)
+        self.last_seen = 0.0
+        self.floor_stock = 0  # Stock before the oldest raw change point
+
+    def record(self, stock: int, now: float, bucket_seconds: float) -> bool:
+        """Add an observation; returns True if it was a restock"""
+        last = self.raw.last()
+        self.last_seen = max(self.last_seen, now)
+        if last is not None and last[1] == stock:
+            return False
+        restock = stock > 0 and (last[1] if last is not None else self.floor_stock) <= 0
+        evicted = self.raw.append((now, stock))
+        if evicted is not None:
+            end = self.raw.first()[0]
+            self._fold(evicted[0], end, evicted[1], bucket_seconds)
+        return restock
+
+    def _fold(self, start: float, end: float, stock: int, bucket_seconds: float):
+        """Downsample one evicted interval into the bucket ring"""
+        restock = stock > 0 and self.floor_stock <= 0
+        self.floor_stock = stock
+        position = start
+        while position < end or restock:
+            bucket_start = position - position % bucket_seconds
+            span = max(0.0, min(end, bucket_start + bucket_seconds) - position)
+            in_stock = span if stock > 0 else 0.0
+            last = self.buckets.last()
+            if last is not None and last[0] == bucket_start:
+                self.buckets.set_last((bucket_start, last[1] + span, last[2] + in_stock, min(65535, last[3] + restock)))
+            else:
+                self.buckets.append((bucket_start, span, in_stock, int(restock)))
+            restock = False
+            position = bucket_start + bucket_seconds
+
+    def change_points(self, since: float = 0.0) -> List[Tuple[float, int]]:
+        return [(timestamp, stock) for timestamp, stock in self.raw.rows() if timestamp >= since]
+
+    def intervals(self) -> Iterable[Tuple[float, float, int]]:
+        """(start, end, stock) spans covered by the raw change points"""
+        previous = None
+        for timestamp, stock in self.raw.rows():
+            if previous is not None:
+                yield previous[0], timestamp, previous[1]
+            previous = (timestamp, stock)
+        if previous is not None:
+            yield previous[0], max(previous[0], self.last_seen), previous[1]
+
+    def nbytes(self) -> int:
+        return self.raw.nbytes() + self.buckets.nbytes()
+
+class StockHistory:
+    """Bounded in-memory time series of per-SKU stock observations.
+
+    Series are keyed "<product_id>:<sku_id>". At most max_series series are
+    kept; the one updated least recently is dropped first. The store is
+    written to a compact columnar binary file with save() and read back on
+    start.
+    """
+
+    def __init__(self, path="stock_history.bin", raw_capacity=32, bucket_seconds=3600,
+                 bucket_capacity=72, max_series=50000, save_interval=300):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.raw_capacity = raw_capacity
+        self.bucket_seconds = bucket_seconds
+        self.bucket_capacity = bucket_capacity
+        self.max_series = max_series
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.series: 'OrderedDict[str, SkuSeries]' = OrderedDict()
+        self.last_save = time.time()
+        self.dirty = False
+        self.load()
+
+    # ----- recording -----
+
+    def record(self, key: str, stock: int, now: Optional[float] = None) -> bool:
+        """Record one SKU observation; returns True if it was a restock"""
+        now = time.time() if now is None else now
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = SkuSeries(key, self.raw_capacity, self.bucket_capacity)
+                while len(self.series) > self.max_series:
+                    self.series.popitem(last=False)
+            else:
+                self.series.move_to_end(key)
+            self.dirty = True
+            return series.record(int(stock), now, self.bucket_seconds)
+
+    def record_skus(self, product_id: str, skus: List[dict], now: Optional[float] = None) -> List[str]:
+        """Record every SKU of one product check; returns the keys that restocked"""
+        now = time.time() if now is None else now
+        restocked = []
+        for sku in skus:
+            key = sku_key(product_id, sku.get('sku_id', ''))
+            if self.record(key, sku.get('stock', 0) or 0, now):
+                restocked.append(key)
+        return restocked
+
+    # ----- queries -----
+
+    def keys(self, product_id: Optional[str] = None) -> List[str]:
+        with self._lock:
+            return self._matching(product_id)
+
+    def variant_history(self, key: str, since: float = 0.0) -> List[Tuple[float, int]]:
+        """Full-resolution (time, stock) change points of one SKU"""
+        with self._lock:
+            series = self.series.get(key)
+            return series.change_points(since) if series else []
+
+    def downsampled(self, key: str, since: float = 0.0) -> List[dict]:
+        """Bucketed history of one SKU, older than the full-resolution change points"""
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                return []
+            return [{
+                'start': start,
+                'observed': observed,
+                'in_stock': in_stock,
+                'restocks': restocks
+            } for start, observed, in_stock, restocks in series.buckets.rows() if start + self.bucket_seconds > since]
+
+    def restock_events(self, product_id: Optional[str] = None, since: float = 0.0) -> List[Tuple[str, float, int]]:
+        """(key, time, stock) for every full-resolution out-of-stock to in-stock change"""
+        events = []
+        with self._lock:
+            for key in self._matching(product_id):
+                series = self.series[key]
+                previous = series.floor_stock
+                for timestamp, stock in series.raw.rows():
+                    if stock > 0 and previous <= 0 and timestamp >= since:
+                        events.append((key, timestamp, stock))
+                    previous = stock
+        events.sort(key=lambda event: event[1])
+        return events
+
+    def restock_count(self, key: str, since: float = 0.0) -> int:
+        """Restocks since a time, including downsampled history"""
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                return 0
+            count = sum(restocks for start, _, _, restocks in series.buckets.rows() if start >= since)
+            previous = series.floor_stock
+            for timestamp, stock in series.raw.rows():
+                if stock > 0 and previous <= 0 and timestamp >= since:
+                    count += 1
+                previous = stock
+            return count
+
+    def time_out_of_stock(self, key: str, since: float = 0.0, until: Optional[float] = None) -> float:
+        """Observed seconds the SKU spent out of stock in [since, until).
+
+        Downsampled buckets count whole when they start inside the range.
+        """
+        until = time.time() if until is None else until
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                return 0.0
+            total = sum(
+                observed - in_stock for start, observed, in_stock, _ in series.buckets.rows()
+                if since <= start < until
+            )
+            for start, end, stock in series.intervals():
+                if stock <= 0:
+                    total += max(0.0, min(end, until) - max(start, since))
+            return total
+
+    def summary(self, key: str) -> Optional[dict]:
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                return None
+            last = series.raw.last()
+            return {
+                'key': key,
+                'stock': last[1] if last else None,
+                'last_change': last[0] if last else None,
+                'last_seen': series.last_seen,
+                'change_points': len(series.raw),
+                'buckets': len(series.buckets)
+            }
+
+    def memory_usage(self) -> int:
+        """Bytes held by the sample arrays"""
+        with self._lock:
+            return sum(series.nbytes() for series in self.series.values())
+
+    def _matching(self, product_id: Optional[str]) -> List[str]:
+        if product_id is None:
+            return list(self.series)
+        prefix = f"{product_id}:"
+        return [key for key in self.series if key.startswith(prefix)]
+
+    # ----- persistence -----
+
+    def maybe_save(self) -> bool:
+        """Save if the save interval has passed; skipped while another thread is saving"""
+        if not self.dirty or time.time() - self.last_save < self.save_interval:
+            return False
+        return self.save(blocking=False)
+
+    def save(self, blocking=True) -> bool:
+        if not self._save_lock.acquire(blocking=blocking):
+            return False
+        try:
+            with self._lock:
+                chunks = [FILE_HEADER.pack(FILE_MAGIC, len(self.series))]
+                for series in self.series.values():
+                    chunks.append(self._pack_series(series))
+                self.dirty = False
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(chunks))
+            os.replace(tmp_path, self.path)
+            self.last_save = time.time()
+            return True
+        except Exception as e:
+            self.dirty = True
+            self.logger.error(f"Error saving stock history: {e}")
+            return False
+        finally:
+            self._save_lock.release()
+
+    def _pack_series(self, series: SkuSeries) -> bytes:
+        key = series.key.encode('utf-8')
+        parts = [SERIES_HEADER.pack(len(key), series.last_seen, series.floor_stock, len(series.raw), len(series.buckets)), key]
+        for column in series.raw.ordered_columns() + series.buckets.ordered_columns():
+            if sys.byteorder == 'big':
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b''.join(parts)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, count = FILE_HEADER.unpack_from(data, 0)
+            if magic != FILE_MAGIC:
+                raise ValueError(f"not a stock history file (magic {magic!r})")
+            offset = FILE_HEADER.size
+            series_map = OrderedDict()
+            for _ in range(count):
+                series, offset = self._unpack_series(data, offset)
+                series_map[series.key] = series
+            while len(series_map) > self.max_series:
+                series_map.popitem(last=False)
+            with self._lock:
+                self.series = series_map
+            self.logger.info(f"Loaded stock history for {len(series_map)} SKUs")
+        except Exception as e:
+            self.logger.error(f"Error loading stock history: {e}")
+
+    def _unpack_series(self, data: bytes, offset: int) -> Tuple[SkuSeries, int]:
+        key_length, last_seen, floor_stock, raw_rows, bucket_rows = SERIES_HEADER.unpack_from(data, offset)
+        offset += SERIES_HEADER.size
+        key = data[offset:offset + key_length].decode('utf-8')
+        offset += key_length
+        columns = []
+        for typecode, rows in [(code, raw_rows) for code in RAW_COLUMNS] + [(code, bucket_rows) for code in BUCKET_COLUMNS]:
+            column = array(typecode)
+            size = column.itemsize * rows
+            column.frombytes(data[offset:offset + size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns.append(column)
+            offset += size
+        series = SkuSeries(key, self.raw_capacity, self.bucket_capacity)
+        series.raw = ColumnRing.from_columns(tuple(columns[:len(RAW_COLUMNS)]), self.raw_capacity)
+        series.buckets = ColumnRing.from_columns(tuple(columns[len(RAW_COLUMNS):]), self.bucket_capacity)
+        series.last_seen = last_seen
+        series.floor_stock = floor_stock
+        return series, offset
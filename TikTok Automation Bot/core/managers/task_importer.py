@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+import csv
+import json
+import logging
+import os
+import re
+import uuid
+from core.managers.persistence_manager import MonitoringTask
+from core.managers.task_manager import TaskKind, TaskStatus, canonicalize_url
+from core.managers.qos import parse_qos, profile_for
+from core.managers.sku_selector import SkuSelector
+
+PHONE_PATTERN = re.compile(r'^\+?\d{8,15}$')
+MIN_INTERVAL = 5
+MAX_INTERVAL = 3600
+
+@dataclass
+class ImportReport:
+    added: int = 0
+    duplicates: int = 0
+    invalid: List[Tuple[int, str]] = field(default_factory=list)  # (line, reason)
+    task_ids: List[str] = field(default_factory=list)
+    refused: int = 0  # Valid rows turned away because the scheduler is overloaded
+
+    def summary(self) -> str:
+        summary = f"{self.added} added, {self.duplicates} duplicates skipped, {len(self.invalid)} invalid"
+        if self.refused:
+            summary += f", {self.refused} refused (scheduler overloaded)"
+        return summary
+
+def read_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, row) from a .jsonl file or a CSV with or without a url,phone,interval[,qos,kind,variants] header"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson'):
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError:
+                        yield line_number, {'_error': "not valid JSON"}
+            return
+        reader = csv.reader(f)
+        header = None
+        for line_number, row in enumerate(reader, 1):
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            if line_number == 1 and row[0].strip().lower() == 'url':
+                header = [cell.strip().lower() for cell in row]
+                continue
+            keys = header or ['url', 'phone', 'interval', 'qos', 'kind', 'variants']
+            yield line_number, dict(zip(keys, (cell.strip() for cell in row)))
+
+def validate_row(row: dict, default_interval: int) -> Tuple[Optional[dict], Optional[str]]:
+    """Return (task spec, None) for a good row or (None, reason)"""
+    if '_error' in row:
+        return None, row['_error']
+    url = str(row.get('url') or '').strip()
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return None, f"invalid URL {url!r}"
+    phone = re.sub(r'[\s()-]', '', str(row.get('phone') or row.get('phone_number') or ''))
+    if not PHONE_PATTERN.match(phone):
+        return None, f"invalid phone number {phone!r}"
+    try:
+        qos = parse_qos(row.get('qos') or row.get('priority'))
+    except ValueError:
+        return None, f"invalid QoS class {row.get('qos') or row.get('priority')!r}"
+    kind = str(row.get('kind') or row.get('type') or TaskKind.PRODUCT.value).strip().lower()
+    if kind not in {task_kind.value for task_kind in TaskKind}:
+        return None, f"invalid task kind {kind!r}"
+    try:
+        selector = SkuSelector.compile(row.get('variants') or row.get('skus'))
+    except ValueError as e:
+        return None, f"invalid variants: {e}"
+    if selector is not None and kind != TaskKind.PRODUCT.value:
+        return None, "variants can only be selected on product tasks"
+    interval = row.get('interval') or row.get('check_interval') or default_interval
+    try:
+        interval = int(interval)
+    except (TypeError, ValueError):
+        return None, f"invalid interval {interval!r}"
+    # Critical tasks may go below the usual minimum, down to their cadence floor
+    min_interval = min(MIN_INTERVAL, int(profile_for(qos).min_interval))
+    if not min_interval <= interval <= MAX_INTERVAL:
+        return None, f"interval {interval} outside {min_interval}-{MAX_INTERVAL}s"
+    return {
+        'url': canonicalize_url(url), 'phone_number': phone, 'check_interval': interval,
+        'qos': qos.value, 'kind': kind, 'variants': selector.spec if selector else ""
+    }, None
+
+class TaskImporter:
+    """Bulk ingest of tasks from CSV/JSONL files.
+
+    Rows are validated and their URLs canonicalized. Rows whose URL is
+    already monitored (or repeated in the file) are skipped. The rest are
+    created in one TaskManager batch, written to the state file in one
+    write, and handed to the MonitorScheduler together instead of getting
+    a worker each.
+    """
+
+    def __init__(self, task_manager, persistence_manager, scheduler):
+        self.logger = logging.getLogger(__name__)
+        self.task_manager = task_manager
+        self.persistence_manager = persistence_manager
+        self.scheduler = scheduler
+
+    def import_file(self, path: str, default_interval: int = 30) -> ImportReport:
+        report = self.import_rows(read_rows(path), default_interval)
+        self.logger.info(f"Imported {path}: {report.summary()}")
+        return report
+
+    def import_rows(self, rows: Iterable[Tuple[int, dict]], default_interval: int = 30) -> ImportReport:
+        """Validate, dedupe and add (line number, row) pairs as one batch"""
+        report = ImportReport()
+        specs = []
+        seen = set()
+        for line_number, row in rows:
+            spec, error = validate_row(row, default_interval)
+            if error:
+                report.invalid.append((line_number, error))
+                continue
+            if spec['url'] in seen or self.task_manager.is_url_monitored(spec['url']):
+                report.duplicates += 1
+                continue
+            seen.add(spec['url'])
+            spec.update(
+                product_name="Loading",
+                monitoring_status=TaskStatus.ACTIVE.value,
+                product_status="Searching",
+                notification_status="Pending",
+                scheduled=True
+            )
+            specs.append(spec)
+        if specs and not self.scheduler.accepting():
+            self.scheduler.load.count('refused', len(specs))
+            report.refused = len(specs)
+            self.logger.warning(f"Refused {len(specs)} new tasks: scheduler is overloaded")
+            return report
+        records = self.add_specs(specs)
+        report.added = len(records)
+        report.task_ids = [record.task_id for record in records]
+        return report
+
+    def add_specs(self, specs: List[dict]):
+        """Create, persist and schedule task specs as one batch"""
+        if not specs:
+            return []
+        # IDs are assigned up front so only this batch's per-task writes are skipped
+        specs = [dict(spec, task_id=spec.get('task_id') or uuid.uuid4().hex) for spec in specs]
+        with self.persistence_manager.batch(spec['task_id'] for spec in specs):
+            records = self.task_manager.create_tasks(specs)
+            self.persistence_manager.add_tasks([MonitoringTask.from_record(record) for record in records])
+        self.scheduler.add_tasks(records)
+        return records
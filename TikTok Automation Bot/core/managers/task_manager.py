@@ -1,6 +1,14 @@
+from collections import deque
 from enum import Enum
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import logging
+import re
+import threading
+import time
+import uuid
+from core.managers.drop_window import DropWindow
 
 class TaskStatus(Enum):
     PENDING = "Pending"
@@ -8,12 +16,129 @@ class TaskStatus(Enum):
     STOPPED = "Stopped"
     COMPLETED = "Completed"
     FAILED = "Failed"
+    ERROR = "Error"
 
 class NotificationStatus(Enum):
     PENDING = "Pending"
     SENDING = "Sending"
     SENT = "Sent"
     FAILED = "Failed"
+    SKIPPED = "Skipped"  # Already alerted for this stock; nothing new to send
+    DISABLED = "Notifications disabled"  # No sender configured (Twilio credentials missing)
+
+class TaskKind(Enum):
+    PRODUCT = "product"
+    SHOP = "shop"  # Shop or collection listing page watched as one task
+
+class QoSClass(Enum):
+    CRITICAL = "critical"
+    NORMAL = "normal"
+    BACKGROUND = "background"
+
+class TaskEventType(Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    REMOVED = "removed"
+
+# Query parameters that only carry share/tracking information
+TRACKING_PARAMS = ('utm_', 'share_', '_svg', 'sec_user_id', 'sender_device', 'u_code', 'enter_from')
+PRODUCT_ID_PATTERN = re.compile(r'\d{10,}')
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a product URL so the same product always maps to the same key"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    host = parts.netloc.lower()
+    path = parts.path.rstrip('/') or '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if not key.startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+def extract_product_id(url: str) -> str:
+    """Get the canonical product ID from a product URL (falls back to the canonical URL)"""
+    matches = PRODUCT_ID_PATTERN.findall(urlsplit(url).path)
+    if matches:
+        return matches[-1]
+    return canonicalize_url(url)
+
+class TaskRecord:
+    """Compact task record. Records are never mutated once published; use replace()"""
+    __slots__ = (
+        'task_id', 'url', 'product_id', 'phone_number', 'check_interval',
+        'product_name', 'monitoring_status', 'product_status', 'notification_status',
+        'created_at', 'last_checked', 'next_due', 'notification_sent', 'drop_windows',
+        'checkout_account', 'cart_status', 'scheduled', 'qos', 'kind', 'variants', 'stock'
+    )
+
+    def __init__(self, task_id: str, url: str, product_id: str, phone_number: str,
+                 check_interval: int, product_name: str = "Loading...",
+                 monitoring_status: str = TaskStatus.PENDING.value,
+                 product_status: str = "Unknown",
+                 notification_status: str = NotificationStatus.PENDING.value,
+                 created_at: Optional[float] = None, last_checked: Optional[float] = None,
+                 next_due: float = 0.0, notification_sent: bool = False,
+                 drop_windows: Tuple[DropWindow, ...] = (),
+                 checkout_account: Optional[str] = None, cart_status: Optional[str] = None,
+                 scheduled: bool = False, qos: str = QoSClass.NORMAL.value,
+                 kind: str = TaskKind.PRODUCT.value, variants: str = "",
+                 stock: Tuple[bool, ...] = ()):
+        self.task_id = task_id
+        self.url = url
+        self.product_id = product_id
+        self.phone_number = phone_number
+        self.check_interval = check_interval
+        self.product_name = product_name
+        self.monitoring_status = monitoring_status
+        self.product_status = product_status
+        self.notification_status = notification_status
+        self.created_at = created_at if created_at is not None else time.time()
+        self.last_checked = last_checked
+        self.next_due = next_due
+        self.notification_sent = notification_sent
+        self.drop_windows = tuple(drop_windows)
+        self.checkout_account = checkout_account
+        self.cart_status = cart_status
+        self.scheduled = scheduled  # Checked by the MonitorScheduler pool instead of its own worker
+        self.qos = qos
+        self.kind = kind
+        self.variants = variants  # SKU selectors ("Red/XL; sku: <id>"); empty watches every variant
+        self.stock = tuple(stock)  # In stock per watched SKU (shop tasks: per listed product), last check
+
+    def replace(self, **changes) -> 'TaskRecord':
+        """Return a copy of the record with the given fields changed"""
+        record = TaskRecord.__new__(TaskRecord)
+        for field in self.__slots__:
+            setattr(record, field, changes.pop(field, getattr(self, field)))
+        if changes:
+            raise AttributeError(f"Unknown task fields: {', '.join(changes)}")
+        return record
+
+    def to_dict(self) -> dict:
+        """Convert the record to a plain dictionary"""
+        data = {field: getattr(self, field) for field in self.__slots__}
+        data['created_at'] = datetime.fromtimestamp(self.created_at).isoformat()
+        if self.last_checked is not None:
+            data['last_checked'] = datetime.fromtimestamp(self.last_checked).isoformat()
+        data['drop_windows'] = [window.to_dict() for window in self.drop_windows]
+        data['stock'] = list(self.stock)
+        return data
+
+    def __repr__(self):
+        return f"TaskRecord(task_id={self.task_id!r}, url={self.url!r}, status={self.monitoring_status!r})"
+
+class TaskEvent:
+    """Change notification published by the TaskManager"""
+    __slots__ = ('type', 'task_id', 'record', 'previous', 'changed')
+
+    def __init__(self, type: TaskEventType, task_id: str, record: Optional[TaskRecord],
+                 previous: Optional[TaskRecord] = None, changed: Tuple[str, ...] = ()):
+        self.type = type
+        self.task_id = task_id
+        self.record = record
+        self.previous = previous
+        self.changed = changed
 
 class TaskManager:
     _instance = None
@@ -25,75 +150,247 @@ class TaskManager:
         return cls._instance
 
     def initialize(self):
-        self.tasks: Dict[str, dict] = {}
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        # Primary store: task_id -> TaskRecord. Readers access it without the lock,
+        # writers swap in new records under the lock.
+        self.tasks: Dict[str, TaskRecord] = {}
         self.url_to_task: Dict[str, str] = {}
+        self._by_product: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._listeners: Tuple[Callable[[TaskEvent], None], ...] = ()
+        # Events are queued under the lock in the order the changes were made and
+        # delivered after it is released, by one thread at a time
+        self._outbox: deque = deque()
+        self._delivery_lock = threading.Lock()
+        self._delivering: Optional[int] = None  # Thread currently delivering
+
+    # ----- subscriptions -----
+
+    def subscribe(self, callback: Callable[[TaskEvent], None]):
+        """Register a callback that receives every TaskEvent"""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners = self._listeners + (callback,)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[TaskEvent], None]):
+        """Remove a previously registered callback"""
+        with self._lock:
+            self._listeners = tuple(cb for cb in self._listeners if cb != callback)
+
+    def _deliver(self):
+        """Hand queued events to the listeners in the order they were queued.
+
+        A publisher waits while another thread delivers, so its own event has
+        reached every listener when its write returns. A listener that writes
+        to the TaskManager leaves its event to the delivery loop it runs in.
+        """
+        if self._delivering == threading.get_ident():
+            return
+        with self._delivery_lock:
+            self._delivering = threading.get_ident()
+            try:
+                while True:
+                    with self._lock:
+                        if not self._outbox:
+                            return
+                        event = self._outbox.popleft()
+                        listeners = self._listeners
+                    for callback in listeners:
+                        try:
+                            callback(event)
+                        except Exception as e:
+                            self.logger.error(f"Task event listener failed: {e}")
+            finally:
+                self._delivering = None
+
+    # ----- index maintenance (caller holds the lock) -----
+
+    def _index(self, record: TaskRecord):
+        self.url_to_task[canonicalize_url(record.url)] = record.task_id
+        self._by_product.setdefault(record.product_id, set()).add(record.task_id)
+        self._by_status.setdefault(record.monitoring_status, set()).add(record.task_id)
+
+    def _unindex(self, record: TaskRecord):
+        url_key = canonicalize_url(record.url)
+        if self.url_to_task.get(url_key) == record.task_id:
+            del self.url_to_task[url_key]
+        self._discard(self._by_product, record.product_id, record.task_id)
+        self._discard(self._by_status, record.monitoring_status, record.task_id)
 
-    def create_task(self, url: str, phone_number: str, check_interval: int) -> dict:
-        task = {
-            'url': url,
-            'phone_number': phone_number,
-            'check_interval': check_interval,
-            'product_name': "Loading...",
-            'monitoring_status': TaskStatus.PENDING.value,
-            'product_status': "Unknown",
-            'notification_status': NotificationStatus.PENDING.value,
-            'created_at': datetime.utcnow(),
-            'last_checked': None,
-            'notification_sent': False
-        }
-        self.tasks[url] = task
-        self.url_to_task[url] = url
-        return task
-
-    def get_task(self, url: str) -> Optional[dict]:
-        return self.tasks.get(url)
-
-    def update_task_status(self, url: str, status: TaskStatus, 
-                          product_status: Optional[str] = None,
-                          notification_status: Optional[NotificationStatus] = None):
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, task_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del index[key]
+
+    # ----- writes -----
+
+    def create_task(self, url: str, phone_number: str, check_interval: int,
+                    task_id: Optional[str] = None, **fields) -> TaskRecord:
+        record = TaskRecord(
+            task_id=task_id or uuid.uuid4().hex,
+            url=url,
+            product_id=extract_product_id(url),
+            phone_number=phone_number,
+            check_interval=check_interval,
+            **fields
+        )
+        with self._lock:
+            previous = self.tasks.get(record.task_id)
+            if previous is not None:
+                self._unindex(previous)
+            self.tasks[record.task_id] = record
+            self._index(record)
+            self._outbox.append(TaskEvent(TaskEventType.CREATED, record.task_id, record, previous))
+        self._deliver()
+        return record
+
+    def create_tasks(self, specs: Iterable[dict]) -> List[TaskRecord]:
+        """Create many tasks under one lock acquisition; each spec holds create_task() arguments"""
+        records = []
+        with self._lock:
+            for spec in specs:
+                spec = dict(spec)
+                url = spec.pop('url')
+                record = TaskRecord(
+                    task_id=spec.pop('task_id', None) or uuid.uuid4().hex,
+                    url=url,
+                    product_id=extract_product_id(url),
+                    phone_number=spec.pop('phone_number'),
+                    check_interval=spec.pop('check_interval'),
+                    **spec
+                )
+                previous = self.tasks.get(record.task_id)
+                if previous is not None:
+                    self._unindex(previous)
+                self.tasks[record.task_id] = record
+                self._index(record)
+                records.append(record)
+                self._outbox.append(TaskEvent(TaskEventType.CREATED, record.task_id, record, previous))
+        self._deliver()
+        return records
+
+    def update_task(self, task_id: str, **changes) -> Optional[TaskRecord]:
+        """Apply field changes to a task and publish an UPDATED event"""
+        with self._lock:
+            previous = self.tasks.get(task_id)
+            if previous is None:
+                return None
+            changed = tuple(
+                field for field, value in changes.items()
+                if getattr(previous, field) != value
+            )
+            if not changed:
+                return previous
+            record = previous.replace(**changes)
+            if 'monitoring_status' in changed:
+                self._discard(self._by_status, previous.monitoring_status, task_id)
+                self._by_status.setdefault(record.monitoring_status, set()).add(task_id)
+            if 'url' in changed:
+                self._unindex(previous)
+                record.product_id = extract_product_id(record.url)
+                self.tasks[task_id] = record
+                self._index(record)
+            else:
+                self.tasks[task_id] = record
+            self._outbox.append(TaskEvent(TaskEventType.UPDATED, task_id, record, previous, changed))
+        self._deliver()
+        return record
+
+    def update_task_status(self, task_id: str, status: TaskStatus,
+                           product_status: Optional[str] = None,
+                           notification_status: Optional[NotificationStatus] = None):
         """Update task status"""
-        task = self.get_task(url)
-        if task:
-            task['monitoring_status'] = status.value
-            task['last_checked'] = datetime.utcnow()
-            if product_status is not None:
-                task['product_status'] = product_status
-            if notification_status is not None:
-                task['notification_status'] = notification_status.value
-
-    def update_product_name(self, url: str, product_name: str):
+        changes = {'monitoring_status': status.value, 'last_checked': time.time()}
+        if product_status is not None:
+            changes['product_status'] = product_status
+        if notification_status is not None:
+            changes['notification_status'] = notification_status.value
+        return self.update_task(task_id, **changes)
+
+    def update_product_name(self, task_id: str, product_name: str):
         """Update product name for a task"""
-        task = self.get_task(url)
-        if task:
-            task['product_name'] = product_name
+        return self.update_task(task_id, product_name=product_name)
 
-    def mark_notification_sent(self, url: str):
+    def mark_notification_sent(self, task_id: str):
         """Mark notification as sent for a task"""
-        task = self.get_task(url)
-        if task:
-            task['notification_sent'] = True
-            task['notification_status'] = NotificationStatus.SENT.value
+        return self.update_task(
+            task_id,
+            notification_sent=True,
+            notification_status=NotificationStatus.SENT.value
+        )
+
+    def mark_checked(self, task_id: str, next_due: Optional[float] = None):
+        """Record a completed check and schedule the next one"""
+        now = time.time()
+        with self._lock:
+            record = self.tasks.get(task_id)
+            if record is None:
+                return None
+            if next_due is None:
+                next_due = now + record.check_interval
+        return self.update_task(task_id, last_checked=now, next_due=next_due)
 
-    def remove_task(self, url: str):
+    def remove_task(self, task_id: str):
         """Remove a task"""
-        if url in self.url_to_task:
-            del self.tasks[url]
-            del self.url_to_task[url]
+        with self._lock:
+            record = self.tasks.pop(task_id, None)
+            if record is None:
+                return None
+            self._unindex(record)
+            self._outbox.append(TaskEvent(TaskEventType.REMOVED, task_id, None, record))
+        self._deliver()
+        return record
+
+    def clear_all_tasks(self):
+        """Clear all tasks from memory"""
+        with self._lock:
+            removed = list(self.tasks.values())
+            self.tasks.clear()
+            self.url_to_task.clear()
+            self._by_product.clear()
+            self._by_status.clear()
+            self._outbox.extend(TaskEvent(TaskEventType.REMOVED, record.task_id, None, record) for record in removed)
+        self._deliver()
 
-    def get_active_tasks(self) -> List[dict]:
+    # ----- reads -----
+
+    def get_task(self, task_id: str) -> Optional[TaskRecord]:
+        return self.tasks.get(task_id)
+
+    def get_task_by_url(self, url: str) -> Optional[TaskRecord]:
+        task_id = self.url_to_task.get(canonicalize_url(url))
+        return self.tasks.get(task_id) if task_id else None
+
+    def get_tasks_by_product(self, product_id: str) -> List[TaskRecord]:
+        with self._lock:
+            return self._resolve(self._by_product.get(product_id, ()))
+
+    def get_tasks_by_status(self, status: TaskStatus) -> List[TaskRecord]:
+        with self._lock:
+            return self._resolve(self._by_status.get(status.value, ()))
+
+    def count_by_status(self, status: TaskStatus) -> int:
+        return len(self._by_status.get(status.value, ()))
+
+    def _resolve(self, ids: Iterable[str]) -> List[TaskRecord]:
+        # Caller holds the lock
+        return [self.tasks[task_id] for task_id in ids if task_id in self.tasks]
+
+    def get_active_tasks(self) -> List[TaskRecord]:
         """Get all active tasks"""
-        return [task for task in self.tasks.values() if task['monitoring_status'] == TaskStatus.ACTIVE.value]
+        return self.get_tasks_by_status(TaskStatus.ACTIVE)
 
-    def get_all_tasks(self) -> List[dict]:
+    def get_all_tasks(self) -> List[TaskRecord]:
         """Get all tasks"""
-        return list(self.tasks.values())
-
-    def clear_all_tasks(self):
-        """Clear all tasks from memory"""
-        self.tasks.clear()
-        self.url_to_task.clear()
+        with self._lock:
+            return list(self.tasks.values())
 
     def is_url_monitored(self, url: str) -> bool:
         """Check if URL is already being monitored"""
-        task = self.get_task(url)
-        return task and task['monitoring_status'] == TaskStatus.ACTIVE.value
\ No newline at end of file
+        task = self.get_task_by_url(url)
+        return bool(task and task.monitoring_status == TaskStatus.ACTIVE.value)
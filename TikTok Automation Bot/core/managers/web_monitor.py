@@ -4,49 +4,156 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import json
 import logging
 import os
 import time
+import psutil
+import threading
+from core.managers.browser_watchdog import BrowserWatchdog, owner_argument
+from core.managers.egress_pool import proxy_server
+
+# CDP Network.setCookies only accepts these cookie fields
+COOKIE_PARAM_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+# Seeds localStorage for the page's origin before any site script runs
+LOCAL_STORAGE_SEED_SCRIPT = """
+(function (data) {
+    try {
+        var items = data[location.origin];
+        if (!items) { return; }
+        for (var key in items) {
+            if (localStorage.getItem(key) === null) { localStorage.setItem(key, items[key]); }
+        }
+    } catch (e) {}
+})(%s);
+"""
+
+# Fetches a URL from inside the page so cookies and verified state are reused
+FETCH_DOCUMENT_SCRIPT = """
+var url = arguments[0], headers = arguments[1] || {}, done = arguments[arguments.length - 1];
+fetch(url, {credentials: 'include', cache: 'no-store', headers: headers})
+    .then(function (response) {
+        return response.text().then(function (body) {
+            var responseHeaders = {};
+            response.headers.forEach(function (value, key) { responseHeaders[key] = value; });
+            done({status: response.status, url: response.url, headers: responseHeaders, body: body});
+        });
+    })
+    .catch(function (error) { done({error: String(error)}); });
+"""
+
+DEFAULT_CHROME_ARGUMENTS = (
+    "--disable-extensions",
+    "--headless",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    # Additional options for better stability
+    "--disable-web-security",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-infobars",
+)
+
+class ChromeSettings:
+    """Driver location and Chrome switches used by browsers started from now on.
+
+    Reloaded from the "driver" config section. A change does not touch
+    running browsers directly: they are flagged through the BrowserWatchdog
+    and replaced at their owner's next check, like any other recycle.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ChromeSettings, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def initialize(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.driver_path = None  # Overrides the path a WebMonitor was created with
+        self.arguments = list(DEFAULT_CHROME_ARGUMENTS)
+
+    def configure(self, path: str = None, chrome_arguments=None) -> bool:
+        """Apply a "driver" config section; returns True if browsers need replacing"""
+        if path is not None and not os.path.isdir(path):
+            raise FileNotFoundError(f"ChromeDriver directory not found at {path}")
+        with self._lock:
+            driver_path = path if path is not None else self.driver_path
+            arguments = list(chrome_arguments) if chrome_arguments is not None else self.arguments
+            changed = driver_path != self.driver_path or arguments != self.arguments
+            self.driver_path, self.arguments = driver_path, arguments
+        if changed:
+            flagged = BrowserWatchdog().request_recycle("driver settings changed")
+            self.logger.info(f"Driver settings changed; {flagged} browsers will restart at their next check")
+        return changed
+
+    def snapshot(self):
+        with self._lock:
+            return self.driver_path, list(self.arguments)
 
 class WebMonitor:
-    def __init__(self, driver_path):
+    def __init__(self, driver_path, cache_dir=None, proxy=None):
         self.logger = logging.getLogger(__name__)
         self.driver_path = driver_path
+        self.cache_dir = cache_dir
+        self.proxy = proxy
         self.driver = None
         self.url = None
+        self.last_error = None  # Most recent exception, for callers that classify failures
+        self.recycle_reason = None  # Set by the BrowserWatchdog when this session should be replaced
         self.initialize_driver()
 
     def initialize_driver(self):
         """Initialize a new WebDriver instance"""
+        chrome_service = None
         try:
-            chromedriver_path = os.path.join(self.driver_path, 'chromedriver.exe')
+            driver_path, arguments = ChromeSettings().snapshot()
+            chromedriver_path = os.path.join(driver_path or self.driver_path, 'chromedriver.exe')
             chrome_service = Service(chromedriver_path)
             options = webdriver.ChromeOptions()
-            options.add_argument("--disable-extensions")
-            options.add_argument("--headless")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
+            for argument in arguments:
+                options.add_argument(argument)
+            options.add_argument(owner_argument())
+            if self.cache_dir:
+                options.add_argument(f"--disk-cache-dir={self.cache_dir}")
+            if self.proxy:
+                # Chrome takes scheme://host:port only; credentials are not supported here
+                options.add_argument(f"--proxy-server={proxy_server(self.proxy)}")
             
-            # Additional options for better stability
-            options.add_argument("--disable-web-security")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--disable-infobars")
             options.add_experimental_option("excludeSwitches", ["enable-automation"])
             options.add_experimental_option("useAutomationExtension", False)
             
             self.driver = webdriver.Chrome(service=chrome_service, options=options)
             self.driver.set_window_size(1920, 1080)
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            self.recycle_reason = None
+            BrowserWatchdog().track(self)
             
             self.logger.info("WebDriver initialized successfully")
             return True
         except Exception as e:
+            self.last_error = e
             self.logger.error(f"Failed to initialize driver: {e}")
+            self.discard_partial_driver(chrome_service)
             return False
 
+    def discard_partial_driver(self, chrome_service):
+        """Stop whatever a failed initialize_driver() left running"""
+        driver, self.driver = self.driver, None
+        try:
+            if driver:
+                driver.quit()
+            elif chrome_service is not None and getattr(chrome_service, 'process', None):
+                chrome_service.stop()
+        except Exception as e:
+            self.logger.error(f"Error discarding half-started driver: {e}")
+
     def open_url(self, url):
         """Opens the specified URL in the browser."""
+        self.last_error = None
         try:
             if not self.driver:
                 if not self.initialize_driver():
@@ -61,6 +168,7 @@ class WebMonitor:
             return True
             
         except Exception as e:
+            self.last_error = e
             self.logger.error(f"Error opening URL: {e}")
             return False
 
@@ -73,11 +181,13 @@ class WebMonitor:
             self.logger.info("Page fully loaded")
             return True
         except Exception as e:
+            self.last_error = e
             self.logger.error(f"Page load timeout: {e}")
             return False
 
     def reload_page(self):
         """Reloads the current page."""
+        self.last_error = None
         try:
             if not self.driver:
                 self.logger.error("Driver not initialized")
@@ -95,9 +205,27 @@ class WebMonitor:
             return False
                 
         except Exception as e:
+            self.last_error = e
             self.logger.error(f"Error during page reload: {e}")
             return False
 
+    def fetch_document(self, url, headers=None, timeout=10):
+        """Fetches a document with the browser's session without navigating away."""
+        self.last_error = None
+        try:
+            if not self.driver:
+                self.logger.error("Driver not initialized")
+                return None
+            self.driver.set_script_timeout(timeout)
+            response = self.driver.execute_async_script(FETCH_DOCUMENT_SCRIPT, url, headers or {})
+            if not response or 'error' in response:
+                raise Exception(f"In-page fetch failed: {(response or {}).get('error')}")
+            return response
+        except Exception as e:
+            self.last_error = e
+            self.logger.error(f"Error fetching document: {e}")
+            return None
+
     def find_element_safe(self, by, value, timeout=10):
         """Safely finds an element by its locator."""
         try:
@@ -108,6 +236,7 @@ class WebMonitor:
             )
             return element
         except Exception as e:
+            self.last_error = e
             self.logger.error(f"Element not found: {str(e)}")
             return None
 
@@ -129,10 +258,58 @@ class WebMonitor:
             self.logger.error(f"Error getting current URL: {e}")
             return None
 
+    def restore_session(self, cookies, local_storage):
+        """Loads saved cookies and localStorage into the browser before navigation."""
+        try:
+            if not self.driver:
+                return False
+            now = time.time()
+            cookie_params = [
+                {key: cookie[key] for key in COOKIE_PARAM_FIELDS if key in cookie}
+                for cookie in cookies
+                if cookie.get('expires', -1) <= 0 or cookie['expires'] > now
+            ]
+            if cookie_params:
+                self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookie_params})
+            if local_storage:
+                self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                    'source': LOCAL_STORAGE_SEED_SCRIPT % json.dumps(local_storage)
+                })
+            self.logger.info(f"Restored session with {len(cookie_params)} cookies")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error restoring session: {e}")
+            return False
+
+    def export_session(self):
+        """Returns (cookies, {origin: localStorage items}) for the current browser."""
+        try:
+            if not self.driver:
+                return None
+            cookies = self.driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+            origin = self.driver.execute_script("return location.origin")
+            items = self.driver.execute_script("return Object.assign({}, window.localStorage)") or {}
+            return cookies, ({origin: items} if items else {})
+        except Exception as e:
+            self.logger.error(f"Error exporting session: {e}")
+            return None
+
+    def get_browser_processes(self):
+        """Returns the chromedriver process and its Chrome children."""
+        try:
+            if not self.driver or not self.driver.service.process:
+                return []
+            root = psutil.Process(self.driver.service.process.pid)
+            return [root] + root.children(recursive=True)
+        except Exception as e:
+            self.logger.error(f"Error collecting browser processes: {e}")
+            return []
+
     def cleanup(self):
         """Closes the browser and cleans up resources."""
         try:
             if self.driver:
+                BrowserWatchdog().untrack(self)
                 self.driver.quit()
                 self.driver = None
                 self.logger.info("Browser closed successfully")
@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+from typing import List, Optional
+from twilio.rest import Client
+from core.managers.notification_queue import NotificationsDisabled
+
+DEFAULT_WHATSAPP_NUMBER = "whatsapp:+14155238886"  # Twilio sandbox sender
+
+def whatsapp_address(number: str) -> str:
+    return number if number.startswith("whatsapp:") else f"whatsapp:{number}"
+
+class WhatsAppNotifier:
+    """Sends product availability alerts over WhatsApp through Twilio.
+
+    Credentials come from the "twilio" config section (account_sid,
+    auth_token, whatsapp_number) or the TWILIO_ACCOUNT_SID,
+    TWILIO_AUTH_TOKEN and TWILIO_WHATSAPP_NUMBER environment variables.
+    Without them send() raises NotificationsDisabled and callers mark the
+    task "Notifications disabled".
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.twilio_account_sid = os.environ.get('TWILIO_ACCOUNT_SID') or None
+        self.twilio_auth_token = os.environ.get('TWILIO_AUTH_TOKEN') or None
+        self.twilio_whatsapp_number = whatsapp_address(
+            os.environ.get('TWILIO_WHATSAPP_NUMBER') or DEFAULT_WHATSAPP_NUMBER
+        )
+        self.twilio_client: Optional[Client] = None
+        if self.twilio_account_sid and self.twilio_auth_token:
+            self.twilio_client = Client(self.twilio_account_sid, self.twilio_auth_token)
+
+    @property
+    def enabled(self) -> bool:
+        return self.twilio_client is not None
+
+    def configure(self, account_sid: Optional[str] = None, auth_token: Optional[str] = None,
+                  whatsapp_number: Optional[str] = None):
+        """Apply a "twilio" config section; the client is only rebuilt when the credentials change"""
+        with self._lock:
+            account_sid = account_sid or self.twilio_account_sid
+            auth_token = auth_token or self.twilio_auth_token
+            if (account_sid, auth_token) != (self.twilio_account_sid, self.twilio_auth_token):
+                self.twilio_account_sid, self.twilio_auth_token = account_sid, auth_token
+                if account_sid and auth_token:
+                    self.twilio_client = Client(account_sid, auth_token)
+                    self.logger.info("Twilio credentials reloaded")
+            if whatsapp_number:
+                self.twilio_whatsapp_number = whatsapp_address(whatsapp_number)
+
+    def send(self, phone_number: str, product_title: str, product_url: str, availability_strings: List[str]) -> bool:
+        """Send one alert; returns False (and logs) if Twilio refused it.
+        Raises NotificationsDisabled when Twilio is not configured."""
+        with self._lock:
+            client, from_number = self.twilio_client, self.twilio_whatsapp_number
+        if client is None:
+            raise NotificationsDisabled("Twilio credentials are not configured")
+        try:
+            # Prepare message content
+            variants = [line for line in availability_strings if line.endswith(": Available")]
+            message_body = (
+                f"🔔 Product Alert!\n\n"
+                f"Product Name:\n{product_title}\n\n"
+                f"Status: Available Now\n\n"
+            )
+            if variants:
+                message_body += "In Stock:\n" + "\n".join(variants) + "\n\n"
+            message_body += (
+                f"Link: {product_url}\n\n"
+                f"Click the link to buy the product."
+            )
+
+            # Format phone number
+            clean_number = ''.join(filter(str.isdigit, phone_number))
+            formatted_number = f"whatsapp:+{clean_number}"
+
+            # Send message
+            self.logger.info("Sending WhatsApp message via Twilio...")
+            message = client.messages.create(
+                from_=from_number,
+                body=message_body,
+                to=formatted_number
+            )
+
+            self.logger.info(f"Message sent successfully. SID: {message.sid}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to send WhatsApp message: {e}")
+            return False
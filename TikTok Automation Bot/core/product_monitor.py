@@ -1,88 +1,92 @@
-from selenium.webdriver.common.by import By
 import logging
+import threading
 import time
-from twilio.rest import Client
 from PyQt6.QtCore import QThread
-from urllib.parse import unquote
-import json
-from datetime import datetime
-from core.managers.persistence_manager import MonitoringTask
-from core.managers.web_monitor import WebMonitor
+from core.managers.task_manager import NotificationStatus, TaskStatus
+from core.managers.event_log import log_restock
+from core.managers.notification_queue import NotificationsDisabled
+from core.managers.check_pipeline import CheckPipeline, CheckError, CheckCancelled, ErrorKind
+from core.managers.drop_window import DropPhase, current_phase, next_check_delay
+from core.managers.profiler import CycleProfiler
+from core.managers.whatsapp_notifier import WhatsAppNotifier
+from core.managers.qos import effective_interval, profile_for
+from core.managers.sku_selector import SkuSelector
 
 class ProductMonitorWorker(QThread):
-    def __init__(self, driver_path, table_widget, persistence_manager, url, phone_number, check_interval=30):
+    def __init__(self, driver_path, table_widget, task_manager, url, phone_number, check_interval=30, task_id=None,
+                 session_store=None, egress_pool=None, drop_windows=(),
+                 checkout_executor=None, checkout_account=None, stock_history=None, notifier=None,
+                 whatsapp=None, qos="normal", notifications=None, event_log=None, variants="",
+                 load_monitor=None):
         super().__init__()
         # Initialize basic parameters
         self.driver_path = driver_path
         self.table_widget = table_widget
-        self.persistence_manager = persistence_manager
+        self.task_manager = task_manager
         self.url = url
         self.phone_number = phone_number
         self.check_interval = check_interval
+        self.qos = qos
+        self.notifications = notifications
+        self.event_log = event_log
+        self.load_monitor = load_monitor  # The scheduler's LoadMonitor; sees how late this worker's checks start
         self.keep_running = True
-        self.task_id = str(id(self))
-        self.web_monitor = None
+        self.stop_event = threading.Event()  # Wakes the worker out of its interval waits
+        self.task_id = task_id or str(id(self))
+        self.drop_windows = tuple(drop_windows)
+        self.warmed_window = None
+        self.checkout_executor = checkout_executor if checkout_account else None
+        self.checkout_account = checkout_account
+        self.cycle_profiler = None
+        sku_selector = SkuSelector.compile(variants)  # Raises ValueError on a bad selector
+        self.variants = sku_selector.spec if sku_selector else ""
+        self.pipeline = CheckPipeline(
+            driver_path=self.driver_path,
+            url=self.url,
+            notifier=notifier or self.send_notification,
+            stop_event=self.stop_event,
+            session_store=session_store,
+            egress_pool=egress_pool,
+            checkout=self.add_to_cart if self.checkout_executor else None,
+            stock_history=stock_history,
+            event_log=event_log,
+            sku_selector=sku_selector
+        )
         self.table_widget.stop_monitoring.connect(self.stop)
-        # Twilio credentials
-        self.twilio_account_sid = "AC8f4ee6c4b49b8dcdceedb4a4190dfcdd"
-        self.twilio_auth_token = "c04bd4c51fe1ee007beb3927fb4c4d75"
-        self.twilio_client = Client(self.twilio_account_sid, self.twilio_auth_token)
-        self.twilio_whatsapp_number = "whatsapp:+14155238886"
+        self.whatsapp = whatsapp or WhatsAppNotifier()
 
         # Setup logging
         self.logger = logging.getLogger(__name__)
         
-        # Initialize task state
-        self.save_task_state("Active")
-        self.table_widget.update_product_name(self.task_id, "Loading")
-        self.table_widget.update_monitoring_status(self.task_id, "Active")
-        self.table_widget.update_product_status(self.task_id, "Searching")
-        self.table_widget.update_notification_status(self.task_id, "Pending")
-
-    def save_task_state(self, status):
-        """Save current task state to persistence"""
-        task = MonitoringTask(
+        # Initialize task state; the table and persistence follow TaskManager events
+        self.task_manager.create_task(
             url=self.url,
             phone_number=self.phone_number,
-            interval=self.check_interval,
-            last_status=status,
-            last_check=datetime.now().isoformat(),
-            task_id=self.task_id
+            check_interval=self.check_interval,
+            task_id=self.task_id,
+            product_name="Loading",
+            monitoring_status=TaskStatus.ACTIVE.value,
+            product_status="Searching",
+            notification_status="Pending",
+            drop_windows=self.drop_windows,
+            checkout_account=self.checkout_account,
+            qos=self.qos,
+            variants=self.variants
         )
-        self.persistence_manager.add_task(task)
 
-    def initialize_browser_and_load_url(self):
-        """Function 1: Initialize browser and load URL"""
-        try:
-            self.web_monitor = WebMonitor(self.driver_path)
-            success = self.web_monitor.open_url(self.url)
-            if not success:
-                raise Exception("Failed to initialize browser or load URL")
-            self.logger.info("Browser initialized and URL loaded successfully")
-            return True
-        except Exception as e:
-            self.logger.error(f"Failed to initialize browser: {e}")
-            return False
+    @property
+    def cadence(self) -> float:
+        """Interval raised to the class's floor; read at every check so reloaded floors apply"""
+        return effective_interval(self.qos, self.check_interval)
 
-    def reload_page(self):
-        """Function 2: Reload the current page"""
-        try:
-            if self.web_monitor:
-                success = self.web_monitor.reload_page()
-                if success:
-                    self.logger.info("Page reloaded successfully")
-                    return True
-            return False
-        except Exception as e:
-            self.logger.error(f"Failed to reload page: {e}")
-            return False
+    def update_task(self, **changes):
+        """Publish task state changes through the TaskManager"""
+        self.task_manager.update_task(self.task_id, **changes)
 
     def close_browser(self):
-        """Function 3: Close the browser"""
+        """Close the browser"""
         try:
-            if self.web_monitor:
-                self.web_monitor.cleanup()
-                self.web_monitor = None
+            if self.pipeline.close():
                 self.logger.info("Browser closed successfully")
                 return True
             return False
@@ -91,163 +95,183 @@ class ProductMonitorWorker(QThread):
             return False
 
     def send_notification(self, product_title, product_url, availability_strings):
-        """Function 4: Send notification through Twilio"""
+        """Send the availability alert through Twilio"""
+        if self.event_log is not None:
+            # Logged here, sent by the NotificationSubscriber off the check path
+            log_restock(self.event_log, self.task_manager.get_task(self.task_id),
+                        product_title, product_url, availability_strings)
+            self.update_task(notification_status=NotificationStatus.SENDING.value)
+            return True
+        args = (self.phone_number, product_title, product_url, availability_strings)
         try:
-            # Prepare message content
-            formatted_availability = '\n'.join(availability_strings)
-            message_body = (
-                f"🔔 Product Alert!\n\n"
-                f"Product Name:\n{product_title}\n\n"
-                f"Status: Available Now\n\n"
-                f"Link: {product_url}\n\n"
-                f"Click the link to buy the product."
-            )
-            
-            # Format phone number
-            clean_number = ''.join(filter(str.isdigit, self.phone_number))
-            formatted_number = f"whatsapp:+{clean_number}"
-
-            # Send message
-            self.logger.info("Sending WhatsApp message via Twilio...")
-            message = self.twilio_client.messages.create(
-                from_=self.twilio_whatsapp_number,
-                body=message_body,
-                to=formatted_number
-            )
-            
-            self.logger.info(f"Message sent successfully. SID: {message.sid}")
-            self.table_widget.update_notification_status(self.task_id, "Sent")
+            if self.notifications is not None:
+                sent = self.notifications.submit(profile_for(self.qos).notify_priority, self.whatsapp.send, *args).result()
+            else:
+                sent = self.whatsapp.send(*args)
+        except NotificationsDisabled:
+            # Not sent; the check is retried and alerts once Twilio is configured
+            self.update_task(notification_status=NotificationStatus.DISABLED.value)
+            return False
+        if sent:
+            self.update_task(notification_status="Sent", notification_sent=True)
             return True
+        self.update_task(notification_status="Failed")
+        return False
 
-        except Exception as e:
-            self.logger.error(f"Failed to send WhatsApp message: {e}")
-            self.table_widget.update_notification_status(self.task_id, "Failed")
-            return False
+    def add_to_cart(self, result):
+        """Checkout hook run by the pipeline the moment stock is seen"""
+        return self.checkout_executor.add_to_cart(
+            self.checkout_account, result.product_url, result.skus, result.detected_at
+        )
 
-    def get_render_data(self):
-        """Function 5: Get product availability from page"""
+    def prewarm_checkout(self):
+        """Keep the checkout account's browser on the product page"""
+        if self.checkout_executor is None:
+            return
         try:
-            # Find and extract RENDER_DATA script
-            script = self.web_monitor.find_element_safe(By.XPATH, "//*[@id='RENDER_DATA']")
-            if not script:
-                self.logger.error("Render data script not found")
-                return None
-
-            # Parse script content
-            raw_data = script.get_attribute('innerHTML')
-            decoded_data = unquote(raw_data)
-            json_data = json.loads(decoded_data)
-            
-            # Get page info
-            product_title = self.web_monitor.driver.title
-            product_url = self.web_monitor.get_current_url()
-
-            # Extract product info
-            product_info = json_data['2']['initialData']['productInfo']
-            skus = product_info.get('skus', [])
-            if not isinstance(skus, list):
-                skus = [skus]
-
-            # Check availability
-            availability_strings = []
-            availability = False
-
-            for sku in skus:
-                prop_values = '-'.join(prop['prop_value'] for prop in sku.get('sku_sale_props', []))
-                stock_status = "Available" if sku.get('stock', 0) > 0 else "Unavailable"
-                availability_strings.append(f"{prop_values} : {stock_status}")
-                if sku.get('stock', 0) > 0:
-                    availability = True
-
-            return {
-                "status": "success",
-                "availability": availability,
-                "product_title": product_title,
-                "product_url": product_url,
-                "availability_strings": availability_strings
-            }
-
+            self.checkout_executor.prewarm(self.checkout_account, self.url)
         except Exception as e:
-            self.logger.error(f"Failed to get render data: {e}")
-            return None
+            self.logger.warning("Checkout pre-warm failed for %s: %s", self.checkout_account, e)
 
     def run(self):
-        """Main monitoring loop"""
+        """Main monitoring loop: one pipeline check per interval"""
         try:
-            self.logger.info('1st Main Loop : Browser Initialization')
-            # Function 1: Initialize browser and load URL
-            if not self.initialize_browser_and_load_url():
-                raise Exception("Failed to initialize browser")
-            self.logger.info('1st Main Loop : Browser Initialized')
-
-            # Start monitoring loop
+            self.prewarm_checkout()
+            due = time.time()
             while self.keep_running:
-                self.logger.info('1st Main Loop : 1st loop Getting Render Data')
-                # Function 5: Get render data
-                result = self.get_render_data()
-
-                
-                if result and result['status'] == 'success':
-                    self.table_widget.update_product_name(self.task_id, result['product_title'])
-                    
-                    if result['availability']:
-                        self.logger.info('1st Main Loop : Product Available')
-
-                        # Product is available
-                        self.table_widget.update_product_status(self.task_id, "Available")
-                        self.table_widget.update_monitoring_status(self.task_id, "Active")
-                        
-                        # Function 4: Send notification
-                        if self.send_notification(
-                            result['product_title'],
-                            result['product_url'],
-                            result['availability_strings']
-                        ):
-                            self.persistence_manager.remove_task(self.task_id)
-                            self.logger.info('1st Main Loop : Notification Sent')
-                            # Function 3: Close browser
-                            self.close_browser()
-                            self.logger.info('1st Main Loop : Browser Closed')
-                            self.keep_running = False
-                            self.logger.info('1st Main Loop : Loop ended')
-
-                        self.table_widget.update_monitoring_status(self.task_id, "Completed")
-
+                phase, window = current_phase(self.drop_windows)
+                if phase == DropPhase.WARMUP and window != self.warmed_window:
+                    self.warm_up(window)
+                self.report_lag(due)
+                try:
+                    # Inside a drop window poll the warm page instead of reloading it
+                    result = self.run_check(fast=phase == DropPhase.ACTIVE)
+                except CheckCancelled:
+                    break
+                except CheckError as e:
+                    # The check failed after its retries; keep the task alive and back off
+                    self.logger.error("Check failed at %s (%s): %s", e.stage, e.kind.value, e)
+                    blocked = e.kind in (ErrorKind.CHALLENGE_PAGE, ErrorKind.CIRCUIT_OPEN)
+                    product_status = "Blocked" if blocked else "Retrying"
+                    self.update_task(product_status=product_status)
+                    delay = max(self.cadence, self.pipeline.failure_backoff(e))
+                    if not blocked:
+                        delay = next_check_delay(self.drop_windows, delay)
+                    due = time.time() + delay
+                    self.task_manager.mark_checked(self.task_id, next_due=due)
+                    if self.stop_event.wait(delay):
                         break
-                    else:
-                        # Product unavailable
-                        self.table_widget.update_product_status(self.task_id, "Unavailable")
-                        self.logger.info('1st Main Loop : Product Unavailable')
+                    continue
 
-                        # Function 2: Reload page
-                        time.sleep(30)
+                self.update_task(product_name=result.product_title, stock=result.stock)
 
-                        self.reload_page()
-                        self.logger.info('1st Main Loop : Page Reloaded')
+                if result.availability:
+                    self.logger.info("Product available: %s", result.product_title)
+                    self.update_task(product_status="Available", monitoring_status="Active")
+                    if result.checkout is not None:
+                        self.report_checkout(result.checkout)
+                    if result.notified:
+                        self.close_browser()
+                        self.keep_running = False
+                        self.update_task(monitoring_status="Completed")
+                        break
+                else:
+                    self.update_task(product_status="Unavailable")
 
                 # Wait for next check
-                time.sleep(self.check_interval)
-                self.logger.info(f'1st Main Loop : Waited for Interval {self.check_interval}')
-
+                delay = next_check_delay(self.drop_windows, self.cadence)
+                due = time.time() + delay
+                self.task_manager.mark_checked(self.task_id, next_due=due)
+                if self.stop_event.wait(delay):
+                    break
 
         except Exception as e:
+            if self.stop_event.is_set():
+                # Browser was torn down underneath us during shutdown
+                self.logger.info("Monitoring interrupted by shutdown: %s", e)
+                return
             self.logger.error(f"Error in monitoring: {e}")
-            self.table_widget.update_monitoring_status(self.task_id, "Error")
-            self.table_widget.update_product_status(self.task_id, "Error")
-            self.table_widget.update_notification_status(self.task_id, "Failed")
-            self.stop()
+            self.update_task(
+                monitoring_status="Error",
+                product_status="Error",
+                notification_status="Failed"
+            )
+            self.keep_running = False
         finally:
-            if self.web_monitor:
-                self.close_browser()
-            # if self.keep_running:
-            #     self.stop(emit_signals=True)
+            self.close_browser()
+
+    def report_lag(self, due: float):
+        """Report how late this check starts to the shared LoadMonitor"""
+        if self.load_monitor is not None:
+            self.load_monitor.record(time.time() - due)
+
+    def run_check(self, fast=False):
+        """One pipeline check, under the cycle profiler while one is attached"""
+        profiler = self.cycle_profiler
+        if profiler is None:
+            return self.pipeline.run_check(fast=fast)
+        try:
+            return profiler.run(self.pipeline.run_check, 'fast' if fast else 'selenium', fast=fast)
+        finally:
+            if profiler.finished:
+                self.cycle_profiler = None
+                try:
+                    paths = profiler.save()
+                    self.logger.info("Profiled %s cycles of %s: %s", profiler.completed, self.task_id, ', '.join(paths))
+                except Exception as e:
+                    self.logger.error("Could not save the profile of %s: %s", self.task_id, e)
+
+    def profile_cycles(self, cycles=5, out_dir="profiles"):
+        """Profile the next cycles check cycles of this task"""
+        self.cycle_profiler = CycleProfiler(self.task_id, cycles, out_dir)
 
-    def stop(self, task_id):
+    def report_checkout(self, checkout):
+        """Publish the add-to-cart outcome and its detection-to-cart latency"""
+        if checkout.success:
+            cart_status = f"Added {checkout.sku_label or ''} in {checkout.latency:.2f}s".replace('  ', ' ')
+            self.update_task(product_status="In Cart", cart_status=cart_status)
+        else:
+            cart_status = f"Failed: {checkout.error}"
+            self.update_task(cart_status=cart_status)
+        self.logger.info("Checkout for %s: %s", self.checkout_account, cart_status)
+
+    def warm_up(self, window):
+        """Pre-warm the session once per drop window so the first in-window check is fast"""
+        self.warmed_window = window
+        self.logger.info("Pre-warming session for drop at %s", time.ctime(window.start))
+        try:
+            self.pipeline.prewarm()
+        except CheckError as e:
+            # Still early enough to recover; the regular checks keep trying
+            self.logger.warning("Pre-warm failed (%s): %s", e.kind.value, e)
+        self.prewarm_checkout()
+
+    def stop(self, task_id=None):
         """Handle manual stopping"""
-        self.table_widget.update_product_name(self.task_id, 'Unknown')
-        # self.table_widget.update_product_status(self.task_id, "Unknown")
-        # self.table_widget.update_monitoring_status(task_id, "Stopped")
-        # self.table_widget.update_notification_status(task_id, "Cancelled")
+        # stop_monitoring is broadcast to every worker; only react to our own task
+        if task_id is not None and task_id != self.task_id:
+            return
         self.keep_running = False
-        self.persistence_manager.remove_task(task_id)
-        self.close_browser()
\ No newline at end of file
+        self.stop_event.set()
+        self.update_task(
+            product_name='Unknown',
+            monitoring_status="Stopped",
+            product_status="Unknown",
+            notification_status="Cancelled"
+        )
+        self.close_browser()
+
+    def request_shutdown(self):
+        """Signal the worker to exit without changing the task's persisted state"""
+        self.keep_running = False
+        self.stop_event.set()
+
+    def task_ids(self):
+        return [self.task_id]
+
+    def browser_closers(self):
+        return [self.close_browser]
+
+    def browser_processes(self):
+        """Return the chromedriver/Chrome processes owned by this worker"""
+        return self.pipeline.browser_processes()
\ No newline at end of file
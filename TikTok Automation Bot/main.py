@@ -1,42 +1,119 @@
 import sys
+import argparse
 import logging
 import os
+import signal
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from ui.main_window import MainWindow
 from ui.components.table_widget import TableWidget
+from core.managers.config_manager import ConfigManager
+from core.managers.status_board import DEFAULT_NAME as STATUS_BOARD_NAME, StatusBoard
+from core.managers.log_pipeline import setup_logging as setup_log_pipeline
+from core.managers.profiler import install_signal_handlers
 
 def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    setup_log_pipeline()
     return logging.getLogger(__name__)
 
-def initialize_driver_path():
-    """Get the ChromeDriver path."""
-    driver_path = r"C:\Users\msbal\.wdm\drivers\chromedriver\win64\131.0.6778.86\chromedriver-win32"
+DEFAULT_DRIVER_PATH = r"C:\Users\msbal\.wdm\drivers\chromedriver\win64\131.0.6778.86\chromedriver-win32"
+
+def initialize_driver_path(config=None):
+    """Get the ChromeDriver path ("driver.path" in the config file, else the default)."""
+    driver_path = config.get('driver', 'path', DEFAULT_DRIVER_PATH) if config else DEFAULT_DRIVER_PATH
     if not os.path.isdir(driver_path):
         logging.error(f"ChromeDriver directory not found at {driver_path}")
         raise FileNotFoundError(f"ChromeDriver directory not found at {driver_path}")
     return driver_path
 
+def parse_args():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--profile-process', type=float, metavar='SECONDS',
+                        help="Sample the whole process for SECONDS after start-up")
+    parser.add_argument('--profile-tasks', type=int, metavar='CYCLES',
+                        help="Profile the first CYCLES checks of every restored task")
+    parser.add_argument('--headless', action='store_true',
+                        help="Run without a window; control the monitor through the local API")
+    parser.add_argument('--api-host', default="127.0.0.1")
+    parser.add_argument('--api-port', type=int, default=8765)
+    parser.add_argument('--api-token', help="Require 'Authorization: Bearer <token>' on API requests")
+    parser.add_argument('--no-api', action='store_true', help="Do not start the local control API")
+    parser.add_argument('--webhook', action='append', default=[], metavar='URL',
+                        help="POST every restock/change event to URL (repeatable)")
+    parser.add_argument('--config', default="config.json", metavar='PATH',
+                        help="Settings file; edits are applied while running")
+    parser.add_argument('--status-board', default=STATUS_BOARD_NAME, metavar='NAME',
+                        help="Shared-memory status board the window reads every engine process from")
+    parser.add_argument('--status-lane', type=int, default=0, metavar='N',
+                        help="0: create the board and show all lanes; N>0: engine process publishing to lane N, "
+                             "with its own state files (monitoring_state.laneN.json, events.laneN/)")
+    parser.add_argument('--no-status-board', action='store_true')
+    args, qt_args = parser.parse_known_args()
+    return args, [sys.argv[0]] + qt_args
+
 def main():
     logger = setup_logging()
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args()
+    if args.headless:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication(qt_args)
 
     try:
-        # Get driver path
-        driver_path = initialize_driver_path()
+        # Get settings and driver path
+        config = ConfigManager(args.config)
+        driver_path = initialize_driver_path(config)
         logger.info(f"ChromeDriver path: {driver_path}")
 
         # Initialize components
         table_widget = TableWidget()
+        status_board = None
+        if not args.no_status_board:
+            try:
+                if args.status_lane == 0:
+                    status_board = StatusBoard.create(args.status_board)
+                else:
+                    status_board = StatusBoard.attach(args.status_board)
+                status_board.lane(args.status_lane)  # Rejects a lane the board does not have
+            except (OSError, ValueError) as e:
+                logger.warning(f"Status board {args.status_board} unavailable: {e}")
+                if status_board is not None:
+                    status_board.close()
+                status_board = None
         
         # Create main window with driver path
-        main_window = MainWindow(driver_path=driver_path, table_widget=table_widget)
-        main_window.show()
+        main_window = MainWindow(driver_path=driver_path, table_widget=table_widget, config=config,
+                                 status_board=status_board, status_lane=args.status_lane)
+        for url in args.webhook:
+            main_window.add_webhook(url)
+        if not args.no_api:
+            main_window.control_api.host = args.api_host
+            main_window.control_api.token = args.api_token
+            main_window.control_api.start(args.api_port)
+        if args.headless:
+            def shutdown(signum, frame):
+                # No window to close: same cleanup as a confirmed window close
+                try:
+                    main_window.shutdown()
+                except Exception as e:
+                    logger.error(f"Error during shutdown: {e}")
+                app.quit()
+            signal.signal(signal.SIGINT, shutdown)
+            signal.signal(signal.SIGTERM, shutdown)
+        else:
+            main_window.show()
+
+        # Profiling triggers for unattended runs (CLI flags and SIGUSR1/SIGUSR2)
+        if args.profile_process:
+            main_window.sampling_profiler.start(duration=args.profile_process)
+        if args.profile_tasks:
+            main_window.profile_tasks(args.profile_tasks)
+        if install_signal_handlers(main_window.sampling_profiler, main_window.profile_tasks) or args.headless:
+            # Python signal handlers only run when the interpreter gets control
+            signal_timer = QTimer()
+            signal_timer.timeout.connect(lambda: None)
+            signal_timer.start(500)
         
         sys.exit(app.exec())
 
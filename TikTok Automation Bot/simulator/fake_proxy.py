@@ -0,0 +1,74 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from simulator.fake_shop import CHALLENGE_PAGE
+
+class FakeProxy:
+    """Local stand-in for an egress proxy.
+
+    Relays absolute-URI GET requests (the form clients send to an HTTP
+    proxy) after an added delay. A share of requests, challenge_rate, gets
+    the verification page instead, the way a flagged exit IP would.
+    """
+
+    def __init__(self, latency=0.0, challenge_rate=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.challenge_rate = challenge_rate
+        self.requests = 0
+        self.challenges = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        # Upstream requests go direct, whatever the environment's proxy settings are
+        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with proxy._lock:
+                    proxy.requests += 1
+                time.sleep(proxy.latency)
+                if random.random() < proxy.challenge_rate:
+                    with proxy._lock:
+                        proxy.challenges += 1
+                    self.respond(200, CHALLENGE_PAGE.encode('utf-8'))
+                    return
+                try:
+                    with proxy._opener.open(self.path, timeout=10) as upstream:
+                        self.respond(upstream.status, upstream.read())
+                except urllib.error.HTTPError as e:
+                    self.respond(e.code, e.read())
+                except OSError:
+                    self.respond(502, b"Bad gateway")
+
+            def respond(self, status, payload: bytes):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-proxy", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
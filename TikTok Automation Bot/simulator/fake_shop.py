@@ -0,0 +1,270 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import quote, urlsplit
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+PRODUCT_ID_BASE = 1729000000000000000
+PRODUCT_PATH = re.compile(r'^/view/product/(\d+)')
+SHOP_PATH = re.compile(r'^/shop/(\d+)')
+CART_PATH = '/cart'
+CART_ADD_PATH = '/cart/add'
+
+CHALLENGE_PAGE = (
+    "<html><head><title>Security Check</title></head>"
+    "<body><div id='captcha-verify-image'>Verify you are human</div></body></html>"
+)
+
+# Variant buttons and the add-to-cart button post to /cart/add; the toast matches CheckoutSelectors
+CART_SCRIPT = (
+    "<script>"
+    "var selectedSku = null;"
+    "function pickSku(el) { selectedSku = el.getAttribute('data-sku'); }"
+    "function addToCart(el) {"
+    " fetch('/cart/add', {method: 'POST', headers: {'Content-Type': 'application/json'},"
+    "  body: JSON.stringify({product_id: el.getAttribute('data-product'), sku_id: selectedSku})})"
+    " .then(function (response) {"
+    "  var toast = document.createElement('div');"
+    "  if (response.ok) { toast.setAttribute('data-e2e', 'cart-toast'); toast.textContent = 'Added to cart'; }"
+    "  else { toast.textContent = 'Sold out'; }"
+    "  document.body.appendChild(toast); });"
+    "}"
+    "</script>"
+)
+
+class FakeShop:
+    """Local stand-in for TikTok Shop product pages.
+
+    Serves /view/product/<id> pages carrying a RENDER_DATA payload in the
+    layout the pipeline parses. Each product flips in and out of stock on a
+    fixed schedule: it first restocks first_restock seconds after start
+    (staggered across products by up to stagger seconds), stays in stock for
+    in_stock_for seconds, and repeats every period seconds.
+
+    /shop/<n> serves a listing page for products n*shop_size up to
+    (n+1)*shop_size, with each product's stock in its RENDER_DATA.
+
+    Product pages carry variant buttons and an "Add to cart" button in the
+    markup CheckoutSelectors expects. POST /cart/add accepts a SKU only while
+    it is in stock, and GET /cart lists what was added.
+    """
+
+    def __init__(self, products=100, skus=3, page_kb=200, latency=0.2, jitter=0.1,
+                 first_restock=60.0, stagger=60.0, period=600.0, in_stock_for=120.0,
+                 challenge_rate=0.0, host="127.0.0.1", port=0, shop_size=50):
+        self.products = products
+        self.shop_size = shop_size
+        self.skus = skus
+        self.page_kb = page_kb
+        self.latency = latency
+        self.jitter = jitter
+        self.first_restock = first_restock
+        self.stagger = stagger
+        self.period = period
+        self.in_stock_for = in_stock_for
+        self.challenge_rate = challenge_rate
+        self.started_at = time.time()
+        self.requests = 0
+        self.challenges = 0
+        self.cart: List[dict] = []
+        self.cart_rejected = 0
+        self._lock = threading.Lock()
+        self._padding = "<div style='display:none'>" + "x" * (page_kb * 1024) + "</div>"
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # ----- schedule -----
+
+    def product_url(self, index: int) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/view/product/{PRODUCT_ID_BASE + index}"
+
+    def shop_url(self, shop: int) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/shop/{shop}"
+
+    def cart_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{CART_PATH}"
+
+    def offset(self, index: int) -> float:
+        return self.first_restock + (index * self.stagger / max(1, self.products))
+
+    def stock_at(self, index: int, now: Optional[float] = None) -> int:
+        elapsed = (time.time() if now is None else now) - self.started_at - self.offset(index)
+        if elapsed < 0:
+            return 0
+        return 5 if elapsed % self.period < self.in_stock_for else 0
+
+    def last_restock(self, index: int, now: Optional[float] = None) -> Optional[float]:
+        """When the product last came back in stock, or None if it is out of stock"""
+        now = time.time() if now is None else now
+        if not self.stock_at(index, now):
+            return None
+        elapsed = now - self.started_at - self.offset(index)
+        return self.started_at + self.offset(index) + (elapsed // self.period) * self.period
+
+    def index_of(self, url: str) -> Optional[int]:
+        match = PRODUCT_PATH.match(urlsplit(url).path)
+        if not match:
+            return None
+        index = int(match.group(1)) - PRODUCT_ID_BASE
+        return index if 0 <= index < self.products else None
+
+    # ----- pages -----
+
+    def skus_at(self, index: int) -> List[dict]:
+        stock = self.stock_at(index)
+        return [{
+            'sku_id': f"{PRODUCT_ID_BASE + index}{sku:02d}",
+            'stock': stock if sku == 0 else 0,
+            'sku_sale_props': [{'prop_value': f"Variant {sku + 1}"}]
+        } for sku in range(self.skus)]
+
+    def render(self, index: int) -> str:
+        skus = self.skus_at(index)
+        product_id = str(PRODUCT_ID_BASE + index)
+        render_data = {'2': {'initialData': {'productInfo': {
+            'product_id': product_id,
+            'skus': skus
+        }}}}
+        options = ''.join(
+            f"<button class='sku-option' data-sku='{sku['sku_id']}' onclick='pickSku(this)'>"
+            f"{sku['sku_sale_props'][0]['prop_value']}</button>"
+            for sku in skus
+        )
+        return (
+            f"<html><head><title>Simulated product {index}</title></head><body>"
+            f"<script id=\"RENDER_DATA\" type=\"application/json\">{quote(json.dumps(render_data))}</script>"
+            f"<div class='sku-options'>{options}</div>"
+            f"<button id='add-to-cart' data-product='{product_id}' onclick='addToCart(this)'>Add to cart</button>"
+            f"{CART_SCRIPT}{self._padding}</body></html>"
+        )
+
+    def add_to_cart(self, product_id: str, sku_id: Optional[str]) -> bool:
+        """Add a SKU (the first in-stock one when sku_id is None) if it is in stock"""
+        index = self.index_of(f"/view/product/{product_id}")
+        skus = self.skus_at(index) if index is not None else []
+        sku = next((
+            sku for sku in skus
+            if (sku_id is None or sku['sku_id'] == sku_id) and sku['stock'] > 0
+        ), None)
+        with self._lock:
+            if sku is None:
+                self.cart_rejected += 1
+                return False
+            self.cart.append({'product_id': product_id, 'sku_id': sku['sku_id'], 'added_at': time.time()})
+            return True
+
+    def render_cart(self) -> str:
+        with self._lock:
+            items = list(self.cart)
+        rows = ''.join(
+            f"<li data-e2e='cart-item' data-sku='{item['sku_id']}'>Product {item['product_id']}</li>"
+            for item in items
+        )
+        return (
+            f"<html><head><title>Cart ({len(items)})</title></head><body>"
+            f"<ul id='cart'>{rows}</ul></body></html>"
+        )
+
+    def render_shop(self, shop: int) -> Optional[str]:
+        first = shop * self.shop_size
+        if shop < 0 or first >= self.products:
+            return None
+        listing = [{
+            'product_id': str(PRODUCT_ID_BASE + index),
+            'title': f"Simulated product {index}",
+            'seo_url': f"/view/product/{PRODUCT_ID_BASE + index}",
+            'stock': self.stock_at(index)
+        } for index in range(first, min(self.products, first + self.shop_size))]
+        render_data = {'2': {'initialData': {'shopInfo': {'shop_id': str(shop)}, 'productList': listing}}}
+        return (
+            f"<html><head><title>Simulated shop {shop}</title></head><body>"
+            f"<script id=\"RENDER_DATA\" type=\"application/json\">{quote(json.dumps(render_data))}</script>"
+            f"{self._padding}</body></html>"
+        )
+
+    def _handler_class(self):
+        shop = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with shop._lock:
+                    shop.requests += 1
+                if urlsplit(self.path).path == CART_PATH:
+                    self.respond(200, shop.render_cart())
+                    return
+                time.sleep(max(0.0, shop.latency + random.uniform(-shop.jitter, shop.jitter)))
+                index = shop.index_of(self.path)
+                listing = SHOP_PATH.match(urlsplit(self.path).path)
+                page = shop.render_shop(int(listing.group(1))) if listing else None
+                if index is None and page is None:
+                    self.respond(404, "<html><head><title>Not found</title></head></html>")
+                elif random.random() < shop.challenge_rate:
+                    with shop._lock:
+                        shop.challenges += 1
+                    self.respond(200, CHALLENGE_PAGE)
+                else:
+                    body = page if page is not None else shop.render(index)
+                    etag = '"' + hashlib.md5(body.encode('utf-8')).hexdigest() + '"'
+                    if self.headers.get('If-None-Match') == etag:
+                        self.respond(304, '', etag)
+                    else:
+                        self.respond(200, body, etag)
+
+            def do_POST(self):
+                if urlsplit(self.path).path != CART_ADD_PATH:
+                    self.respond(404, "<html><head><title>Not found</title></head></html>")
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                    product_id = str(body['product_id'])
+                    sku_id = body.get('sku_id')
+                except (ValueError, KeyError, TypeError):
+                    self.respond(400, json.dumps({'error': 'expected product_id'}), content_type='application/json')
+                    return
+                if shop.add_to_cart(product_id, str(sku_id) if sku_id else None):
+                    self.respond(200, json.dumps({'added': True}), content_type='application/json')
+                else:
+                    self.respond(409, json.dumps({'added': False, 'error': 'out of stock'}), content_type='application/json')
+
+            def respond(self, status, body, etag=None, content_type='text/html; charset=utf-8'):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    # ----- lifecycle -----
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-shop", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def metrics(self) -> dict:
+        return {
+            'requests': self.requests,
+            'challenges': self.challenges,
+            'cart_adds': len(self.cart),
+            'cart_rejected': self.cart_rejected
+        }
@@ -0,0 +1,195 @@
+"""Load test the monitoring engine against the local fake shop.
+
+Run from the project directory:
+
+    python -m simulator.run_load --driver-path <chromedriver dir> --tasks 500 --duration 900
+
+Tasks are added through MainWindow exactly as if typed into the form, so
+they go through the TaskManager and persistence like real ones. Everything
+the run writes (monitoring_state.json, sessions, logs) goes to a scratch
+directory.
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import psutil
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from simulator.fake_shop import FakeShop
+from core.managers.task_manager import TaskEventType
+
+BROWSER_NAMES = ('chrome', 'chromedriver')
+
+class LoadCollector:
+    """Collects check throughput and restock detection latency from TaskManager events"""
+
+    def __init__(self, shop: FakeShop):
+        self.shop = shop
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.notifications = 0
+        self.latencies: List[float] = []
+        self.detected: Dict[str, float] = {}  # task_id -> restock time already counted
+        self.started_at = time.time()
+
+    def handle_task_event(self, event):
+        if event.type != TaskEventType.UPDATED:
+            return
+        now = time.time()
+        with self._lock:
+            if 'last_checked' in event.changed:
+                self.checks += 1
+            if 'product_status' in event.changed and event.record.product_status == "Available":
+                index = self.shop.index_of(event.record.url)
+                restocked_at = self.shop.last_restock(index, now) if index is not None else None
+                if restocked_at is not None and self.detected.get(event.task_id) != restocked_at:
+                    self.detected[event.task_id] = restocked_at
+                    self.latencies.append(now - restocked_at)
+
+    def notify(self, product_title, product_url, availability_strings):
+        """Stands in for the WhatsApp notification"""
+        with self._lock:
+            self.notifications += 1
+        return True
+
+    def report(self, tasks: int) -> dict:
+        elapsed = time.time() - self.started_at
+        with self._lock:
+            latencies = sorted(self.latencies)
+            checks = self.checks
+            notifications = self.notifications
+        process = psutil.Process()
+        children = process.children(recursive=True)
+        rss = process.memory_info().rss
+        browsers = 0
+        for child in children:
+            try:
+                rss += child.memory_info().rss
+                browsers += child.name().lower().startswith(BROWSER_NAMES)
+            except psutil.Error:
+                pass
+        report = {
+            'elapsed': round(elapsed, 1),
+            'tasks': tasks,
+            'checks': checks,
+            'checks_per_second': round(checks / elapsed, 2) if elapsed else 0.0,
+            'notifications': notifications,
+            'detections': len(latencies),
+            'app_rss_mb': round(process.memory_info().rss / 2 ** 20, 1),
+            'total_rss_mb': round(rss / 2 ** 20, 1),
+            'browser_processes': browsers,
+            'shop': self.shop.metrics()
+        }
+        if latencies:
+            report['detection_latency'] = {
+                'p50': round(statistics.median(latencies), 2),
+                'p95': round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+                'max': round(latencies[-1], 2)
+            }
+        return report
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the monitor against a local fake shop")
+    parser.add_argument('--driver-path', required=True, help="ChromeDriver directory, as passed to MainWindow")
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--ramp', type=float, default=10.0, help="Tasks started per second")
+    parser.add_argument('--interval', type=int, default=30, help="Check interval per task (seconds)")
+    parser.add_argument('--duration', type=float, default=600.0, help="Run time after the last task started")
+    parser.add_argument('--report-every', type=float, default=30.0)
+    parser.add_argument('--skus', type=int, default=3)
+    parser.add_argument('--page-kb', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.2, help="Shop response latency (seconds)")
+    parser.add_argument('--first-restock', type=float, default=60.0)
+    parser.add_argument('--stagger', type=float, default=60.0)
+    parser.add_argument('--period', type=float, default=600.0)
+    parser.add_argument('--in-stock-for', type=float, default=120.0)
+    parser.add_argument('--challenge-rate', type=float, default=0.0)
+    parser.add_argument('--bulk', action='store_true',
+                        help="Add all tasks with one CSV import onto the scheduler instead of one worker each")
+    parser.add_argument('--workdir', help="Scratch directory (default: a new temp directory)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    workdir = args.workdir or tempfile.mkdtemp(prefix='tiktok-load-')
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    from core.managers.log_pipeline import setup_logging
+    from ui.main_window import MainWindow
+    from ui.components.table_widget import TableWidget
+
+    setup_logging()
+    shop = FakeShop(
+        products=args.tasks, skus=args.skus, page_kb=args.page_kb, latency=args.latency,
+        first_restock=args.first_restock, stagger=args.stagger, period=args.period,
+        in_stock_for=args.in_stock_for, challenge_rate=args.challenge_rate
+    )
+    shop.start()
+    print(f"Fake shop on {shop.product_url(0).rsplit('/view', 1)[0]}, scratch dir {workdir}")
+
+    app = QApplication([sys.argv[0]])
+    window = MainWindow(driver_path=args.driver_path, table_widget=TableWidget())
+    collector = LoadCollector(shop)
+    window.notifier = collector.notify
+    window.scheduler.notifier = collector.notify
+    window.task_manager.subscribe(collector.handle_task_event)
+
+    started = [0]
+
+    def start_next():
+        # Fill the form and press start, like a user would
+        index = started[0]
+        window.url_input.setText(shop.product_url(index))
+        window.phone_input.setText("+10000000000")
+        window.interval_input.setValue(args.interval)
+        window.start_monitoring_task()
+        started[0] += 1
+        if started[0] >= args.tasks:
+            ramp_timer.stop()
+            QTimer.singleShot(int(args.duration * 1000), finish)
+
+    def report():
+        print(json.dumps(collector.report(started[0])), flush=True)
+
+    def finish():
+        report_timer.stop()
+        final = collector.report(started[0])
+        window.stop_all_monitoring()
+        final['browser_processes_after_stop'] = collector.report(started[0])['browser_processes']
+        print(json.dumps(final, indent=2), flush=True)
+        shop.stop()
+        app.quit()
+
+    ramp_timer = QTimer()
+    if args.bulk:
+        with open('load_tasks.csv', 'w') as f:
+            f.write("url,phone,interval\n")
+            for index in range(args.tasks):
+                f.write(f"{shop.product_url(index)},+10000000000,{args.interval}\n")
+        imported = time.monotonic()
+        import_report = window.import_tasks(os.path.abspath('load_tasks.csv'))
+        print(f"Bulk import: {import_report.summary()} in {time.monotonic() - imported:.2f}s", flush=True)
+        started[0] = import_report.added
+        QTimer.singleShot(int(args.duration * 1000), finish)
+    else:
+        ramp_timer.timeout.connect(start_next)
+        ramp_timer.start(max(1, int(1000 / args.ramp)))
+    report_timer = QTimer()
+    report_timer.timeout.connect(report)
+    report_timer.start(int(args.report_every * 1000))
+    app.exec()
+
+if __name__ == "__main__":
+    main()
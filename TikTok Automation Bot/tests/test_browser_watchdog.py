@@ -0,0 +1,65 @@
+import os
+import time
+import pytest
+
+psutil = pytest.importorskip("psutil")
+
+from core.managers import browser_watchdog
+from core.managers.browser_watchdog import BrowserWatchdog, owner_argument, owner_of
+
+OWN_PID = os.getpid()
+DEAD_PID = 999991
+LIVE_PID = 999992
+
+class FakeProcess:
+    def __init__(self, pid, name, cmdline=(), ppid=1, age=600.0, parent=None):
+        self.pid = pid
+        self.info = {'pid': pid, 'ppid': ppid, 'name': name, 'cmdline': list(cmdline),
+                     'create_time': time.time() - age}
+        self._parent = parent
+
+    def name(self):
+        return self.info['name']
+
+    def parent(self):
+        return self._parent
+
+@pytest.fixture
+def watchdog():
+    watchdog = BrowserWatchdog()
+    watchdog.initialize()
+    yield watchdog
+    watchdog.initialize()
+
+def run_sweep(monkeypatch, watchdog, processes):
+    monkeypatch.setattr(browser_watchdog.psutil, 'process_iter', lambda attrs: iter(processes))
+    monkeypatch.setattr(browser_watchdog.psutil, 'pid_exists', lambda pid: pid in (OWN_PID, LIVE_PID))
+    return sorted(process.pid for process in watchdog.find_orphans())
+
+def test_owner_tag_round_trip():
+    assert owner_argument() == f"--monitor-owner={OWN_PID}"
+    assert owner_of(['chrome', '--headless', owner_argument()]) == OWN_PID
+    assert owner_of(['chrome', '--monitor-owner=abc']) is None
+    assert owner_of(None) is None
+
+def test_orphans_are_selected_by_owner_tag(monkeypatch, watchdog):
+    driver = FakeProcess(10, 'chromedriver', ppid=1)
+    processes = [
+        FakeProcess(1, 'chrome', [f'--monitor-owner={OWN_PID}'], parent=driver),  # Ours, untracked
+        FakeProcess(2, 'chrome', [f'--monitor-owner={DEAD_PID}']),                # Owner has exited
+        FakeProcess(3, 'chrome', [f'--monitor-owner={LIVE_PID}']),                # Another live monitor's
+        FakeProcess(4, 'chrome', ['--user-data-dir=/home/me']),                   # The user's own browser
+        FakeProcess(5, 'chrome', [f'--monitor-owner={OWN_PID}'], age=5.0),        # Still starting up
+        FakeProcess(6, 'chromedriver', ppid=OWN_PID),                             # Our half-started driver
+        FakeProcess(7, 'chromedriver', ppid=LIVE_PID),
+        FakeProcess(8, 'python', [f'--monitor-owner={OWN_PID}']),
+    ]
+    assert run_sweep(monkeypatch, watchdog, processes) == [1, 2, 6, 10]
+
+def test_tracked_trees_are_not_orphans(monkeypatch, watchdog):
+    monkeypatch.setattr(watchdog, 'owned_pids', lambda: {1, 6})
+    processes = [
+        FakeProcess(1, 'chrome', [f'--monitor-owner={OWN_PID}']),
+        FakeProcess(6, 'chromedriver', ppid=OWN_PID),
+    ]
+    assert run_sweep(monkeypatch, watchdog, processes) == []
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchElementException, TimeoutException, WebDriverException
+)
+from core.managers.check_pipeline import (
+    CheckError, CheckPipeline, ErrorKind, RetryPolicy, classify_error
+)
+
+URL = 'https://www.tiktok.com/view/product/1729384756012'
+
+@pytest.mark.parametrize('error, kind', [
+    (CheckError(ErrorKind.CHALLENGE_PAGE, "timed out behind a captcha"), ErrorKind.CHALLENGE_PAGE),
+    (TimeoutException("chrome not reachable while loading"), ErrorKind.TRANSIENT_NETWORK),
+    (InvalidSessionIdException("timeout"), ErrorKind.STALE_DRIVER),
+    (ConnectionRefusedError("refused"), ErrorKind.STALE_DRIVER),
+    (NoSuchElementException("timeout locating element"), ErrorKind.MISSING_RENDER_DATA),
+    (WebDriverException("unknown error: net::ERR_CONNECTION_RESET"), ErrorKind.TRANSIENT_NETWORK),
+    (WebDriverException("disconnected: not connected to DevTools"), ErrorKind.STALE_DRIVER),
+    (ValueError("bad json"), ErrorKind.UNKNOWN),
+])
+def test_exception_type_decides_before_message(error, kind):
+    assert classify_error(error) == kind
+
+def test_retry_policy_backoff_and_limits():
+    policy = RetryPolicy(max_attempts=3, base_delay=2.0, max_delay=5.0, jitter=0.0)
+    assert [policy.delay(attempt) for attempt in (1, 2, 3)] == [2.0, 4.0, 5.0]
+    assert policy.should_retry(ErrorKind.TRANSIENT_NETWORK, 2)
+    assert not policy.should_retry(ErrorKind.TRANSIENT_NETWORK, 3)
+    assert not policy.should_retry(ErrorKind.CHALLENGE_PAGE, 1)
+
+    jittered = RetryPolicy(base_delay=10.0, jitter=0.5)
+    assert all(5.0 <= jittered.delay(1) <= 10.0 for _ in range(50))
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    pipeline = CheckPipeline(None, URL, notifier=lambda *args: True, policies={
+        'fetch': RetryPolicy(max_attempts=3, base_delay=0.0, jitter=0.0)
+    })
+    monkeypatch.setattr(pipeline, 'sleep', lambda seconds: None)
+    return pipeline
+
+def failing(*errors):
+    errors = list(errors)
+
+    def stage():
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+    return stage
+
+def test_stage_retries_transient_errors(pipeline):
+    attempts = {}
+    assert pipeline.run_stage('fetch', failing(TimeoutException(), TimeoutException()), attempts) == 'ok'
+    assert attempts == {'fetch': 3}
+
+def test_stage_gives_up_with_the_classified_kind(pipeline):
+    with pytest.raises(CheckError) as raised:
+        pipeline.run_stage('fetch', failing(*[TimeoutException("slow")] * 3), {})
+    assert (raised.value.kind, raised.value.stage) == (ErrorKind.TRANSIENT_NETWORK, 'fetch')
+
+def test_stage_does_not_retry_other_kinds(pipeline):
+    attempts = {}
+    with pytest.raises(CheckError) as raised:
+        pipeline.run_stage('fetch', failing(NoSuchElementException()), attempts)
+    assert raised.value.kind == ErrorKind.MISSING_RENDER_DATA
+    assert attempts == {'fetch': 1}
+
+def test_stale_driver_is_recycled_before_the_retry(pipeline):
+    assert pipeline.run_stage('fetch', failing(InvalidSessionIdException()), {}) == 'ok'
+    assert pipeline.driver_recycles == 1
@@ -0,0 +1,52 @@
+import os
+import pytest
+
+pytest.importorskip("selenium")
+
+from core.managers.checkout_executor import CheckoutExecutor, select_in_stock_sku, xpath_literal
+from simulator.fake_shop import FakeShop
+
+# Directory holding chromedriver; the browser tests need a real Chrome
+CHROMEDRIVER_DIR = os.environ.get('CHROMEDRIVER_DIR')
+needs_browser = pytest.mark.skipif(not CHROMEDRIVER_DIR, reason="set CHROMEDRIVER_DIR to run checkout in Chrome")
+
+def test_select_in_stock_sku_takes_the_first_with_stock():
+    skus = [{'sku_id': '1', 'stock': 0}, {'sku_id': '2', 'stock': 3}, {'sku_id': '3', 'stock': 1}]
+    assert select_in_stock_sku(skus)['sku_id'] == '2'
+    assert select_in_stock_sku([{'sku_id': '1', 'stock': 0}]) is None
+
+def test_xpath_literal_quotes_any_text():
+    assert xpath_literal("Red") == "'Red'"
+    assert xpath_literal("Kid's") == '"Kid\'s"'
+    assert xpath_literal("""5' 2" fit""") == """concat('5', "'", ' 2" fit')"""
+
+@pytest.fixture
+def shop():
+    # Product 0 is in stock from the start
+    shop = FakeShop(products=2, skus=2, page_kb=1, latency=0, jitter=0, first_restock=0, stagger=0)
+    shop.start()
+    yield shop
+    shop.stop()
+
+@pytest.fixture
+def executor():
+    executor = CheckoutExecutor(CHROMEDRIVER_DIR, step_timeout=10.0)
+    yield executor
+    executor.close()
+
+@needs_browser
+def test_add_to_cart_against_the_fake_shop(shop, executor):
+    url = shop.product_url(0)
+    assert executor.prewarm('buyer', url)
+    result = executor.add_to_cart('buyer', url, shop.skus_at(0))
+    assert result.success, result.error
+    assert result.sku_label == 'Variant 1'
+    assert [item['sku_id'] for item in shop.cart] == [result.sku_id]
+    assert executor.latency_report()['count'] == 1
+
+@needs_browser
+def test_sold_out_product_is_not_added(shop, executor):
+    result = executor.add_to_cart('buyer', shop.product_url(0), [dict(sku, stock=0) for sku in shop.skus_at(0)])
+    assert not result.success
+    assert result.error == "No SKU in stock"
+    assert shop.cart == []
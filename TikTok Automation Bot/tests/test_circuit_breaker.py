@@ -0,0 +1,79 @@
+import pytest
+from core.managers.circuit_breaker import BreakerState, ChallengeDetector, CircuitBreaker, CircuitBreakerRegistry
+
+@pytest.fixture
+def registry():
+    registry = CircuitBreakerRegistry()
+    registry.initialize()
+    yield registry
+    registry.initialize()
+
+def test_opens_after_consecutive_challenges():
+    breaker = CircuitBreaker('shop.test', failure_threshold=3)
+    breaker.record_challenge()
+    breaker.record_challenge()
+    breaker.record_success()  # Resets the streak
+    breaker.record_challenge()
+    breaker.record_challenge()
+    assert breaker.state == BreakerState.CLOSED
+    breaker.record_challenge()
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() > 0
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker('shop.test', failure_threshold=1, open_timeout=0.0)
+    breaker.record_challenge()
+    assert breaker.allow_request()
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+def test_challenged_probe_reopens_with_longer_timeout():
+    breaker = CircuitBreaker('shop.test', failure_threshold=1, open_timeout=0.0, max_open_timeout=5.0)
+    breaker.record_challenge()
+    breaker.base_open_timeout = breaker.open_timeout = 2.0
+    breaker.opened_at -= 2.0
+    assert breaker.allow_request()
+    breaker.record_challenge()
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.open_timeout == 4.0
+    assert not breaker.allow_request()
+
+    breaker.opened_at -= 10.0
+    assert breaker.allow_request()
+    breaker.record_challenge()
+    assert breaker.open_timeout == 5.0  # Capped
+
+    breaker.opened_at -= 10.0
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.open_timeout == 2.0
+
+def test_released_probe_slot_is_given_to_the_next_caller():
+    breaker = CircuitBreaker('shop.test', failure_threshold=1, open_timeout=0.0)
+    breaker.record_challenge()
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+def test_detector_recognises_challenge_pages():
+    detector = ChallengeDetector()
+    assert detector.detect(title='Security Check') == "title contains 'security check'"
+    assert detector.detect(url='https://shop.test/verify?from=pdp') == "url contains '/verify'"
+    assert detector.detect(markup='<div id="captcha_container"></div>') is not None
+    assert detector.detect(title='Mug', url='https://shop.test/view/product/1', markup='<p>Mug</p>') is None
+
+def test_metrics_of_proxied_breakers_include_host_challenges(registry):
+    registry.get('Shop.test', egress='http://10.0.0.1:8080').record_challenge()
+    registry.get('shop.test')
+    registry.detector.record('shop.test', True)
+    registry.detector.record('shop.test', False)
+
+    metrics = registry.metrics()
+    assert metrics['shop.test@http://10.0.0.1:8080']['challenges'] == 1
+    assert metrics['shop.test@http://10.0.0.1:8080']['checks'] == 2
+    assert metrics['shop.test']['recent_rate'] == 0.5
+    assert metrics['shop.test']['state'] == BreakerState.CLOSED.value
@@ -0,0 +1,79 @@
+import itertools
+import json
+import os
+from core.managers.config_manager import ConfigManager
+
+TICKS = itertools.count(1)
+
+def write(path, data):
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding='utf-8')
+    # Move the stamp even when the rewrite lands in the same mtime tick
+    stamp = next(TICKS) * 10**9
+    os.utime(path, ns=(stamp, stamp))
+
+def watched(config, *sections):
+    calls = []
+    for name in sections:
+        config.watch(name, lambda section, name=name: calls.append((name, section)))
+    return calls
+
+def test_only_changed_sections_are_applied(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, {'driver': {'path': 'a'}, 'twilio': {'from': '+1'}})
+    config = ConfigManager(str(path))
+    calls = watched(config, 'driver', 'twilio', 'scheduler')
+    assert calls == [('driver', {'path': 'a'}), ('twilio', {'from': '+1'})]  # Applied on watch
+    del calls[:]
+
+    assert config.poll() == []  # File untouched
+    write(path, {'driver': {'path': 'a'}, 'twilio': {'from': '+2'}, 'scheduler': {'workers': 8}})
+    assert config.poll() == ['scheduler', 'twilio']
+    assert calls == [('scheduler', {'workers': 8}), ('twilio', {'from': '+2'})]
+
+def test_rewrite_with_same_content_applies_nothing(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, {'driver': {'path': 'a'}})
+    config = ConfigManager(str(path))
+    calls = watched(config, 'driver')
+    write(path, '{"driver":   {"path": "a"}}')
+    assert config.poll() == []
+    assert calls == [('driver', {'path': 'a'})]
+
+def test_removed_section_is_applied_empty(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, {'driver': {'path': 'a'}, 'twilio': {'from': '+1'}})
+    config = ConfigManager(str(path))
+    calls = watched(config, 'twilio')
+    write(path, {'driver': {'path': 'a'}})
+    config.poll()
+    assert calls[-1] == ('twilio', {})
+
+def test_bad_file_keeps_the_settings(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, {'driver': {'path': 'a'}})
+    config = ConfigManager(str(path))
+    calls = watched(config, 'driver')
+    write(path, '{"driver": ')
+    assert config.poll() == []
+    assert config.get('driver', 'path') == 'a'
+    assert config.metrics()['last_error']
+    assert len(calls) == 1
+
+def test_failing_callback_does_not_stop_the_others(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, {})
+    config = ConfigManager(str(path))
+    calls = []
+    config.watch('twilio', lambda section: 1 / 0)
+    config.watch('twilio', calls.append)
+    write(path, {'twilio': {'from': '+1'}})
+    config.poll()
+    assert calls == [{'from': '+1'}]
+    assert config.stats['errors'] == 1
+
+def test_callbacks_get_copies(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, {'scheduler': {'workers': 4}})
+    config = ConfigManager(str(path))
+    config.watch('scheduler', lambda section: section.update(workers=99))
+    assert config.get('scheduler', 'workers') == 4
@@ -0,0 +1,40 @@
+import json
+import urllib.error
+import urllib.request
+import pytest
+from core.managers.control_api import ControlAPI
+from core.managers.task_manager import TaskManager
+
+@pytest.fixture
+def api():
+    task_manager = TaskManager()
+    task_manager.clear_all_tasks()
+    stopped = []
+    api = ControlAPI(task_manager, scheduler=None, importer=None, stop_task=stopped.append, port=0)
+    api.stopped = stopped
+    api.start()
+    yield api
+    api.stop()
+    task_manager.clear_all_tasks()
+
+def post(api, path, body):
+    request = urllib.request.Request(
+        f"http://{api.host}:{api.port}{path}", data=json.dumps(body).encode(), method='POST',
+        headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_stop_only_known_tasks(api):
+    record = api.task_manager.create_task('https://www.tiktok.com/view/product/1729384756012', '+10000000000', 30)
+    status, payload = post(api, '/tasks/stop', {'task_ids': [record.task_id, 'missing']})
+    assert (status, payload) == (200, {'stopped': [record.task_id]})
+    assert api.stopped == [record.task_id]
+
+def test_bad_requests_are_rejected_with_400(api):
+    assert post(api, '/tasks', {'tasks': [], 'default_interval': 'often'})[0] == 400
+    assert post(api, '/tasks', ['not', 'an', 'object'])[0] == 400
+    assert post(api, '/tasks/remove', {'task_ids': []})[0] == 404
@@ -0,0 +1,78 @@
+import time
+import urllib.request
+import pytest
+from core.managers.egress_pool import EgressPool, proxy_server
+from simulator.fake_proxy import FakeProxy
+from simulator.fake_shop import FakeShop
+
+def test_proxy_server_fills_in_the_default_port():
+    assert proxy_server("10.0.0.1:3128") == "http://10.0.0.1:3128"
+    assert proxy_server("https://user:pw@proxy.local") == "https://proxy.local:443"
+    assert proxy_server("socks5://proxy.local") == "socks5://proxy.local:1080"
+    with pytest.raises(ValueError):
+        proxy_server("ftp://proxy.local")
+
+def test_unusable_proxies_are_skipped():
+    pool = EgressPool(["http://a:1", "ftp://b", "http://"])
+    assert list(pool.proxies) == ["http://a:1"]
+
+def test_assignment_is_sticky_and_balanced():
+    pool = EgressPool(["http://a:1", "http://b:2"])
+    first = pool.assign("shop:1")
+    assert pool.assign("shop:1") == first
+    assert pool.assign("shop:2") != first
+    pool.release("shop:1")
+    assert pool.proxies[first].assigned == 0
+    assert pool.assign("shop:3") == first
+
+def test_latency_is_an_ewma():
+    pool = EgressPool(["http://a:1"], alpha=0.5)
+    pool.record("http://a:1", latency=2.0)
+    pool.record("http://a:1", latency=4.0)
+    pool.record("http://a:1", challenged=True)
+    proxy = pool.proxies["http://a:1"]
+    assert proxy.latency == 3.0
+    assert proxy.challenge_rate == 0.5
+    assert proxy.score() == 3.0 * (1 + 4 * 0.5)
+
+def test_retired_proxy_hands_its_slots_over_and_comes_back():
+    pool = EgressPool(["http://a:1", "http://b:2"], alpha=0.5, min_samples=3, retire_seconds=0.2)
+    assert pool.assign("slot") == "http://a:1"
+    for _ in range(3):
+        pool.record("http://a:1", challenged=True)
+    assert pool.assign("slot") == "http://b:2"
+    assert pool.proxies["http://a:1"].retirements == 1
+    time.sleep(0.25)
+    assert pool.assign("other") == "http://a:1"
+
+@pytest.fixture
+def shop():
+    shop = FakeShop(products=4, page_kb=1, latency=0, jitter=0)
+    shop.start()
+    yield shop
+    shop.stop()
+
+@pytest.fixture
+def proxies():
+    proxies = [FakeProxy(), FakeProxy(challenge_rate=1.0)]
+    for proxy in proxies:
+        proxy.start()
+    yield proxies
+    for proxy in proxies:
+        proxy.stop()
+
+def test_slots_move_off_a_flagged_stand_in_proxy(shop, proxies):
+    good, flagged = proxies
+    pool = EgressPool([good.url, flagged.url], alpha=0.5, min_samples=3)
+    keys = [f"127.0.0.1:{slot}" for slot in range(4)]
+    for _ in range(4):
+        for slot, key in enumerate(keys):
+            proxy = pool.assign(key)
+            opener = urllib.request.build_opener(urllib.request.ProxyHandler({'http': proxy}))
+            started = time.monotonic()
+            with opener.open(shop.product_url(slot), timeout=10) as response:
+                page = response.read().decode()
+            pool.record(proxy, latency=time.monotonic() - started, challenged='captcha-verify-image' in page)
+    assert flagged.requests > 0 and good.requests > 0
+    assert not pool.proxies[flagged.url].is_healthy(time.time())
+    assert {pool.assign(key) for key in keys} == {good.url}
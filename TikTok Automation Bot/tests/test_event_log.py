@@ -0,0 +1,62 @@
+import os
+from core.managers.event_log import EventLog
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith('events.'))
+
+def test_offsets_continue_after_reopen(tmp_path):
+    log = EventLog(str(tmp_path))
+    assert [log.append('change', n=n) for n in range(3)] == [0, 1, 2]
+    log.close()
+    log = EventLog(str(tmp_path))
+    assert log.append('change', n=3) == 3
+    assert [event['n'] for event in log.read(0)] == [0, 1, 2, 3]
+
+def test_torn_tail_is_truncated_on_open(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.append('change', n=0)
+    log.append('change', n=1)
+    log.close()
+    path = os.path.join(str(tmp_path), segment_files(str(tmp_path))[0])
+    intact = os.path.getsize(path)
+    with open(path, 'ab') as f:
+        f.write(b'{"offset":2,"ty')  # A crash in the middle of a write
+    log = EventLog(str(tmp_path))
+    assert os.path.getsize(path) == intact
+    assert log.next_offset == 2
+    assert log.append('change', n=2) == 2
+    assert [event['offset'] for event in log.read(0)] == [0, 1, 2]
+
+def test_segments_roll_and_oldest_are_retired(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=200, max_segments=3)
+    for n in range(40):
+        log.append('change', n=n)
+    assert len(log.segments) == 3
+    assert len(segment_files(str(tmp_path))) == 3
+    assert log.first_offset > 0
+    # Reading from before the oldest retained event starts at the oldest one
+    events = log.read(0, limit=1000)
+    assert events[0]['offset'] == log.first_offset
+    assert [event['offset'] for event in events] == list(range(log.first_offset, 40))
+
+def test_read_crosses_segments_and_honours_limit(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=200, max_segments=100)
+    for n in range(30):
+        log.append('change', n=n)
+    assert len(log.segments) > 2
+    start = log.segments[1] - 2
+    events = log.read(start, limit=10)
+    assert [event['offset'] for event in events] == list(range(start, start + 10))
+    assert log.read(30) == []
+
+def test_empty_segment_left_by_a_crash_is_reused(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=200)
+    for n in range(10):
+        log.append('change', n=n)
+    log.close()
+    # Rolled to a new segment, then crashed before writing to it
+    open(os.path.join(str(tmp_path), f"events.{10:020d}.jsonl"), 'wb').close()
+    log = EventLog(str(tmp_path), segment_bytes=200)
+    assert log.next_offset == 10
+    assert log.append('change', n=10) == 10
+    assert [event['offset'] for event in log.read(0)] == list(range(11))
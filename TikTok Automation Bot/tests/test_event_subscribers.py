@@ -0,0 +1,91 @@
+import pytest
+from core.managers.event_log import EventLog
+from core.managers.event_subscribers import NotificationSubscriber, SubscriberOffsets
+from core.managers.notification_queue import NotificationQueue, NotificationsDisabled
+from core.managers.task_manager import TaskManager
+
+URL = 'https://www.tiktok.com/view/product/1729384756012'
+
+@pytest.fixture
+def task_manager():
+    task_manager = TaskManager()
+    task_manager.clear_all_tasks()
+    yield task_manager
+    task_manager.clear_all_tasks()
+
+def restock(log, url, task_id=None, phone='+10000000000'):
+    return log.append('restock', url=url, task_id=task_id, phone=phone, title=url, strings=['In stock'])
+
+def make_subscriber(tmp_path, log, task_manager, sent):
+    offsets = SubscriberOffsets(str(tmp_path / "offsets.json"))
+    send = lambda phone, title, url, strings: sent.append((url, phone)) or True
+    return NotificationSubscriber(log, offsets, task_manager, send=send)
+
+def test_prepare_rebuilds_alerted_tasks_after_restart(tmp_path, task_manager):
+    log = EventLog(str(tmp_path / "events"))
+    restock(log, 'a', 't1')
+    restock(log, 'b', 't1')
+    log.append('change', url='b', available=False)
+    committed = log.next_offset
+
+    sent = []
+    subscriber = make_subscriber(tmp_path, log, task_manager, sent)
+    subscriber.prepare(committed)
+    assert subscriber.alerted == {'a': {'t1': 0}}
+
+    first = restock(log, 'a', 't1')   # Still in stock since the last alert
+    restock(log, 'b', 't1')           # Sold out in between: alert again
+    assert subscriber.handle_batch(log.read(first)) == log.next_offset
+    assert sent == [('b', '+10000000000')]
+    assert subscriber.skipped == 1
+
+def test_tasks_on_the_same_url_are_alerted_separately(tmp_path, task_manager):
+    log = EventLog(str(tmp_path / "events"))
+    one = task_manager.create_task(URL, '+11111111111', 30)
+    two = task_manager.create_task(URL + '?ref=2', '+12222222222', 30)
+    sent = []
+    subscriber = make_subscriber(tmp_path, log, task_manager, sent)
+
+    first = restock(log, URL, one.task_id, one.phone_number)
+    subscriber.handle_batch(log.read(first))
+    # A task added later for the same URL is still alerted
+    second = restock(log, URL, two.task_id, two.phone_number)
+    subscriber.handle_batch(log.read(second))
+    assert sent == [(URL, '+11111111111'), (URL, '+12222222222')]
+
+    repeat = restock(log, URL, one.task_id, one.phone_number)
+    subscriber.handle_batch(log.read(repeat))
+    assert len(sent) == 2
+    assert task_manager.get_task(one.task_id).notification_status == 'Skipped'
+    assert task_manager.get_task(two.task_id).notification_status == 'Sent'
+
+def test_failed_alert_is_retried_on_the_next_restock(tmp_path, task_manager):
+    log = EventLog(str(tmp_path / "events"))
+    task = task_manager.create_task(URL, '+10000000000', 30)
+    subscriber = make_subscriber(tmp_path, log, task_manager, [])
+    subscriber.send = lambda *args: False
+    first = restock(log, URL, task.task_id)
+    subscriber.handle_batch(log.read(first))
+    assert not subscriber.is_alerted(log.read(first)[0])
+    assert task_manager.get_task(task.task_id).notification_status == 'Failed'
+
+    sent = []
+    subscriber.send = lambda phone, title, url, strings: sent.append(url) or True
+    second = restock(log, URL, task.task_id)
+    subscriber.handle_batch(log.read(second))
+    assert sent == [URL]
+
+def test_alert_without_a_sender_marks_notifications_disabled(tmp_path, task_manager):
+    log = EventLog(str(tmp_path / "events"))
+    task = task_manager.create_task(URL, '+10000000000', 30)
+    subscriber = make_subscriber(tmp_path, log, task_manager, [])
+
+    def disabled(*args):
+        raise NotificationsDisabled("Twilio credentials are not configured")
+
+    subscriber.send = disabled
+    subscriber.notifications = NotificationQueue(senders=1)
+    first = restock(log, URL, task.task_id)
+    subscriber.handle_batch(log.read(first))
+    assert task_manager.get_task(task.task_id).notification_status == 'Notifications disabled'
+    assert not subscriber.is_alerted(log.read(first)[0])  # Sent once a sender is configured
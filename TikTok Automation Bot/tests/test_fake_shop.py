@@ -0,0 +1,45 @@
+import json
+import re
+import urllib.error
+import urllib.request
+import pytest
+from simulator.fake_shop import FakeShop, PRODUCT_ID_BASE
+
+PRODUCT_ID = str(PRODUCT_ID_BASE)
+
+@pytest.fixture
+def shop():
+    # Product 0 is in stock from the start; only its first SKU has stock
+    shop = FakeShop(products=2, skus=2, page_kb=1, latency=0, jitter=0, first_restock=0, stagger=0)
+    shop.start()
+    yield shop
+    shop.stop()
+
+def post_cart(shop, body):
+    request = urllib.request.Request(
+        f"{shop.cart_url()}/add", data=json.dumps(body).encode(), method='POST',
+        headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def test_product_page_has_checkout_markup(shop):
+    with urllib.request.urlopen(shop.product_url(0)) as response:
+        page = response.read().decode()
+    buttons = re.findall(r"<button[^>]*>([^<]*)</button>", page)
+    assert buttons == ['Variant 1', 'Variant 2', 'Add to cart']
+    assert "'cart-toast'" in page and 'Added to cart' in page
+
+def test_cart_accepts_only_in_stock_skus(shop):
+    assert post_cart(shop, {'product_id': PRODUCT_ID, 'sku_id': PRODUCT_ID + '00'}) == 200
+    assert post_cart(shop, {'product_id': PRODUCT_ID, 'sku_id': PRODUCT_ID + '01'}) == 409
+    assert post_cart(shop, {'product_id': PRODUCT_ID}) == 200
+    assert post_cart(shop, {}) == 400
+    with urllib.request.urlopen(shop.cart_url()) as response:
+        cart = response.read().decode()
+    assert cart.count("data-e2e='cart-item'") == 2
+    assert shop.metrics()['cart_adds'] == 2
+    assert shop.metrics()['cart_rejected'] == 1
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from core.managers.check_pipeline import CheckResult
+from core.managers.listing_pipeline import ListingPipeline
+
+SHOP = 'https://www.tiktok.com/shop/store/demo/7000'
+
+def listing(*items):
+    return {'product_title': 'Demo shop', 'product_url': SHOP, 'product_info': {'items': list(items)}}
+
+def item(product_id, stock, in_stock):
+    return {'product_id': product_id, 'title': product_id, 'url': f'https://www.tiktok.com/view/product/{product_id}',
+            'stock': stock, 'in_stock': in_stock}
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    pipeline = ListingPipeline(None, SHOP, notifier=lambda *args: True, confirm_backoff=60.0, max_confirm_backoff=100.0)
+    pipeline.confirmed = []
+
+    def confirm(entry):
+        pipeline.confirmed.append(entry['product_id'])
+        return CheckResult(product_title=entry['title'], product_url=entry['url'],
+                           availability=False, availability_strings=[])
+
+    monkeypatch.setattr(pipeline, 'confirm', confirm)
+    return pipeline
+
+def test_listing_that_disagrees_with_the_product_page_backs_off(pipeline, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('core.managers.listing_pipeline.time.monotonic', lambda: clock[0])
+    page = listing(item('1', 5, True))
+
+    pipeline.diff(page)
+    pipeline.diff(page)
+    assert pipeline.confirmed == ['1']
+
+    clock[0] += 60
+    pipeline.diff(page)
+    clock[0] += 60
+    pipeline.diff(page)  # Backoff doubled to 120, capped at 100
+    assert pipeline.confirmed == ['1', '1']
+    clock[0] += 40
+    pipeline.diff(page)
+    assert pipeline.confirmed == ['1', '1', '1']
+
+def test_listing_change_confirms_at_once(pipeline):
+    pipeline.diff(listing(item('1', 5, True)))
+    pipeline.diff(listing(item('1', 4, True)))
+    assert pipeline.confirmed == ['1', '1']
+
+def test_out_of_stock_listing_needs_no_confirmation(pipeline):
+    result = pipeline.diff(listing(item('1', 0, False)))
+    assert pipeline.confirmed == []
+    assert result.in_stock == 0
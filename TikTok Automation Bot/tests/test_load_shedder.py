@@ -0,0 +1,59 @@
+import pytest
+from core.managers import load_shedder
+from core.managers.load_shedder import LoadMonitor, LoadState, SheddingPolicy
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(load_shedder.time, 'monotonic', clock)
+    return clock
+
+def feed(monitor, clock, lag, count=5, busy=0.0):
+    for _ in range(count):
+        clock.now += 1.1
+        monitor.record(lag, busy)
+
+def test_overload_needs_lag_and_utilisation_to_recover(clock):
+    changes = []
+    policy = SheddingPolicy(lag_threshold=10.0, recover_ratio=0.5, window=10.0, min_samples=5)
+    monitor = LoadMonitor(policy, capacity=1, on_change=changes.append)
+
+    feed(monitor, clock, lag=20.0)
+    assert monitor.state == LoadState.OVERLOADED
+
+    # Below the threshold but above threshold * recover_ratio: still overloaded
+    feed(monitor, clock, lag=7.0, count=10)
+    assert monitor.overloaded
+
+    # Lag has recovered but the threads are saturated
+    feed(monitor, clock, lag=1.0, count=10, busy=1.1)
+    assert monitor.overloaded
+
+    feed(monitor, clock, lag=1.0, count=10)
+    assert monitor.state == LoadState.NORMAL
+    assert changes == [LoadState.OVERLOADED, LoadState.NORMAL]
+
+def test_too_few_samples_never_overload(clock):
+    monitor = LoadMonitor(SheddingPolicy(lag_threshold=1.0, min_samples=5))
+    feed(monitor, clock, lag=100.0, count=4)
+    assert monitor.state == LoadState.NORMAL
+
+def test_overload_ends_when_checks_stop(clock):
+    monitor = LoadMonitor(SheddingPolicy(lag_threshold=1.0, window=10.0, min_samples=5))
+    feed(monitor, clock, lag=100.0)
+    assert monitor.overloaded
+    clock.now += 11.0
+    monitor.poll()
+    assert not monitor.overloaded
+
+def test_policy_from_dict_ignores_unknown_keys():
+    policy = SheddingPolicy.from_dict({'lag_threshold': 3.0, 'unknown': 1})
+    assert policy.lag_threshold == 3.0
+    assert SheddingPolicy.from_dict(policy.to_dict()) == policy
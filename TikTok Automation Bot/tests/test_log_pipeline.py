@@ -0,0 +1,39 @@
+import logging
+import threading
+import pytest
+from core.managers.log_pipeline import LogPipeline
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((threading.current_thread().name, record.getMessage()))
+
+@pytest.fixture
+def pipeline(tmp_path):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    pipeline = LogPipeline(log_dir=str(tmp_path))
+    yield pipeline
+    pipeline.stop()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+def test_added_handler_runs_on_the_listener_thread(pipeline):
+    capture = Capture()
+    pipeline.add_handler(capture)
+    logger = logging.getLogger("test.log_pipeline")
+    logger.info("only in the file")
+    logger.warning("restock of %s", "mug")
+    pipeline.stop()  # Drains the queue
+
+    assert [message for _, message in capture.records] == ["restock of mug"]
+    assert capture.records[0][0] != threading.current_thread().name
+    assert capture not in logging.getLogger().handlers
+    pipeline.remove_handler(capture)
+    assert capture not in pipeline.listener.handlers
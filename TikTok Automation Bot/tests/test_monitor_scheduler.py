@@ -0,0 +1,96 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("selenium")
+
+from core.managers.monitor_scheduler import MonitorScheduler
+from core.managers.qos import BY_RANK
+from core.managers.task_manager import QoSClass, TaskManager
+
+@pytest.fixture
+def task_manager():
+    task_manager = TaskManager()
+    task_manager.clear_all_tasks()
+    yield task_manager
+    task_manager.clear_all_tasks()
+
+@pytest.fixture
+def scheduler(task_manager):
+    scheduler = MonitorScheduler(None, task_manager, workers=2)
+    yield scheduler
+    scheduler.request_shutdown()
+    scheduler.wait(1000)
+
+def test_reset_after_stop_all_starts_a_running_generation(scheduler):
+    scheduler.start()
+    scheduler.request_shutdown()
+    scheduler.reset()
+    assert not scheduler.stopping
+    assert not scheduler.stop_event.is_set()
+    fresh = [thread for thread in scheduler._threads if thread.name.startswith("scheduler-1-")]
+    assert len(fresh) == 2 and all(thread.is_alive() for thread in fresh)
+
+class FakePipeline:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+        return True
+
+def add(scheduler, task_manager, task_id, qos):
+    record = task_manager.create_task(f'https://www.tiktok.com/view/product/{len(scheduler.entries) + 1}',
+                                      '+10000000000', 60, task_id=task_id, qos=qos.value)
+    scheduler.add_tasks([record])
+    return scheduler.entries[task_id]
+
+def test_critical_class_gets_a_reserved_lane():
+    scheduler = MonitorScheduler(None, TaskManager(), workers=4)
+    assert scheduler._lanes[0] == [QoSClass.CRITICAL]
+    assert all(lanes == BY_RANK for lanes in scheduler._lanes[1:])
+    # A single thread serves every class
+    assert MonitorScheduler(None, TaskManager(), workers=1)._lanes == [BY_RANK]
+
+def test_due_tasks_are_taken_by_class_then_lateness(scheduler, task_manager):
+    for task_id, qos in [('bg', QoSClass.BACKGROUND), ('n1', QoSClass.NORMAL),
+                         ('n2', QoSClass.NORMAL), ('crit', QoSClass.CRITICAL)]:
+        add(scheduler, task_manager, task_id, qos)
+    now = time.time()
+    with scheduler._cond:
+        for task_id, due in [('bg', now - 100), ('n1', now - 1), ('n2', now - 10), ('crit', now - 0.5)]:
+            scheduler._push(scheduler.entries[task_id], due)
+    taken = [scheduler._take(BY_RANK, scheduler._generation).task_id for _ in range(4)]
+    assert taken == ['crit', 'n2', 'n1', 'bg']
+
+def test_reserved_lane_leaves_other_classes_alone(scheduler, task_manager):
+    add(scheduler, task_manager, 'n1', QoSClass.NORMAL)
+    scheduler.check_now(['n1'])
+    taken = []
+    thread = threading.Thread(target=lambda: taken.append(scheduler._take([QoSClass.CRITICAL], scheduler._generation)))
+    thread.start()
+    thread.join(0.3)
+    assert thread.is_alive()  # Still waiting for critical work
+    add(scheduler, task_manager, 'crit', QoSClass.CRITICAL)
+    scheduler.check_now(['crit'])
+    thread.join(1.0)
+    assert [entry.task_id for entry in taken] == ['crit']
+
+def test_lower_classes_never_take_reserved_browsers(task_manager):
+    scheduler = MonitorScheduler(None, task_manager, workers=1, max_browsers=4)
+    assert [scheduler._browser_cap(qos) for qos in BY_RANK] == [4, 2, 1]
+    first = add(scheduler, task_manager, 'bg1', QoSClass.BACKGROUND)
+    second = add(scheduler, task_manager, 'bg2', QoSClass.BACKGROUND)
+    for entry in (first, second):
+        entry.pipeline = FakePipeline()
+        scheduler._reserve_browser(entry)
+    assert list(scheduler._open) == ['bg2']
+    assert first.pipeline.closed == 1
+
+    critical = [add(scheduler, task_manager, f'c{n}', QoSClass.CRITICAL) for n in range(4)]
+    for entry in critical:
+        entry.pipeline = FakePipeline()
+        scheduler._reserve_browser(entry)
+    # The background browser goes first once the cap is reached
+    assert list(scheduler._open) == ['c0', 'c1', 'c2', 'c3']
+    assert second.pipeline.closed == 1
@@ -0,0 +1,61 @@
+import json
+import pytest
+from core.managers.persistence_manager import MonitoringTask, PersistenceManager
+from core.managers.task_manager import TaskManager, TaskStatus
+
+URL = 'https://www.tiktok.com/view/product/'
+
+@pytest.fixture
+def task_manager():
+    task_manager = TaskManager()
+    task_manager.clear_all_tasks()
+    yield task_manager
+    task_manager.clear_all_tasks()
+
+@pytest.fixture
+def persistence(tmp_path, task_manager):
+    persistence = PersistenceManager(str(tmp_path / "state.json"), flush_interval=60)
+    persistence.bind_task_manager(task_manager)
+    yield persistence
+    task_manager.unsubscribe(persistence.handle_task_event)
+    persistence.close()
+
+def saved(persistence):
+    with open(persistence.file_path) as f:
+        return [item['task_id'] for item in json.load(f)]
+
+def test_events_are_written_together(persistence, task_manager, monkeypatch):
+    writes = []
+    write = persistence._write
+    monkeypatch.setattr(persistence, '_write', lambda: writes.append(1) or write())
+
+    for n in range(20):
+        task_manager.create_task(f'{URL}{n}', '+10000000000', 60, task_id=f't{n}')
+        task_manager.update_task_status(f't{n}', TaskStatus.ACTIVE)
+    task_manager.update_task_status('t0', TaskStatus.STOPPED)
+    assert writes == []
+
+    persistence.flush()
+    assert len(writes) == 1
+    assert saved(persistence) == [f't{n}' for n in range(1, 20)]
+    assert {task.last_status for task in persistence.load_active_tasks()} == {TaskStatus.ACTIVE.value}
+
+def test_close_writes_pending_events(tmp_path, persistence, task_manager):
+    task_manager.create_task(f'{URL}1', '+10000000000', 60, task_id='t1')
+    persistence.close()
+    assert saved(persistence) == ['t1']
+    assert [task.task_id for task in PersistenceManager(persistence.file_path).load_active_tasks()] == ['t1']
+
+def test_batch_skips_events_of_its_tasks(persistence, task_manager):
+    with persistence.batch(['t1']):
+        record = task_manager.create_task(f'{URL}1', '+10000000000', 60, task_id='t1')
+        task_manager.create_task(f'{URL}2', '+10000000000', 60, task_id='t2')
+        persistence.add_tasks([MonitoringTask.from_record(record, last_status='Imported')])
+    persistence.flush()
+    statuses = {task.task_id: task.last_status for task in persistence.load_active_tasks()}
+    assert statuses == {'t1': 'Imported', 't2': TaskStatus.PENDING.value}
+
+def test_loaded_tasks_are_copies(persistence):
+    persistence.add_task(MonitoringTask(f'{URL}1', '+10000000000', 60, 'Active', '', task_id='t1'))
+    persistence.load_active_tasks()[0].last_status = 'Changed'
+    assert persistence.load_active_tasks()[0].last_status == 'Active'
@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from core.managers import profiler
+from core.managers.profiler import CycleProfiler, SamplingProfiler
+
+def busy_check(n=2000):
+    return sum(i * i for i in range(n))
+
+def test_cycles_are_profiled_per_label_until_finished(tmp_path):
+    cycle_profiler = CycleProfiler("task/1", cycles=3, out_dir=str(tmp_path))
+    assert cycle_profiler.run(busy_check, 'selenium') == busy_check()
+    cycle_profiler.run(busy_check, 'fast', n=10)
+    assert not cycle_profiler.finished
+    with pytest.raises(ZeroDivisionError):
+        cycle_profiler.run(lambda: 1 / 0, 'fast')
+    assert cycle_profiler.finished
+    assert {label: len(durations) for label, durations in cycle_profiler.durations.items()} == {'selenium': 1, 'fast': 2}
+
+    paths = cycle_profiler.save()
+    assert sorted(path.rsplit('-', 1)[1] for path in paths) == ['fast.prof', 'selenium.prof']
+    summary = open(paths[0].replace('.prof', '.txt')).read()
+    assert summary.startswith("task: task/1\n")
+    assert (tmp_path / "task_1").is_dir()
+
+def test_cycle_runs_unprofiled_while_another_thread_profiles(tmp_path):
+    cycle_profiler = CycleProfiler("t1", cycles=1, out_dir=str(tmp_path))
+    with profiler._PROFILE_LOCK:
+        assert cycle_profiler.run(busy_check, 'fast') == busy_check()
+    assert (cycle_profiler.completed, cycle_profiler.skipped) == (0, 1)
+
+def test_sampler_writes_folded_stacks(tmp_path):
+    sampler = SamplingProfiler(interval=0.005, out_dir=str(tmp_path))
+    done = threading.Event()
+
+    def spin():
+        while not done.is_set():
+            busy_check(500)
+
+    worker = threading.Thread(target=spin, name="check-worker")
+    worker.start()
+    try:
+        assert sampler.start()
+        assert not sampler.start()  # Already running
+        time.sleep(0.2)
+        path = sampler.stop()
+    finally:
+        done.set()
+        worker.join()
+    assert sampler.samples > 0 and not sampler.running
+    lines = open(path).read().splitlines()
+    assert any(line.startswith("check-worker;") and "spin (test_profiler.py:" in line for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+def test_sampler_stops_itself_after_a_duration(tmp_path):
+    sampler = SamplingProfiler(interval=0.005, out_dir=str(tmp_path))
+    sampler.start(duration=0.05)
+    deadline = time.monotonic() + 2.0
+    while not list(tmp_path.glob("process-*.folded")) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not sampler.running
+    assert len(list(tmp_path.glob("process-*.folded"))) == 1
+    assert sampler.stop() is None  # Nothing left to stop
@@ -0,0 +1,39 @@
+import json
+from urllib.parse import quote
+import pytest
+from core.managers.render_data import parse_listing
+
+PAGE_URL = "https://www.tiktok.com/shop/store/demo/123"
+
+def encode(data) -> str:
+    return quote(json.dumps(data))
+
+def test_listing_entries_in_page_order():
+    data = {'2': {'initialData': {
+        'shopInfo': {'shop_id': '123', 'name': 'Demo'},
+        'productList': [
+            {'product_id': '1', 'title': 'Counted', 'stock': 3, 'seo_url': '/view/product/1'},
+            {'productId': 2, 'productName': 'By SKU', 'skus': [{'stock': 0}, {'stock': 2}]},
+        ],
+        'more': {'items': [
+            {'item_id': '3', 'name': 'Flagged', 'sold_out': True},
+            {'product_id': '4', 'title': 'Status', 'stock_status': 'In-Stock'},
+            {'product_id': '5', 'title': 'Silent'},
+            {'product_id': '1', 'title': 'Listed twice', 'stock': 0},
+        ]}
+    }}}
+    products = parse_listing(encode(data), PAGE_URL)
+    assert [product['product_id'] for product in products] == ['1', '2', '3', '4', '5']
+    assert [product['in_stock'] for product in products] == [True, True, False, True, None]
+    assert products[0]['url'] == "https://www.tiktok.com/view/product/1"
+    assert products[1]['url'] == "https://www.tiktok.com/view/product/2"
+    assert products[0]['title'] == 'Counted'
+    assert products[0]['stock'] == {'stock': 3}
+
+def test_shop_info_is_not_a_product():
+    data = {'shopInfo': {'shop_id': '123', 'name': 'Demo'}, 'productList': []}
+    assert parse_listing(encode(data), PAGE_URL) == []
+
+def test_undecodable_data_raises():
+    with pytest.raises(ValueError):
+        parse_listing("%7Bnot json", PAGE_URL)
@@ -0,0 +1,54 @@
+import pytest
+from core.managers.response_cache import ResponseCache
+
+URL = "https://www.tiktok.com/view/product/{}"
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache()
+    cache.initialize()  # Process-wide singleton: start every test empty
+    return cache
+
+def store(cache, n, size=100, body_hash='h'):
+    return cache.store(URL.format(n), body_hash, {'n': n}, f"title {n}", URL.format(n), size,
+                       headers={'etag': f'"{n}"'})
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.configure(max_entries=2)
+    store(cache, 1)
+    store(cache, 2)
+    assert cache.match(URL.format(1), 'h') is not None  # 1 is now the most recent
+    store(cache, 3)
+    assert cache.conditional_headers(URL.format(2)) == {}
+    assert cache.conditional_headers(URL.format(1)) == {'If-None-Match': '"1"'}
+    assert cache.metrics()['evictions'] == 1
+    assert cache.bytes == 200
+
+def test_byte_limit_and_replacement_accounting(cache):
+    cache.configure(max_bytes=250)
+    store(cache, 1, size=100)
+    store(cache, 1, size=150)  # Replaces, does not add
+    assert (len(cache.entries), cache.bytes) == (1, 150)
+    store(cache, 2, size=100)
+    store(cache, 3, size=100)
+    assert list(cache.entries) == [URL.format(2), URL.format(3)]
+    assert cache.bytes == 200
+    cache.invalidate(URL.format(2))
+    assert cache.bytes == 100
+
+def test_hit_and_miss_statistics(cache):
+    store(cache, 1, body_hash='a')
+    assert cache.match(URL.format(1), 'a').product_info == {'n': 1}
+    assert cache.match(URL.format(1), 'b') is None
+    assert cache.not_modified(URL.format(1)).title == 'title 1'
+    assert cache.not_modified(URL.format(2)) is None
+    metrics = cache.metrics()
+    assert (metrics['hash_hits'], metrics['not_modified'], metrics['misses']) == (1, 1, 2)
+    assert metrics['hit_rate'] == 0.5
+
+def test_page_load_keeps_the_validators(cache):
+    cache.store(URL.format(1), 'a', {}, 't', URL.format(1), 10, headers={'etag': '"1"', 'last-modified': 'Mon'})
+    cache.store(URL.format(1), 'b', {'changed': True}, 't', URL.format(1), 10)  # Slow path: no headers
+    assert cache.conditional_headers(URL.format(1)) == {'If-None-Match': '"1"', 'If-Modified-Since': 'Mon'}
+    cache.store(URL.format(1), 'c', {}, 't', URL.format(1), 10, headers={})  # Response without validators
+    assert cache.conditional_headers(URL.format(1)) == {}
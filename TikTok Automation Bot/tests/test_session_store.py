@@ -0,0 +1,59 @@
+import os
+import pytest
+from core.managers.session_store import SessionState, SessionStore
+
+HOST = "www.tiktok.com"
+ACCOUNT = "account:buyer"
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path), ttl=60)
+
+def age(store, key, seconds):
+    store._states[key].saved_at -= seconds
+
+def test_saved_session_is_restored_from_disk(store, tmp_path):
+    cookies = [{'name': 'sid', 'value': '1'}]
+    assert store.save(HOST, cookies, {'https://www.tiktok.com': {'k': 'v'}})
+    state = SessionStore(str(tmp_path)).load(HOST)
+    assert state.cookies == cookies
+    assert state.local_storage == {'https://www.tiktok.com': {'k': 'v'}}
+
+def test_host_session_expires_and_is_deleted(store):
+    store.save(HOST, [], {})
+    age(store, HOST, 61)
+    assert store.load(HOST) is None
+    assert not os.path.exists(store._state_path(HOST))
+
+def test_account_session_outlives_the_host_ttl(store):
+    store.save(ACCOUNT, [{'name': 'login', 'value': '1'}], {})
+    age(store, ACCOUNT, 7 * 24 * 3600)
+    assert store.load(ACCOUNT).cookies == [{'name': 'login', 'value': '1'}]
+    assert os.path.exists(store._state_path(ACCOUNT))
+
+def test_account_ttl_applies_when_set(tmp_path):
+    store = SessionStore(str(tmp_path), ttl=60, account_ttl=3600)
+    store.save(ACCOUNT, [], {})
+    age(store, ACCOUNT, 600)
+    assert store.load(ACCOUNT) is not None
+    age(store, ACCOUNT, 3600)
+    assert store.load(ACCOUNT) is None
+
+def test_invalidate_forgets_session_and_cache(store):
+    store.save(HOST, [], {})
+    cache = store.cache_dir(HOST, 0)
+    store.invalidate(HOST, clear_cache=True)
+    assert store.load(HOST) is None
+    assert not os.path.exists(cache)
+
+def test_slots_reuse_the_lowest_free_number(store):
+    assert [store.acquire_slot(HOST) for _ in range(3)] == [0, 1, 2]
+    store.release_slot(HOST, 1)
+    assert store.acquire_slot(HOST) == 1
+    assert store.acquire_slot("other.host") == 0
+
+def test_live_cookies_drop_expired_ones():
+    state = SessionState(HOST, cookies=[
+        {'name': 'session'}, {'name': 'old', 'expires': 100}, {'name': 'new', 'expires': 300}, {'name': 'neg', 'expires': -1}
+    ])
+    assert [cookie['name'] for cookie in state.live_cookies(now=200)] == ['session', 'new', 'neg']
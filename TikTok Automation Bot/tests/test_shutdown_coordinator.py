@@ -0,0 +1,92 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("psutil")
+
+from core.managers.persistence_manager import PersistenceManager
+from core.managers.shutdown_coordinator import ShutdownCoordinator
+from core.managers.task_manager import TaskManager, TaskStatus
+
+URL = 'https://www.tiktok.com/view/product/'
+
+class FakeWorker:
+    """Shutdown surface of a worker or scheduler whose browsers take `close_time` to close"""
+
+    def __init__(self, task_ids, close_time=0.0):
+        self._task_ids = list(task_ids)
+        self.close_time = close_time
+        self.closed = []
+        self.stop_event = threading.Event()
+
+    def task_ids(self):
+        return list(self._task_ids)
+
+    def browser_processes(self):
+        return []
+
+    def request_shutdown(self):
+        self.stop_event.set()
+
+    def browser_closers(self):
+        return [lambda task_id=task_id: self.close(task_id) for task_id in self._task_ids]
+
+    def close(self, task_id):
+        time.sleep(self.close_time)
+        self.closed.append(task_id)
+        return True
+
+    def wait(self, ms):
+        return self.stop_event.is_set()
+
+@pytest.fixture
+def task_manager():
+    task_manager = TaskManager()
+    task_manager.clear_all_tasks()
+    yield task_manager
+    task_manager.clear_all_tasks()
+
+@pytest.fixture
+def persistence(tmp_path, task_manager):
+    persistence = PersistenceManager(str(tmp_path / "state.json"))
+    persistence.bind_task_manager(task_manager)
+    yield persistence
+    task_manager.unsubscribe(persistence.handle_task_event)
+    persistence.close()
+
+def add_tasks(task_manager, count):
+    for n in range(count):
+        task_manager.create_task(f'{URL}{n}', '+10000000000', 60, task_id=f't{n}')
+        task_manager.update_task_status(f't{n}', TaskStatus.ACTIVE)
+
+def test_browsers_of_one_scheduler_close_in_parallel(task_manager, persistence):
+    add_tasks(task_manager, 8)
+    scheduler = FakeWorker([f't{n}' for n in range(8)], close_time=0.3)
+    report = ShutdownCoordinator(task_manager, persistence, timeout=5.0).shutdown([scheduler])
+    assert report['browsers_closed'] == 8
+    assert sorted(scheduler.closed) == [f't{n}' for n in range(8)]
+    assert report['elapsed'] < 1.5
+    assert report['threads_unfinished'] == 0
+
+def test_exit_keeps_tasks_active(task_manager, persistence):
+    add_tasks(task_manager, 3)
+    ShutdownCoordinator(task_manager, persistence).shutdown([FakeWorker(['t0', 't1']), FakeWorker(['t2'])])
+    # Late status changes of the stopped tasks do not reach the file
+    task_manager.update_task_status('t0', TaskStatus.STOPPED)
+    persistence.flush()
+    tasks = PersistenceManager(persistence.file_path).load_active_tasks()
+    assert sorted(task.task_id for task in tasks) == ['t0', 't1', 't2']
+    assert {task.last_status for task in tasks} == {TaskStatus.ACTIVE.value}
+
+def test_stop_all_marks_stopped_and_drops_them(task_manager, persistence):
+    add_tasks(task_manager, 3)
+    ShutdownCoordinator(task_manager, persistence).shutdown([FakeWorker(['t0', 't1'])], mark_stopped=True)
+    assert task_manager.get_task('t0').monitoring_status == TaskStatus.STOPPED.value
+    assert [task.task_id for task in persistence.load_active_tasks()] == ['t2']
+
+def test_slow_close_gives_up_at_the_deadline(task_manager, persistence):
+    add_tasks(task_manager, 1)
+    started = time.monotonic()
+    report = ShutdownCoordinator(task_manager, persistence, timeout=0.5).shutdown([FakeWorker(['t0'], close_time=2.0)])
+    assert report['browsers_closed'] == 0
+    assert time.monotonic() - started < 1.5
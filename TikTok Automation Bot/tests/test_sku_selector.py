@@ -0,0 +1,52 @@
+import pytest
+from core.managers.sku_selector import SkuSelector
+
+def sku(sku_id, *values):
+    return {'sku_id': sku_id, 'sku_sale_props': [{'prop_value': value} for value in values]}
+
+SKUS = [
+    sku('1000001', 'Red', 'M'),
+    sku('1000002', 'Red', 'XL'),
+    sku('1000003', 'Blue', 'XL'),
+]
+
+def test_compile_canonicalises_the_spec():
+    selector = SkuSelector.compile(" red / xl ;sku: 1000003; ")
+    assert selector.spec == "red/xl; sku: 1000003"
+    assert selector.terms[1].sku_id == '1000003'
+
+def test_nothing_selected_compiles_to_none():
+    assert SkuSelector.compile(None) is None
+    assert SkuSelector.compile(" ; ") is None
+
+def test_empty_variant_raises():
+    with pytest.raises(ValueError):
+        SkuSelector.compile("Red; /")
+
+def test_values_match_case_and_space_insensitively():
+    selected, unmatched = SkuSelector.compile("  RED  ").select(SKUS)
+    assert [item['sku_id'] for item in selected] == ['1000001', '1000002']
+    assert unmatched == []
+
+def test_exact_selectors_stop_at_their_first_match():
+    selected, unmatched = SkuSelector.compile("Red/XL; 1000001").select(SKUS + ['not a sku', sku('1000002', 'Red', 'XL')])
+    assert [item['sku_id'] for item in selected] == ['1000001', '1000002']
+    assert unmatched == []
+
+def test_unmatched_selectors_are_reported():
+    selected, unmatched = SkuSelector.compile("Green; 1000003").select(SKUS)
+    assert [item['sku_id'] for item in selected] == ['1000003']
+    assert unmatched == ['Green']
+
+def test_bare_number_also_matches_a_numeric_value():
+    skus = [sku('1000001', 'Model 2024'), sku('1000002', '202405')]
+    selected, unmatched = SkuSelector.compile("202405").select(skus)
+    assert [item['sku_id'] for item in selected] == ['1000002']
+    assert unmatched == []
+
+def test_prefixed_number_matches_only_the_id():
+    skus = [sku('1000001', '202405'), sku('202405', 'Black')]
+    selected, _ = SkuSelector.compile("sku: 202405").select(skus)
+    assert [item['sku_id'] for item in selected] == ['202405']
+    selected, unmatched = SkuSelector.compile("SKU:42").select(skus)
+    assert selected == [] and unmatched == ['SKU:42']
@@ -0,0 +1,58 @@
+import uuid
+import pytest
+from core.managers.status_board import StatusBoard
+from core.managers.task_manager import TaskRecord
+
+@pytest.fixture
+def board():
+    board = StatusBoard.create(f"test-board-{uuid.uuid4().hex[:8]}", slots=8, lanes=2)
+    yield board
+    board.close()
+
+def record(**fields):
+    values = dict(task_id='a' * 32, url='https://www.tiktok.com/view/product/1729384756012',
+                  product_id='1729384756012', phone_number='+10000000000', check_interval=30,
+                  product_name='Widget', monitoring_status='Active', product_status='Available',
+                  qos='critical', last_checked=100.5, next_due=130.5, stock=(True, False, True))
+    values.update(fields)
+    return TaskRecord(**values)
+
+def test_write_read_round_trip(board):
+    board.write(3, record(), lag=1.5)
+    entry = board.read(3)
+    assert (entry.task_id, entry.product_name, entry.monitoring_status) == ('a' * 32, 'Widget', 'Active')
+    assert (entry.product_status, entry.qos, entry.kind) == ('Available', 'critical', 'product')
+    assert (entry.last_checked, entry.next_due, entry.lag) == (100.5, 130.5, 1.5)
+    assert entry.stock() == [True, False, True]
+    assert (entry.in_stock, entry.stock_total) == (2, 3)
+    assert board.read(4) is None
+
+def test_shop_status_is_rebuilt_from_stock_counts(board):
+    board.write(0, record(kind='shop', product_status='1/2 in stock', stock=(False, True)))
+    assert board.read(0).product_status == '1/2 in stock'
+    board.write(0, record(kind='shop', product_status='Blocked'))
+    assert board.read(0).product_status == 'Blocked'
+
+def test_long_text_is_cut_on_a_character_boundary(board):
+    board.write(0, record(product_name='é' * 100))
+    assert board.read(0).product_name == 'é' * 40
+
+def test_changed_reports_only_rewritten_slots(board):
+    seen = {}
+    board.write(1, record())
+    board.write(5, record(task_id='b' * 32))
+    assert [slot for slot, _ in board.changed(seen)] == [1, 5]
+    assert board.changed(seen) == []
+    board.clear(1)
+    assert board.changed(seen) == [(1, None)]
+    assert [entry.task_id for entry in board.entries(lanes=[1])] == ['b' * 32]
+
+def test_seqlock_rejects_a_torn_copy(board):
+    board.write(2, record())
+    board.buffer[board._offset(2)] += 1  # A writer stopped between its two counter updates
+    assert board.read(2) is None
+
+def test_lanes_split_the_slots(board):
+    assert list(board.lane(1)) == [4, 5, 6, 7]
+    with pytest.raises(ValueError):
+        board.lane(2)
@@ -0,0 +1,71 @@
+from core.managers.stock_history import FILE_MAGIC, StockHistory
+
+KEY = '1729384756012:1000001'
+
+def history(tmp_path, **options):
+    options.setdefault('raw_capacity', 4)
+    options.setdefault('bucket_seconds', 100)
+    return StockHistory(str(tmp_path / "stock_history.bin"), **options)
+
+def feed(store, key=KEY, start=1000.0, step=30.0, stocks=(0, 5, 5, 0, 3, 0, 0, 7, 2, 0)):
+    restocks = []
+    for n, stock in enumerate(stocks):
+        if store.record(key, stock, now=start + n * step):
+            restocks.append(n)
+    return restocks
+
+def test_only_changes_are_kept_and_restocks_reported(tmp_path):
+    store = history(tmp_path, raw_capacity=32)
+    assert feed(store) == [1, 4, 7]
+    assert store.variant_history(KEY) == [(1000.0, 0), (1030.0, 5), (1090.0, 0), (1120.0, 3),
+                                          (1150.0, 0), (1210.0, 7), (1240.0, 2), (1270.0, 0)]
+    assert store.restock_count(KEY) == 3
+    assert store.time_out_of_stock(KEY, until=1270.0) == 30 + 30 + 60
+
+def test_evicted_change_points_are_downsampled(tmp_path):
+    store = history(tmp_path)
+    feed(store)
+    assert len(store.variant_history(KEY)) == 4
+    assert store.restock_count(KEY) == 3
+    buckets = store.downsampled(KEY)
+    assert sum(bucket['observed'] for bucket in buckets) == 150.0  # 1000 up to the oldest kept change, 1150
+    assert sum(bucket['in_stock'] for bucket in buckets) == 90.0
+
+def test_file_round_trip(tmp_path):
+    store = history(tmp_path)
+    feed(store)
+    feed(store, key='42:7', stocks=(1, 0))
+    assert store.save()
+    with open(store.path, 'rb') as f:
+        assert f.read(4) == FILE_MAGIC
+
+    loaded = history(tmp_path)
+    assert loaded.keys() == store.keys()
+    for key in store.keys():
+        assert loaded.variant_history(key) == store.variant_history(key)
+        assert loaded.downsampled(key) == store.downsampled(key)
+        assert loaded.summary(key) == store.summary(key)
+        assert loaded.restock_count(key) == store.restock_count(key)
+    # Recording continues from the loaded state
+    assert loaded.record(KEY, 4, now=2000.0)
+
+def test_least_recently_updated_series_is_dropped(tmp_path):
+    store = history(tmp_path, max_series=2)
+    store.record('a:1', 1, now=1.0)
+    store.record('b:1', 1, now=2.0)
+    store.record('a:1', 2, now=3.0)
+    store.record('c:1', 1, now=4.0)
+    assert store.keys() == ['a:1', 'c:1']
+
+def test_foreign_file_is_ignored(tmp_path):
+    (tmp_path / "stock_history.bin").write_bytes(b'JUNK' + bytes(16))
+    assert history(tmp_path).keys() == []
+
+def test_record_skus_keys_by_product(tmp_path):
+    store = history(tmp_path)
+    skus = [{'sku_id': '1', 'stock': 0}, {'sku_id': '2', 'stock': 3}]
+    assert store.record_skus('99', skus, now=1.0) == ['99:2']
+    skus[0]['stock'] = 1
+    assert store.record_skus('99', skus, now=2.0) == ['99:1']
+    assert store.keys('99') == ['99:1', '99:2']
+    assert [event[0] for event in store.restock_events('99')] == ['99:2', '99:1']
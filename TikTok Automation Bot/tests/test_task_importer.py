@@ -0,0 +1,54 @@
+import pytest
+from core.managers.task_importer import read_rows, validate_row
+
+URL = 'https://www.tiktok.com/view/product/1729384756012'
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_csv_without_header_uses_the_default_columns(tmp_path):
+    path = write(tmp_path, 'tasks.csv', f"{URL},+15551234567,30,critical\n\n , \n{URL}?x=1,+15550000000\n")
+    assert list(read_rows(path)) == [
+        (1, {'url': URL, 'phone': '+15551234567', 'interval': '30', 'qos': 'critical'}),
+        (4, {'url': f'{URL}?x=1', 'phone': '+15550000000'}),
+    ]
+
+def test_csv_header_names_the_columns(tmp_path):
+    path = write(tmp_path, 'tasks.csv', f"\ufeffURL, Interval ,Phone\n{URL},45,+15551234567\n")
+    assert list(read_rows(path)) == [(2, {'url': URL, 'interval': '45', 'phone': '+15551234567'})]
+
+def test_jsonl_rows_and_bad_lines(tmp_path):
+    path = write(tmp_path, 'tasks.jsonl', f'{{"url": "{URL}", "phone": "+15551234567"}}\n\nnot json\n')
+    assert list(read_rows(path)) == [
+        (1, {'url': URL, 'phone': '+15551234567'}),
+        (3, {'_error': "not valid JSON"}),
+    ]
+
+def test_valid_row_is_normalised():
+    spec, reason = validate_row({'url': f'{URL}?utm_source=x', 'phone': '+1 (555) 123-4567',
+                                 'qos': 'critical', 'variants': ' red / xl '}, 30)
+    assert reason is None
+    assert spec == {'url': URL, 'phone_number': '+15551234567', 'check_interval': 30,
+                    'qos': 'critical', 'kind': 'product', 'variants': 'red/xl'}
+
+@pytest.mark.parametrize('row, reason', [
+    ({'_error': "not valid JSON"}, "not valid JSON"),
+    ({'url': 'tiktok.com/view/product/1', 'phone': '+15551234567'}, "invalid URL"),
+    ({'url': URL, 'phone': '12345'}, "invalid phone number"),
+    ({'url': URL, 'phone': '+15551234567', 'qos': 'urgent'}, "invalid QoS class"),
+    ({'url': URL, 'phone': '+15551234567', 'kind': 'feed'}, "invalid task kind"),
+    ({'url': URL, 'phone': '+15551234567', 'variants': 'Red; /'}, "invalid variants"),
+    ({'url': URL, 'phone': '+15551234567', 'kind': 'shop', 'variants': 'Red'}, "variants can only be selected"),
+    ({'url': URL, 'phone': '+15551234567', 'interval': 'often'}, "invalid interval"),
+    ({'url': URL, 'phone': '+15551234567', 'interval': '3'}, "interval 3 outside 5-3600s"),
+])
+def test_invalid_rows_give_a_reason(row, reason):
+    spec, message = validate_row(row, 30)
+    assert spec is None
+    assert message.startswith(reason)
+
+def test_critical_tasks_may_go_below_the_usual_minimum():
+    spec, _ = validate_row({'url': URL, 'phone': '+15551234567', 'interval': '2', 'qos': 'critical'}, 30)
+    assert spec['check_interval'] == 2
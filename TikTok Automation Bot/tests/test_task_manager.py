@@ -0,0 +1,97 @@
+import threading
+import pytest
+from core.managers.task_manager import TaskEventType, TaskManager, TaskStatus
+
+URL = 'https://www.tiktok.com/view/product/1729384756012'
+
+@pytest.fixture
+def task_manager():
+    task_manager = TaskManager()
+    task_manager.clear_all_tasks()
+    yield task_manager
+    task_manager.clear_all_tasks()
+
+@pytest.fixture
+def events(task_manager):
+    events = []
+    task_manager.subscribe(events.append)
+    yield events
+    task_manager.unsubscribe(events.append)
+
+def test_indexes_follow_url_and_status_changes(task_manager):
+    task = task_manager.create_task(URL, '+10000000000', 60, task_id='t1')
+    assert task.product_id == '1729384756012'
+    assert task_manager.get_task_by_url(URL + '?utm_source=x') is task
+    assert task_manager.get_tasks_by_product('1729384756012') == [task]
+
+    task_manager.update_task_status('t1', TaskStatus.ACTIVE)
+    assert [t.task_id for t in task_manager.get_tasks_by_status(TaskStatus.ACTIVE)] == ['t1']
+    assert task_manager.get_tasks_by_status(TaskStatus.PENDING) == []
+    assert task_manager.is_url_monitored(URL)
+
+    task_manager.update_task('t1', url='https://www.tiktok.com/view/product/42')
+    assert task_manager.get_tasks_by_product('1729384756012') == []
+    assert task_manager.get_task_by_url(URL) is None
+
+    task_manager.remove_task('t1')
+    assert task_manager.get_tasks_by_status(TaskStatus.ACTIVE) == []
+    assert task_manager.count_by_status(TaskStatus.ACTIVE) == 0
+
+def test_update_replaces_the_record(task_manager, events):
+    before = task_manager.create_task(URL, '+10000000000', 60, task_id='t1')
+    after = task_manager.update_product_name('t1', 'Mug')
+    assert before.product_name == 'Loading...'
+    assert after.product_name == 'Mug'
+    assert task_manager.get_task('t1') is after
+    assert events[-1].previous is before and events[-1].changed == ('product_name',)
+
+def test_update_without_changes_publishes_nothing(task_manager, events):
+    task = task_manager.create_task(URL, '+10000000000', 60, task_id='t1')
+    assert task_manager.update_product_name('t1', 'Loading...') is task
+    assert task_manager.update_task('missing', product_name='Mug') is None
+    assert [event.type for event in events] == [TaskEventType.CREATED]
+
+def test_events_reach_listeners_in_update_order(task_manager, events):
+    task_manager.create_task(URL, '+10000000000', 60, task_id='t1')
+    start = threading.Barrier(8)
+
+    def rename(n):
+        start.wait()
+        for i in range(50):
+            task_manager.update_product_name('t1', f'{n}-{i}')
+
+    threads = [threading.Thread(target=rename, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    updates = [event for event in events if event.type == TaskEventType.UPDATED]
+    # Each event continues from the record the one before it produced
+    for earlier, later in zip(updates, updates[1:]):
+        assert later.previous is earlier.record
+    assert updates[-1].record is task_manager.get_task('t1')
+
+def test_listener_may_write_back(task_manager, events):
+    def activate(event):
+        if event.type == TaskEventType.CREATED:
+            task_manager.update_task_status(event.task_id, TaskStatus.ACTIVE)
+
+    task_manager.subscribe(activate)
+    try:
+        task_manager.create_task(URL, '+10000000000', 60, task_id='t1')
+    finally:
+        task_manager.unsubscribe(activate)
+    assert [event.type for event in events] == [TaskEventType.CREATED, TaskEventType.UPDATED]
+    assert task_manager.get_task('t1').monitoring_status == TaskStatus.ACTIVE.value
+
+def test_failing_listener_does_not_stop_delivery(task_manager, events):
+    def fail(event):
+        raise RuntimeError("boom")
+
+    task_manager.subscribe(fail)
+    try:
+        task_manager.create_task(URL, '+10000000000', 60, task_id='t1')
+    finally:
+        task_manager.unsubscribe(fail)
+    assert len(events) == 1
@@ -0,0 +1,54 @@
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtCore import pyqtSignal
+import logging
+import time
+from core.managers.log_pipeline import current_pipeline
+
+class LogView(QPlainTextEdit):
+    """Read-only log panel that keeps only the last max_lines lines"""
+    line_received = pyqtSignal(str)
+
+    def __init__(self, max_lines=500):
+        super().__init__()
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)
+        self.line_received.connect(self.append)
+        self.handler = None
+
+    def append(self, text: str):
+        self.appendPlainText(text)
+
+    def attach_to_logging(self, level=logging.WARNING):
+        """Mirror log records at or above level into the view, from any thread.
+        With the log pipeline installed the handler runs on its listener thread,
+        so logging threads never wait on the view."""
+        if self.handler is None:
+            self.handler = LogViewHandler(self.line_received)
+            self.handler.setLevel(level)
+            pipeline = current_pipeline()
+            if pipeline is not None:
+                pipeline.add_handler(self.handler)
+            else:
+                logging.getLogger().addHandler(self.handler)
+        return self.handler
+
+    def detach_from_logging(self):
+        if self.handler is not None:
+            pipeline = current_pipeline()
+            if pipeline is not None:
+                pipeline.remove_handler(self.handler)
+            logging.getLogger().removeHandler(self.handler)
+            self.handler = None
+
+class LogViewHandler(logging.Handler):
+    """Hands formatted records to the GUI thread through a queued signal"""
+
+    def __init__(self, signal):
+        super().__init__()
+        self.signal = signal
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.signal.emit(f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname}: {record.getMessage()}")
+        except Exception:
+            self.handleError(record)
@@ -2,10 +2,14 @@ from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem, QPushButton, QHeader
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QColor
 import logging
+from core.managers.task_manager import TaskEventType
 
 class TableWidget(QTableWidget):
     status_updated = pyqtSignal(str, str, str)
     stop_monitoring = pyqtSignal(str)
+    task_changed = pyqtSignal(object)
+    # Fields that change on every check but are not shown in the table
+    TIMING_FIELDS = {'last_checked', 'next_due'}
 
     def __init__(self):
         super().__init__()
@@ -13,6 +17,28 @@ class TableWidget(QTableWidget):
         self.row_task_map = {}
         self.task_row_map = {}
         self.logger = logging.getLogger(__name__)
+        self.task_changed.connect(self.apply_task_event)
+
+    def bind_task_manager(self, task_manager):
+        """Subscribe to TaskManager events; updates are queued onto the GUI thread"""
+        task_manager.subscribe(self.task_changed.emit)
+
+    def apply_task_event(self, event):
+        """Reflect a TaskManager change in the table"""
+        if event.type == TaskEventType.REMOVED:
+            return
+        record = event.record
+        if event.type == TaskEventType.UPDATED:
+            if record.task_id not in self.task_row_map or set(event.changed) <= self.TIMING_FIELDS:
+                return
+        product_name = record.product_name
+        if record.variants:
+            # Targeted tasks: the status column only covers these variants
+            product_name = f"{product_name} [{record.variants}]"
+        self.add_or_update_row(
+            record.url, record.task_id, product_name,
+            record.monitoring_status, record.product_status, record.notification_status
+        )
 
     def setup_table(self):
         """Initialize the table structure"""
@@ -94,9 +120,12 @@ class TableWidget(QTableWidget):
             elif text == "Unknown":
                 item.setBackground(QColor("#BF616A"))
                 item.setForeground(QColor("#FFFFFF"))
-            elif text == "Searching":
+            elif text in ("Searching", "Retrying"):
                 item.setBackground(QColor("#EBCB8B"))  # Yellow
                 item.setForeground(QColor("#000000"))
+            elif text == "Blocked":
+                item.setBackground(QColor("#B48EAD"))  # Purple
+                item.setForeground(QColor("#FFFFFF"))
                 
         elif status_type == "notification":
             if text == "Sent":
@@ -146,7 +175,8 @@ class TableWidget(QTableWidget):
                 self.insertRow(0)
                 row = 0
                 
-                # Update row mappings
+                # Update row mappings (existing rows moved down by one)
+                self.shift_row_mappings(0, 1)
                 self.row_task_map[row] = task_id
                 self.task_row_map[task_id] = row
                 
@@ -238,9 +268,25 @@ class TableWidget(QTableWidget):
                 # Update mappings after removal
                 del self.row_task_map[row]
                 del self.task_row_map[task_id]
+                self.shift_row_mappings(row + 1, -1)
         except Exception as e:
             self.logger.error(f"Error removing row: {e}")
 
+    def shift_row_mappings(self, start, delta):
+        """Keep row/task mappings in step after rows are inserted or removed"""
+        shifted = {}
+        for row, task_id in self.row_task_map.items():
+            if row >= start:
+                row += delta
+            shifted[row] = task_id
+            self.task_row_map[task_id] = row
+        self.row_task_map = shifted
+
+    def selected_task_ids(self):
+        """Task IDs of the rows currently selected"""
+        rows = {index.row() for index in self.selectedIndexes()}
+        return [self.row_task_map[row] for row in sorted(rows) if row in self.row_task_map]
+
     def clear_completed(self):
         """Clear all completed monitoring tasks"""
         try:
@@ -1,27 +1,178 @@
 # MainWindow.py
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QPushButton, QSpinBox, QTextEdit,
-    QMessageBox
+    QLabel, QLineEdit, QPushButton, QSpinBox,
+    QMessageBox, QCheckBox, QDateTimeEdit, QDoubleSpinBox, QFileDialog, QComboBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QDateTime, QTimer
 from PyQt6.QtGui import QFont
 import logging
+import os
 from core.managers.persistence_manager import PersistenceManager, MonitoringTask
+from core.managers.task_manager import TaskManager
+from core.managers.shutdown_coordinator import ShutdownCoordinator
+from core.managers.session_store import SessionStore
+from core.managers.egress_pool import EgressPool
+from core.managers.drop_window import DropWindow
+from core.managers.checkout_executor import CheckoutExecutor
+from core.managers.stock_history import StockHistory
+from core.managers.profiler import SamplingProfiler
+from core.managers.whatsapp_notifier import WhatsAppNotifier
+from core.managers.monitor_scheduler import MonitorScheduler
+from core.managers.load_shedder import SheddingPolicy
+from core.managers.notification_queue import NotificationQueue
+from core.managers.qos import BY_RANK, set_min_intervals
+from core.managers.sku_selector import SkuSelector
+from core.managers.browser_watchdog import BrowserWatchdog
+from core.managers.event_log import EventLog
+from core.managers.event_subscribers import NotificationSubscriber, SubscriberOffsets, WebhookSubscriber
+from core.managers.task_importer import TaskImporter
+from core.managers.config_manager import ConfigManager
+from core.managers.response_cache import ResponseCache
+from core.managers.circuit_breaker import CircuitBreakerRegistry
+from core.managers.web_monitor import ChromeSettings
+from core.managers.status_board import StatusBoardPublisher
+from core.managers.control_api import ControlAPI
 from core.product_monitor import ProductMonitorWorker
+from ui.components.log_view import LogView
+
+def lane_path(path: str, lane: int) -> str:
+    """Per-lane name of a state file or directory ("monitoring_state.lane2.json"); lane 0 keeps the plain name"""
+    if not lane:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.lane{lane}{ext}"
 
 class MainWindow(QMainWindow):
-    def __init__(self, driver_path, table_widget):
+    def __init__(self, driver_path, table_widget, config=None, status_board=None, status_lane=0):
         super().__init__()
         self.driver_path = driver_path
         self.table_widget = table_widget
-        self.persistence_manager = PersistenceManager()
+        self.config = config or ConfigManager()
+        # Shared-memory status of every engine process; this process writes its own lane
+        self.status_board = status_board
+        self.status_lane = status_lane
+        self.status_publisher = None
+        self._board_seen = {}   # slot -> sequence last shown
+        self._board_tasks = {}  # slot -> task_id shown from another lane
+        # Every engine process restores and writes only its own tasks, log and history
+        self.persistence_manager = PersistenceManager(lane_path("monitoring_state.json", status_lane))
+        self.task_manager = TaskManager()
+        self.table_widget.bind_task_manager(self.task_manager)
+        self.persistence_manager.bind_task_manager(self.task_manager)
+        self.shutdown_coordinator = ShutdownCoordinator(self.task_manager, self.persistence_manager)
+        self.session_store = SessionStore()
+        self.egress_pool = EgressPool.from_file()
+        self.checkout_executor = CheckoutExecutor(driver_path, self.session_store, self.egress_pool)
+        self.stock_history = StockHistory(lane_path("stock_history.bin", status_lane))
+        self.sampling_profiler = SamplingProfiler()
+        self.browser_watchdog = BrowserWatchdog()
+        self.browser_watchdog.start()
         self.active_monitors = {}  # Dictionary to store active monitoring workers
+        self._shut_down = False
+        self.notifier = None  # Replaces the WhatsApp notification when set (load testing)
+        self.whatsapp = WhatsAppNotifier()
+        self.notification_queue = NotificationQueue()
+        # Restocks are logged on the check path; alerts and webhooks are sent by log subscribers
+        self.event_log = EventLog(lane_path("events", status_lane))
+        self.event_offsets = SubscriberOffsets(os.path.join(self.event_log.directory, "offsets.json"))
+        self.notification_subscriber = NotificationSubscriber(
+            self.event_log, self.event_offsets, self.task_manager,
+            send=self.whatsapp.send, notifications=self.notification_queue
+        )
+        self.notification_subscriber.start()
+        self.webhooks = []
+        self.scheduler = MonitorScheduler(
+            driver_path,
+            self.task_manager,
+            session_store=self.session_store,
+            egress_pool=self.egress_pool,
+            stock_history=self.stock_history,
+            whatsapp=self.whatsapp,
+            policy=SheddingPolicy.from_file(),
+            notifications=self.notification_queue,
+            event_log=self.event_log
+        )
+        self.task_importer = TaskImporter(self.task_manager, self.persistence_manager, self.scheduler)
+        self.table_widget.stop_monitoring.connect(self.scheduler.stop_task)
+        self.scheduler.start()
+        # Started by main.py. Stops go through the table signal: worker threads get them queued
+        # to the GUI thread, the scheduler's stop_task runs directly on the request thread
+        self.control_api = ControlAPI(
+            self.task_manager, self.scheduler, self.task_importer,
+            stop_task=self.table_widget.stop_monitoring.emit,
+            metrics=self.extra_metrics,
+            event_log=self.event_log
+        )
         self.logger = logging.getLogger(__name__)
         
         self.setup_ui()
+        self.bind_config()
+        self.bind_status_board()
         self.restore_active_monitors()
 
+    def bind_config(self):
+        """Apply config.json now and re-apply the sections that change while running"""
+        self.config.watch('driver', lambda section: ChromeSettings().configure(**section))
+        self.config.watch('twilio', lambda section: self.whatsapp.configure(**section))
+        if not self.whatsapp.enabled:
+            self.logger.error("Twilio credentials are not configured; WhatsApp alerts are disabled until "
+                              "they are set in the \"twilio\" config section or the TWILIO_* environment variables")
+        self.config.watch('notifications', lambda section: self.notification_queue.configure(**section))
+        self.config.watch('scheduler', lambda section: self.scheduler.configure(**section))
+        self.config.watch('shedding', self.apply_shedding_config)
+        self.config.watch('intervals', self.apply_interval_config)
+        self.config.watch('watchdog', lambda section: self.browser_watchdog.configure(**section))
+        self.config.watch('response_cache', lambda section: ResponseCache().configure(**section))
+        self.config.watch('breakers', lambda section: CircuitBreakerRegistry().configure(**section))
+        self.config_timer = QTimer(self)
+        self.config_timer.timeout.connect(self.config.poll)
+        self.config_timer.start(2000)
+
+    def bind_status_board(self):
+        """Publish this process's tasks to the board; lane 0 (the window) also shows the other lanes"""
+        self.board_timer = QTimer(self)
+        if self.status_board is None:
+            return
+        self.status_publisher = StatusBoardPublisher(self.status_board, self.status_lane, self.task_manager)
+        if self.status_lane == 0:
+            self.board_timer.timeout.connect(self.refresh_remote_status)
+            self.board_timer.start(1000)
+
+    def refresh_remote_status(self):
+        """Reflect tasks run by other engine processes in the table, read from the status board"""
+        lanes = [lane for lane in range(self.status_board.lanes) if lane != self.status_lane]
+        for slot, entry in self.status_board.changed(self._board_seen, lanes):
+            task_id = self._board_tasks.pop(slot, None)
+            if task_id is not None and (entry is None or entry.task_id != task_id):
+                self.table_widget.remove_row(task_id)
+            if entry is None:
+                continue
+            self._board_tasks[slot] = entry.task_id
+            self.table_widget.add_or_update_row(
+                entry.url, entry.task_id, entry.product_name,
+                entry.monitoring_status, entry.product_status, entry.notification_status
+            )
+
+    def close_status_board(self):
+        self.board_timer.stop()
+        if self.status_publisher is not None:
+            self.status_publisher.close()
+            self.status_publisher = None
+        if self.status_board is not None:
+            self.status_board.close()
+            self.status_board = None
+
+    def apply_shedding_config(self, section):
+        """Config values override shedding.json"""
+        self.scheduler.load.policy = SheddingPolicy.from_dict(dict(SheddingPolicy.from_file().to_dict(), **section))
+
+    def apply_interval_config(self, section):
+        """Default interval for new tasks and per-class cadence floors; running tasks use them from their next check"""
+        if section.get('default') is not None:
+            self.interval_input.setValue(int(section['default']))
+        set_min_intervals(section.get('floors'))
+
     def setup_ui(self):
         self.setWindowTitle("TikTok Shop Monitor")
         self.setMinimumSize(800, 600)
@@ -36,7 +187,7 @@ class MainWindow(QMainWindow):
                 font-size: 14px;
                 color: #ECEFF4;
             }
-            QLineEdit, QSpinBox, QTextEdit {
+            QLineEdit, QSpinBox, QDoubleSpinBox, QDateTimeEdit, QPlainTextEdit, QComboBox {
                 background-color: #3B4252;
                 border: 1px solid #4C566A;
                 color: #ECEFF4;
@@ -74,8 +225,10 @@ class MainWindow(QMainWindow):
         url_label.setMinimumWidth(120)
         self.url_input = QLineEdit()
         self.url_input.setPlaceholderText("Enter TikTok Shop product URL")
+        self.shop_input = QCheckBox("Shop/collection page")
         url_layout.addWidget(url_label)
         url_layout.addWidget(self.url_input)
+        url_layout.addWidget(self.shop_input)
         input_section.addLayout(url_layout)
 
         # WhatsApp input
@@ -88,6 +241,26 @@ class MainWindow(QMainWindow):
         phone_layout.addWidget(self.phone_input)
         input_section.addLayout(phone_layout)
 
+        # Auto add-to-cart account input
+        checkout_layout = QHBoxLayout()
+        checkout_label = QLabel("Cart Account:")
+        checkout_label.setMinimumWidth(120)
+        self.checkout_input = QLineEdit()
+        self.checkout_input.setPlaceholderText("Optional: account to add the item to cart on restock")
+        checkout_layout.addWidget(checkout_label)
+        checkout_layout.addWidget(self.checkout_input)
+        input_section.addLayout(checkout_layout)
+
+        # Variant selector input (watch only some sizes/colours)
+        variants_layout = QHBoxLayout()
+        variants_label = QLabel("Variants:")
+        variants_label.setMinimumWidth(120)
+        self.variants_input = QLineEdit()
+        self.variants_input.setPlaceholderText("Optional: e.g. Red/XL; Blue/M or sku: <SKU ID>, separated by ';'")
+        variants_layout.addWidget(variants_label)
+        variants_layout.addWidget(self.variants_input)
+        input_section.addLayout(variants_layout)
+
         # Interval input
         interval_layout = QHBoxLayout()
         interval_label = QLabel("Check Interval (seconds):")
@@ -99,6 +272,39 @@ class MainWindow(QMainWindow):
         interval_layout.addWidget(self.interval_input)
         input_section.addLayout(interval_layout)
 
+        # QoS class input
+        qos_layout = QHBoxLayout()
+        qos_label = QLabel("Priority:")
+        qos_label.setMinimumWidth(120)
+        self.qos_input = QComboBox()
+        self.qos_input.addItems([qos.value for qos in BY_RANK])
+        self.qos_input.setCurrentText("normal")
+        qos_layout.addWidget(qos_label)
+        qos_layout.addWidget(self.qos_input)
+        input_section.addLayout(qos_layout)
+
+        # Drop window input (optional high-frequency polling around an announced restock)
+        drop_layout = QHBoxLayout()
+        self.drop_enabled = QCheckBox("Drop Window:")
+        self.drop_enabled.setMinimumWidth(120)
+        self.drop_start_input = QDateTimeEdit(QDateTime.currentDateTime().addSecs(3600))
+        self.drop_start_input.setCalendarPopup(True)
+        self.drop_start_input.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.drop_duration_input = QSpinBox()
+        self.drop_duration_input.setRange(1, 240)
+        self.drop_duration_input.setValue(10)
+        self.drop_duration_input.setSuffix(" min")
+        self.drop_cadence_input = QDoubleSpinBox()
+        self.drop_cadence_input.setRange(0.25, 5.0)
+        self.drop_cadence_input.setSingleStep(0.25)
+        self.drop_cadence_input.setValue(0.5)
+        self.drop_cadence_input.setSuffix(" s")
+        drop_layout.addWidget(self.drop_enabled)
+        drop_layout.addWidget(self.drop_start_input)
+        drop_layout.addWidget(self.drop_duration_input)
+        drop_layout.addWidget(self.drop_cadence_input)
+        input_section.addLayout(drop_layout)
+
         layout.addLayout(input_section)
 
         # Button section
@@ -106,21 +312,35 @@ class MainWindow(QMainWindow):
         self.start_button = QPushButton("Start Monitoring")
         self.stop_button = QPushButton("Stop All")
         self.clear_completed_button = QPushButton("Clear Completed")
+        self.import_button = QPushButton("Import Tasks")
+        self.profile_button = QPushButton("Profile Tasks")
+        self.sampling_button = QPushButton("Start Sampling")
         self.stop_button.setEnabled(False)
         button_layout.addWidget(self.start_button)
         button_layout.addWidget(self.stop_button)
         button_layout.addWidget(self.clear_completed_button)
+        button_layout.addWidget(self.import_button)
+        button_layout.addWidget(self.profile_button)
+        button_layout.addWidget(self.sampling_button)
         layout.addLayout(button_layout)
 
+        # Scheduler load indicator
+        self.load_label = QLabel()
+        layout.addWidget(self.load_label)
+        self.load_timer = QTimer(self)
+        self.load_timer.timeout.connect(self.update_load_indicator)
+        self.load_timer.start(2000)
+        self.update_load_indicator()
+
         # Add table widget
         layout.addWidget(self.table_widget)
 
         # Log display
-        self.log_display = QTextEdit()
-        self.log_display.setReadOnly(True)
+        self.log_display = LogView(max_lines=500)
         self.log_display.setMaximumHeight(150)
+        self.log_display.attach_to_logging()
         self.log_display.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #2E3440;
                 color: #D8DEE9;
                 border: 1px solid #4C566A;
@@ -132,17 +352,44 @@ class MainWindow(QMainWindow):
 
         # Connect signals
         self.start_button.clicked.connect(self.start_monitoring)
-        self.stop_button.clicked.connect(self.stop_all_monitoring)
+        self.stop_button.clicked.connect(lambda: self.stop_all_monitoring())
         self.clear_completed_button.clicked.connect(self.clear_completed_tasks)
+        self.import_button.clicked.connect(lambda: self.import_tasks())
+        self.profile_button.clicked.connect(lambda: self.profile_tasks())
+        self.sampling_button.clicked.connect(self.toggle_process_sampling)
 
     def restore_active_monitors(self):
         """Restore previously active monitoring tasks"""
         try:
             active_tasks = self.persistence_manager.load_active_tasks()
+            scheduled = []
             for task in active_tasks:
-                if task.last_status == "Active":
+                if task.last_status != "Active":
+                    continue
+                if task.scheduled:
+                    scheduled.append(task)
+                else:
                     self.start_monitoring_task(task)
                     self.log_display.append(f"Restored monitoring for: {task.url}")
+            if scheduled:
+                # Imported tasks go back to the scheduler in one batch
+                self.task_importer.add_specs([{
+                    'url': task.url,
+                    'phone_number': task.phone_number,
+                    'check_interval': task.interval,
+                    'task_id': task.task_id,
+                    'product_name': "Loading",
+                    'monitoring_status': "Active",
+                    'product_status': "Searching",
+                    'notification_status': "Pending",
+                    'drop_windows': [DropWindow.from_dict(window) for window in task.drop_windows],
+                    'scheduled': True,
+                    'qos': task.qos,
+                    'kind': task.kind,
+                    'variants': task.variants
+                } for task in scheduled])
+                self.log_display.append(f"Restored {len(scheduled)} scheduled tasks")
+                self.stop_button.setEnabled(True)
         except Exception as e:
             self.logger.error(f"Error restoring monitors: {e}")
             self.log_display.append("Error restoring previous monitoring tasks")
@@ -159,30 +406,66 @@ class MainWindow(QMainWindow):
                 if not url or not phone_number:
                     self.log_display.append("Please provide both product URL and WhatsApp number.")
                     return None
+                if not self.scheduler.accepting():
+                    self.log_display.append("Monitoring is overloaded; not starting new tasks until it recovers.")
+                    return None
+                if self.shop_input.isChecked():
+                    return self.start_shop_task(url, phone_number, interval)
+                task_id = None
+                checkout_account = self.checkout_input.text().strip() or None
+                qos = self.qos_input.currentText()
+                variants = self.variants_input.text().strip()
+                try:
+                    SkuSelector.compile(variants)
+                except ValueError as e:
+                    self.log_display.append(f"Invalid variants: {e}")
+                    return None
+                drop_windows = []
+                if self.drop_enabled.isChecked():
+                    drop_windows.append(DropWindow(
+                        start=float(self.drop_start_input.dateTime().toSecsSinceEpoch()),
+                        duration=self.drop_duration_input.value() * 60.0,
+                        cadence=self.drop_cadence_input.value()
+                    ))
             else:
                 # Restored task
                 url = task.url
                 phone_number = task.phone_number
                 interval = task.interval
+                task_id = task.task_id
+                checkout_account = task.checkout_account
+                qos = task.qos
+                variants = task.variants
+                drop_windows = [DropWindow.from_dict(window) for window in task.drop_windows]
 
+            # The worker registers the task with the TaskManager, which adds the table row
             monitor = ProductMonitorWorker(
                 driver_path=self.driver_path,
                 table_widget=self.table_widget,
-                persistence_manager=self.persistence_manager,
+                task_manager=self.task_manager,
                 url=url,
                 phone_number=phone_number,
-                check_interval=interval
+                check_interval=interval,
+                task_id=task_id,
+                session_store=self.session_store,
+                egress_pool=self.egress_pool,
+                drop_windows=drop_windows,
+                checkout_executor=self.checkout_executor,
+                checkout_account=checkout_account,
+                stock_history=self.stock_history,
+                notifier=self.notifier,
+                whatsapp=self.whatsapp,
+                qos=qos,
+                notifications=self.notification_queue,
+                event_log=self.event_log,
+                variants=variants,
+                load_monitor=self.scheduler.load
             )
             
             monitor_id = monitor.task_id
             self.active_monitors[monitor_id] = monitor
             monitor.start()
             
-            # Add new row to the table
-            self.table_widget.add_or_update_row(
-                url, monitor_id, "Loading", "Active", "Searching", "Pending"
-            )
-            
             self.log_display.append(f"Started monitoring: {url}")
             self.stop_button.setEnabled(True)
             return monitor_id
@@ -192,6 +475,22 @@ class MainWindow(QMainWindow):
             self.log_display.append(f"Error starting monitoring: {str(e)}")
             return None
 
+    def start_shop_task(self, url, phone_number, interval):
+        """Watch a shop/collection listing on the scheduler; one task covers every listed product"""
+        report = self.task_importer.import_rows([(1, {
+            'url': url, 'phone': phone_number, 'interval': interval,
+            'qos': self.qos_input.currentText(), 'kind': "shop"
+        })])
+        if report.invalid:
+            self.log_display.append(f"Cannot watch shop: {report.invalid[0][1]}")
+            return None
+        if not report.task_ids:
+            self.log_display.append(f"Shop not added: {report.summary()}")
+            return None
+        self.log_display.append(f"Started shop monitoring: {url}")
+        self.stop_button.setEnabled(True)
+        return report.task_ids[0]
+
     def start_monitoring(self):
         """Start button handler"""
         monitor_id = self.start_monitoring_task()
@@ -199,25 +498,140 @@ class MainWindow(QMainWindow):
             self.start_button.setEnabled(True)  # Allow multiple monitoring tasks
             self.stop_button.setEnabled(True)
 
-    def stop_all_monitoring(self):
-        """Stop all monitoring tasks"""
+    def stop_all_monitoring(self, keep_tasks=False):
+        """Stop all monitoring tasks in parallel.
+
+        keep_tasks=True leaves the tasks persisted as Active (application exit),
+        otherwise they are marked Stopped.
+        """
         try:
-            for monitor in list(self.active_monitors.values()):
-                monitor.stop()
-                monitor.wait()
+            report = self.shutdown_coordinator.shutdown(
+                list(self.active_monitors.values()) + [self.scheduler],
+                mark_stopped=not keep_tasks
+            )
             self.active_monitors.clear()
-            self.log_display.append("Stopped all monitoring tasks")
+            if not keep_tasks:
+                self.scheduler.reset()
+            self.log_display.append(
+                f"Stopped all monitoring tasks ({report['tasks']} tasks in {report['elapsed']}s)"
+            )
             self.stop_button.setEnabled(False)
             self.start_button.setEnabled(True)
         except Exception as e:
             self.logger.error(f"Error stopping monitors: {e}")
             self.log_display.append("Error stopping monitoring tasks")
 
+    def import_tasks(self, path=None):
+        """Bulk-add tasks from a CSV (url,phone,interval) or JSONL file onto the scheduler"""
+        if path is None:
+            path, _ = QFileDialog.getOpenFileName(
+                self, "Import Tasks", "", "Task files (*.csv *.jsonl *.ndjson);;All files (*)"
+            )
+            if not path:
+                return None
+        try:
+            report = self.task_importer.import_file(path, default_interval=self.interval_input.value())
+        except Exception as e:
+            self.logger.error(f"Error importing tasks: {e}")
+            self.log_display.append(f"Error importing tasks: {str(e)}")
+            return None
+        self.log_display.append(f"Imported {path}: {report.summary()}")
+        for line_number, reason in report.invalid[:10]:
+            self.log_display.append(f"  line {line_number}: {reason}")
+        if report.added:
+            self.stop_button.setEnabled(True)
+        return report
+
+    def add_webhook(self, url):
+        """Deliver every logged restock/change event to a local HTTP endpoint"""
+        webhook = WebhookSubscriber(self.event_log, self.event_offsets, url)
+        webhook.start()
+        self.webhooks.append(webhook)
+        self.log_display.append(f"Delivering events to {url}")
+        return webhook
+
+    def extra_metrics(self):
+        """Metrics outside the task core, for the control API"""
+        subscribers = [self.notification_subscriber] + self.webhooks
+        return {
+            'config': self.config.metrics(),
+            'status_board': self.status_publisher.metrics() if self.status_publisher else None,
+            'browsers': self.browser_watchdog.metrics(),
+            'egress': self.egress_pool.metrics(),
+            'checkout': self.checkout_executor.latency_report(),
+            'event_log': dict(
+                self.event_log.metrics(),
+                subscriber_lag={subscriber.name: subscriber.lag() for subscriber in subscribers},
+                repeat_alerts_skipped=self.notification_subscriber.skipped
+            )
+        }
+
+    def update_load_indicator(self):
+        """Show scheduler lag and utilisation; red while tasks are being shed"""
+        metrics = self.scheduler.metrics()
+        load = metrics['load']
+        browsers = self.browser_watchdog.metrics()
+        text = (f"Scheduler: {metrics['tasks']} tasks | lag p90 {load['lag_p90']:.1f}s | "
+                f"utilisation {load['utilisation']:.0%} | "
+                f"{browsers['browsers']} browsers, {browsers['total_rss_mb']:.0f} MB")
+        if load['state'] == "overloaded":
+            text = f"OVERLOADED - {text} | {metrics['paused']} paused"
+            self.load_label.setStyleSheet("color: #BF616A; font-weight: bold;")
+        else:
+            self.load_label.setStyleSheet("")
+        self.load_label.setText(text)
+
     def clear_completed_tasks(self):
         """Clear completed monitoring tasks from table"""
         self.table_widget.clear_completed()
         self.log_display.append("Cleared completed tasks")
 
+    def profile_tasks(self, cycles=5):
+        """Profile the next check cycles of the selected tasks (all tasks if none selected).
+
+        Only thread-backed monitors can be profiled; tasks run by the
+        scheduler share its worker pool and are left out (use the sampling
+        profiler for those).
+        """
+        task_ids = self.table_widget.selected_task_ids() or list(self.active_monitors)
+        workers = [self.active_monitors[task_id] for task_id in task_ids if task_id in self.active_monitors]
+        for worker in workers:
+            worker.profile_cycles(cycles)
+        self.log_display.append(f"Profiling the next {cycles} checks of {len(workers)} task(s); results go to profiles/")
+        if len(workers) < len(task_ids):
+            self.log_display.append(f"{len(task_ids) - len(workers)} task(s) have no monitor thread (scheduled or stopped) and were not profiled")
+
+    def toggle_process_sampling(self):
+        """Start or stop the whole-process sampling profiler"""
+        if self.sampling_profiler.running:
+            path = self.sampling_profiler.stop()
+            self.sampling_button.setText("Start Sampling")
+            self.log_display.append(f"Process profile saved to {path}" if path else "Process sampling stopped (no samples)")
+        else:
+            self.sampling_profiler.start()
+            self.sampling_button.setText("Stop Sampling")
+            self.log_display.append("Process sampling started")
+
+    def shutdown(self):
+        """Stop monitoring (tasks stay persisted as Active) and release every component; runs once"""
+        if self._shut_down:
+            return
+        self._shut_down = True
+        self.stop_all_monitoring(keep_tasks=True)
+        self.persistence_manager.close()
+        self.checkout_executor.close()
+        self.stock_history.save()
+        self.sampling_profiler.stop()
+        self.control_api.stop()
+        self.load_timer.stop()
+        self.config_timer.stop()
+        self.close_status_board()
+        self.browser_watchdog.stop()
+        for subscriber in [self.notification_subscriber] + self.webhooks:
+            subscriber.stop()
+        self.event_log.close()
+        self.log_display.detach_from_logging()
+
     def closeEvent(self, event):
         """Handle application closure"""
         try:
@@ -229,7 +643,7 @@ class MainWindow(QMainWindow):
             )
 
             if reply == QMessageBox.StandardButton.Yes:
-                self.stop_all_monitoring()
+                self.shutdown()
                 event.accept()
             else:
                 event.ignore()